@@ -0,0 +1,51 @@
+import hashlib
+from functools import wraps
+
+from .pagination import KeysetPagination
+
+
+def make_etag(*parts):
+    raw = "|".join(str(part) for part in parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:40]
+
+
+def get_latest(*values):
+    latest = None
+    for value in values:
+        if value is None:
+            continue
+        if latest is None or value > latest:
+            latest = value
+    return latest
+
+
+def memoize_on_request(func):
+    """
+    Runs `func(request, ...)` once per request.
+
+    `condition()` calls the ETag and Last-Modified functions separately, and the
+    view may need the same rows again, so they share one lookup.
+    """
+
+    attribute = f"_memoized_{func.__name__}"
+
+    @wraps(func)
+    def wrapper(request, *args, **kwargs):
+        if attribute not in request.__dict__:
+            setattr(request, attribute, func(request, *args, **kwargs))
+        return getattr(request, attribute)
+
+    return wrapper
+
+
+def get_keyset_page_rows(request, queryset, fields, ordering=None):
+    paginator = KeysetPagination(ordering=ordering)
+    paginator.prepare(request)
+    position, reverse = paginator.decode_cursor(request)
+
+    queryset = queryset.order_by(*paginator.get_order_by(reverse))
+    if position is not None:
+        position = paginator.convert_position(queryset.model, position)
+        queryset = queryset.filter(paginator.get_seek_filter(position, reverse))
+
+    return list(queryset.values_list(*fields)[:paginator.page_size + 1])
@@ -0,0 +1,112 @@
+from django.db import transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+
+def adjust_counter(model, pk, field_name, delta, touch_field=None):
+    if not delta:
+        return 0
+
+    updates = {field_name: Greatest(F(field_name) + delta, 0)}
+    if touch_field:
+        updates[touch_field] = timezone.now()
+    return model.objects.filter(pk=pk).update(**updates)
+
+
+def adjust_counters(model, deltas_by_pk, field_name):
+    pks = []
+    whens = []
+    for pk, delta in deltas_by_pk.items():
+        if not delta:
+            continue
+        pks.append(pk)
+        whens.append(When(pk=pk, then=Value(delta)))
+    if not pks:
+        return 0
+
+    new_value = Greatest(F(field_name) + Case(*whens, default=Value(0)), 0)
+    return model.objects.filter(pk__in=pks).update(**{field_name: new_value})
+
+
+def count_subquery(model, field_name):
+    """Counts `model` rows whose `field_name` points at the outer row."""
+
+    counts = (
+        model.objects.filter(**{field_name: OuterRef("pk")})
+        .order_by()
+        .values(field_name)
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def reconcile_counters(model, actual_values, batch_size=1000):
+    """
+    Rewrites drifted counter columns of `model` from `actual_values`.
+
+    `actual_values` maps each counter field to an expression computing its
+    true value, usually a `count_subquery`. Rows are checked in primary key
+    batches and only the drifted ones are updated. Returns `(checked, fixed)`.
+    """
+
+    batch_size = max(batch_size, 1)
+    last_id = 0
+    checked = 0
+    fixed = 0
+
+    annotations = {}
+    drift = Q()
+    for field_name, expression in actual_values.items():
+        annotations[f"actual_{field_name}"] = expression
+        drift |= ~Q(**{field_name: F(f"actual_{field_name}")})
+
+    while True:
+        batch_ids = list(
+            model.objects.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:batch_size]
+        )
+        if not batch_ids:
+            return checked, fixed
+
+        with transaction.atomic():
+            drifted_ids = list(
+                model.objects.filter(pk__in=batch_ids)
+                .annotate(**annotations)
+                .filter(drift)
+                .values_list("pk", flat=True)
+            )
+            if drifted_ids:
+                fixed += model.objects.filter(pk__in=drifted_ids).update(**actual_values)
+
+        checked += len(batch_ids)
+        last_id = batch_ids[-1]
+
+
+class DenormalizedCounterMixin:
+    """
+    Keeps full-row saves from writing back stale counter values.
+
+    Counter columns are only ever changed with `F()` updates, so a plain
+    `save()` on an instance loaded earlier in the request must leave them alone.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            self.counter_fields
+            and not self._state.adding
+            and not kwargs.get("force_insert")
+            and kwargs.get("update_fields") is None
+        ):
+            deferred_fields = self.get_deferred_fields()
+            update_fields = []
+            for field in self._meta.concrete_fields:
+                if field.primary_key or field.name in self.counter_fields:
+                    continue
+                if field.attname in deferred_fields:
+                    continue
+                update_fields.append(field.name)
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
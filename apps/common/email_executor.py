@@ -0,0 +1,309 @@
+import atexit
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+from .email_messages import DELIVERY_SINGLE, build_email_messages
+
+try:
+    import fcntl
+except ImportError:  # Windows: spill files are only guarded within one process.
+    fcntl = None
+
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP_OLDEST = "drop-oldest"
+OVERFLOW_SPILL = "spill"
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_SPILL)
+
+_executor = None
+_executor_lock = threading.Lock()
+_stop = object()
+
+
+class EmailExecutor:
+    """
+    Fixed pool of sender threads fed from a bounded queue.
+
+    Each worker keeps one open mail connection and reuses it for every
+    message it sends. When the queue is full, `overflow_policy` decides
+    whether the caller waits (`block`), the oldest queued email is dropped
+    (`drop-oldest`) or the email is appended to a file and re-queued once
+    the backlog clears (`spill`).
+    """
+
+    def __init__(self, max_workers=4, max_queue_size=1000, overflow_policy=OVERFLOW_BLOCK,
+                 block_timeout=None, spill_path=None, connection_factory=None):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown email overflow policy: {overflow_policy}")
+
+        self.max_workers = max(max_workers, 1)
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.spill_path = spill_path or os.path.join(tempfile.gettempdir(), "blog-email-spill.jsonl")
+        self.connection_factory = connection_factory or get_connection
+        self.queue = queue.Queue(maxsize=max(max_queue_size, 1))
+        self.workers = []
+        self.lock = threading.Lock()
+        self.spill_lock = threading.Lock()
+        self.is_shut_down = False
+        self.is_closed = False
+        self.submitted = 0
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.max_queue_depth = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def _start_workers(self):
+        with self.lock:
+            if self.workers or self.is_shut_down:
+                return
+            for index in range(self.max_workers):
+                worker = threading.Thread(target=self._run_worker, name=f"email-sender-{index}", daemon=True)
+                worker.start()
+                self.workers.append(worker)
+
+    def _record(self, **deltas):
+        with self.lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+            self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+
+    def submit(self, subject, message, recipients, delivery=DELIVERY_SINGLE):
+        if self.is_shut_down:
+            return False
+
+        self._start_workers()
+        item = (subject, message, list(recipients), delivery, time.monotonic())
+        self._record(submitted=1)
+
+        if self.overflow_policy == OVERFLOW_BLOCK:
+            try:
+                self.queue.put(item, timeout=self.block_timeout)
+            except queue.Full:
+                self._record(dropped=1)
+                return False
+        elif self.overflow_policy == OVERFLOW_DROP_OLDEST:
+            while True:
+                try:
+                    self.queue.put_nowait(item)
+                    break
+                except queue.Full:
+                    try:
+                        self.queue.get_nowait()
+                    except queue.Empty:
+                        continue
+                    self.queue.task_done()
+                    self._record(dropped=1)
+        else:
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                self._spill(item)
+
+        self._record()
+        return True
+
+    @contextmanager
+    def _locked_spill_file(self):
+        # Every process with the same spill path shares the file, so appends
+        # and replays also take an exclusive lock on a sibling file that is
+        # never removed.
+        with self.spill_lock:
+            with open(f"{self.spill_path}.lock", "a", encoding="utf-8") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                yield
+
+    def _spill(self, item):
+        subject, message, recipients, delivery, _ = item
+        line = json.dumps({"subject": subject, "message": message, "recipients": recipients, "delivery": delivery})
+        with self._locked_spill_file():
+            with open(self.spill_path, "a", encoding="utf-8") as spill_file:
+                spill_file.write(line + "\n")
+        self._record(spilled=1)
+
+    def _reload_spilled(self):
+        # Only one worker of any process replays the file at a time, and never
+        # after shutdown has started persisting what is left in the queue.
+        if not os.path.exists(self.spill_path):
+            return
+        with self._locked_spill_file():
+            if self.is_closed or not os.path.exists(self.spill_path):
+                return
+            with open(self.spill_path, encoding="utf-8") as spill_file:
+                lines = spill_file.readlines()
+            os.remove(self.spill_path)
+
+            for index, line in enumerate(lines):
+                data = json.loads(line)
+                try:
+                    self.queue.put_nowait(
+                        (data["subject"], data["message"], data["recipients"], data["delivery"], time.monotonic())
+                    )
+                except queue.Full:
+                    # Never block here: this thread is also a consumer.
+                    with open(self.spill_path, "a", encoding="utf-8") as spill_file:
+                        spill_file.writelines(lines[index:])
+                    return
+
+    def _send(self, connection, item):
+        subject, message, recipients, delivery, enqueued_at = item
+        messages = build_email_messages(
+            subject, message, settings.DEFAULT_FROM_EMAIL, recipients, delivery, connection=connection
+        )
+        connection.send_messages(messages)
+        latency = time.monotonic() - enqueued_at
+        with self.lock:
+            self.sent += len(messages)
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def _run_worker(self):
+        connection = None
+        try:
+            while not self.is_closed:
+                # Emails left on disk by an earlier shutdown are replayed
+                # whatever the policy.
+                if self.queue.empty():
+                    self._reload_spilled()
+
+                try:
+                    item = self.queue.get(timeout=1)
+                except queue.Empty:
+                    if self.is_shut_down and not os.path.exists(self.spill_path):
+                        break
+                    continue
+                if item is _stop:
+                    self.queue.task_done()
+                    if os.path.exists(self.spill_path):
+                        continue
+                    break
+
+                try:
+                    if connection is None:
+                        connection = self.connection_factory(fail_silently=False)
+                        connection.open()
+                    self._send(connection, item)
+                except Exception:
+                    self._record(failed=1)
+                    # Drop a connection that errored; the next email opens a new one.
+                    if connection is not None:
+                        try:
+                            connection.close()
+                        except Exception:
+                            pass
+                    connection = None
+                finally:
+                    self.queue.task_done()
+        finally:
+            if connection is not None:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+
+    def shutdown(self, timeout=None):
+        """
+        Stops accepting emails and waits for the queued and spilled ones to
+        be sent.
+
+        Emails still queued when `timeout` runs out are appended to the spill
+        file, which the next executor replays.
+        """
+
+        with self.lock:
+            if self.is_shut_down:
+                return
+            self.is_shut_down = True
+            workers = list(self.workers)
+
+        for _ in workers:
+            try:
+                self.queue.put_nowait(_stop)
+            except queue.Full:
+                # Workers also stop on their own once the queue runs dry.
+                break
+        deadline = None
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+        for worker in workers:
+            remaining = None
+            if deadline is not None:
+                remaining = max(deadline - time.monotonic(), 0)
+            worker.join(remaining)
+
+        with self.spill_lock:
+            self.is_closed = True
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            self.queue.task_done()
+            if item is not _stop:
+                self._spill(item)
+
+    def get_metrics(self):
+        with self.lock:
+            average_latency = 0.0
+            if self.sent:
+                average_latency = round(self.total_latency / self.sent, 4)
+            return {
+                "workers": len(self.workers),
+                "overflow_policy": self.overflow_policy,
+                "queue_depth": self.queue.qsize(),
+                "queue_capacity": self.queue.maxsize,
+                "max_queue_depth": self.max_queue_depth,
+                "submitted": self.submitted,
+                "sent": self.sent,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "spilled": self.spilled,
+                "average_latency_seconds": average_latency,
+                "max_latency_seconds": round(self.max_latency, 4),
+            }
+
+
+def get_email_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = EmailExecutor(
+                max_workers=getattr(settings, "EMAIL_EXECUTOR_WORKERS", 4),
+                max_queue_size=getattr(settings, "EMAIL_EXECUTOR_QUEUE_SIZE", 1000),
+                overflow_policy=getattr(settings, "EMAIL_EXECUTOR_OVERFLOW_POLICY", OVERFLOW_BLOCK),
+                block_timeout=getattr(settings, "EMAIL_EXECUTOR_BLOCK_TIMEOUT", 5),
+                spill_path=getattr(settings, "EMAIL_EXECUTOR_SPILL_PATH", None),
+            )
+        return _executor
+
+
+def get_email_executor_metrics():
+    with _executor_lock:
+        if _executor is None:
+            return None
+        return _executor.get_metrics()
+
+
+def shutdown_email_executor(timeout=None):
+    global _executor
+    with _executor_lock:
+        executor = _executor
+        _executor = None
+    if executor is not None:
+        if timeout is None:
+            timeout = getattr(settings, "EMAIL_EXECUTOR_SHUTDOWN_TIMEOUT", 30)
+        executor.shutdown(timeout)
+
+
+atexit.register(shutdown_email_executor)
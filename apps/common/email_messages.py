@@ -0,0 +1,28 @@
+from django.core.mail import EmailMessage
+
+
+DELIVERY_SINGLE = "single"
+DELIVERY_BCC = "bcc"
+DELIVERY_PERSONALIZED = "personalized"
+DELIVERY_CHOICES = [
+    (DELIVERY_SINGLE, "One message to all recipients"),
+    (DELIVERY_BCC, "One message, recipients in Bcc"),
+    (DELIVERY_PERSONALIZED, "One message per recipient"),
+]
+
+
+def build_email_messages(subject, message, from_email, recipients, delivery=DELIVERY_SINGLE, connection=None):
+    if delivery == DELIVERY_PERSONALIZED:
+        messages = []
+        for recipient in recipients:
+            messages.append(
+                EmailMessage(subject=subject, body=message, from_email=from_email, to=[recipient], connection=connection)
+            )
+        return messages
+
+    if delivery == DELIVERY_BCC:
+        return [
+            EmailMessage(subject=subject, body=message, from_email=from_email, bcc=list(recipients), connection=connection)
+        ]
+
+    return [EmailMessage(subject=subject, body=message, from_email=from_email, to=list(recipients), connection=connection)]
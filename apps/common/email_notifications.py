@@ -1,7 +1,8 @@
 from django.conf import settings
 from django.core.mail import send_mail
 from django.db import transaction
-from threading import Thread
+
+from .email_executor import get_email_executor
 
 
 def _send_activity_email(subject, message, recipients):
@@ -23,16 +24,18 @@ def send_activity_email(subject, message, recipient_list):
     if not recipients:
         return 0
 
+    if getattr(settings, "EMAIL_USE_OUTBOX", False):
+        from apps.notifications.outbox import enqueue_email
+
+        enqueue_email(subject, message, recipients)
+        return len(recipients)
+
     use_async = getattr(settings, "EMAIL_SEND_ASYNC", False)
     if not use_async:
         return _send_activity_email(subject, message, recipients)
 
     def enqueue_email_send():
-        Thread(
-            target=_send_activity_email,
-            args=(subject, message, recipients),
-            daemon=True,
-        ).start()
+        get_email_executor().submit(subject, message, recipients)
 
     transaction.on_commit(enqueue_email_send)
     return len(recipients)
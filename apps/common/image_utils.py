@@ -1,16 +1,21 @@
 import os
 
 from django.conf import settings
-from django.core.files.storage import default_storage
-from django.utils.crypto import get_random_string
 from rest_framework import serializers
 
+from apps.media.blobs import store_image_blob
+from apps.media.probe import IMAGE_FORMATS, ImageProbeError, probe_image_file
+
 
 ALLOWED_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
 MAX_IMAGE_SIZE_BYTES = 5 * 1024 * 1024
 
 
-def upload_image_file(request, image_file):
+def get_max_image_pixels():
+    return getattr(settings, "MAX_IMAGE_PIXELS", 40_000_000)
+
+
+def upload_image_file(request, image_file, max_size=MAX_IMAGE_SIZE_BYTES):
     if image_file is None:
         raise serializers.ValidationError({"file": ["No file provided."]})
 
@@ -18,18 +23,24 @@ def upload_image_file(request, image_file):
     if not content_type.startswith("image/"):
         raise serializers.ValidationError({"file": ["Only image files allowed."]})
 
-    if image_file.size > MAX_IMAGE_SIZE_BYTES:
-        raise serializers.ValidationError({"file": ["Image must be under 5MB."]})
+    if image_file.size > max_size:
+        raise serializers.ValidationError({"file": [f"Image must be under {max_size // (1024 * 1024)}MB."]})
+
+    try:
+        image_info = probe_image_file(image_file, max_pixels=get_max_image_pixels())
+    except ImageProbeError as exc:
+        raise serializers.ValidationError({"file": [str(exc)]})
+
+    format_info = IMAGE_FORMATS[image_info["format"]]
+    if content_type not in format_info["content_types"]:
+        raise serializers.ValidationError({"file": ["File content does not match its content type."]})
 
     _, extension = os.path.splitext(image_file.name or "")
     extension = extension.lower()
-    if extension not in ALLOWED_IMAGE_EXTENSIONS:
-        extension = ".jpg"
+    if extension in ALLOWED_IMAGE_EXTENSIONS and extension not in format_info["extensions"]:
+        raise serializers.ValidationError({"file": ["File content does not match its extension."]})
 
-    file_name = f"{get_random_string(18)}{extension}"
-    storage_path = f"uploads/{file_name}"
-    saved_path = default_storage.save(storage_path, image_file)
-    saved_path = str(saved_path).replace("\\", "/")
+    saved_path = store_image_blob(image_file, image_info)
 
     host = request.get_host()
     return f"{request.scheme}://{host}{settings.MEDIA_URL}{saved_path}"
@@ -0,0 +1,258 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+DEFAULT_PAGE_SIZE = 20
+DEFAULT_MAX_PAGE_SIZE = 100
+
+_paginated_serializer_cache = {}
+
+PAGINATION_PARAMETERS = [
+    OpenApiParameter("cursor", str, OpenApiParameter.QUERY, description="Opaque cursor from `next`/`previous`"),
+    OpenApiParameter("page_size", int, OpenApiParameter.QUERY, description="Number of results per page"),
+]
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _resolve_field(model, field_path):
+    field = None
+    for part in field_path.split("__"):
+        field = model._meta.get_field(part)
+        if field.is_relation and field.related_model is not None:
+            model = field.related_model
+    if field.is_relation:
+        return field.target_field
+    return field
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on the ordering columns instead of using OFFSET.
+
+    `ordering` lists the sort fields, the last of which must be unique (normally
+    the primary key) so that every row has a distinct position. Cursors are
+    opaque, base64-encoded positions of the first/last row on a page.
+    """
+
+    ordering = ("-created_at", "-id")
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor."
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        self.page_size = api_settings.PAGE_SIZE or DEFAULT_PAGE_SIZE
+        self.request = None
+        self.base_url = None
+        self.has_next = False
+        self.has_previous = False
+        self.next_position = None
+        self.previous_position = None
+
+    def get_page_size(self, request):
+        default_page_size = api_settings.PAGE_SIZE or DEFAULT_PAGE_SIZE
+        max_page_size = getattr(settings, "API_MAX_PAGE_SIZE", DEFAULT_MAX_PAGE_SIZE)
+        raw_page_size = request.query_params.get(self.page_size_query_param, "").strip()
+        if raw_page_size == "":
+            return default_page_size
+
+        try:
+            page_size = int(raw_page_size)
+        except ValueError:
+            return default_page_size
+
+        if page_size <= 0:
+            return default_page_size
+        return min(page_size, max_page_size)
+
+    def get_field_names(self):
+        field_names = []
+        for field in self.ordering:
+            field_names.append(field.lstrip("-"))
+        return field_names
+
+    def get_order_by(self, reverse=False):
+        if not reverse:
+            return list(self.ordering)
+
+        order_by = []
+        for field in self.ordering:
+            if field.startswith("-"):
+                order_by.append(field[1:])
+            else:
+                order_by.append("-" + field)
+        return order_by
+
+    def encode_cursor(self, position, reverse=False):
+        payload = {"p": [_encode_value(value) for value in position]}
+        if reverse:
+            payload["r"] = 1
+        raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param, "").strip()
+        if encoded == "":
+            return None, False
+
+        try:
+            padding = "=" * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(encoded + padding).decode("utf-8"))
+            position = payload["p"]
+            reverse = bool(payload.get("r", 0))
+        except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError, AttributeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def convert_position(self, model, position):
+        converted = []
+        for field_name, value in zip(self.get_field_names(), position):
+            try:
+                field = _resolve_field(model, field_name)
+                converted.append(field.to_python(value))
+            except (FieldDoesNotExist, DjangoValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        return converted
+
+    def get_seek_filter(self, position, reverse=False, field_names=None):
+        if field_names is None:
+            field_names = self.get_field_names()
+
+        seek_filter = Q()
+        equal_filter = Q()
+        for index, field in enumerate(self.ordering):
+            descending = field.startswith("-")
+            if reverse:
+                descending = not descending
+            lookup = "lt" if descending else "gt"
+            field_name = field_names[index]
+            value = position[index]
+
+            seek_filter |= equal_filter & Q(**{f"{field_name}__{lookup}": value})
+            equal_filter &= Q(**{field_name: value})
+
+        # Bounding the leading column as well lets the database turn the OR
+        # chain into a plain index range scan.
+        leading_field = field_names[0]
+        leading_descending = self.ordering[0].startswith("-") != reverse
+        leading_lookup = "lte" if leading_descending else "gte"
+        return Q(**{f"{leading_field}__{leading_lookup}": position[0]}) & seek_filter
+
+    def get_position(self, item):
+        position = []
+        for field_name in self.get_field_names():
+            value = item
+            for part in field_name.split("__"):
+                value = getattr(value, part)
+            if hasattr(value, "pk"):
+                value = value.pk
+            position.append(value)
+        return position
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.prepare(request)
+        position, reverse = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.get_order_by(reverse))
+        if position is not None:
+            position = self.convert_position(queryset.model, position)
+            queryset = queryset.filter(self.get_seek_filter(position, reverse))
+
+        items = list(queryset[:self.page_size + 1])
+        return self.paginate_items(items, position, reverse)
+
+    def prepare(self, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+    def paginate_items(self, items, position, reverse):
+        has_more = len(items) > self.page_size
+        items = list(items[:self.page_size])
+        if reverse:
+            items.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.next_position = None
+        self.previous_position = None
+        if items:
+            self.next_position = self.get_position(items[-1])
+            self.previous_position = self.get_position(items[0])
+        return items
+
+    def get_next_link(self):
+        if not self.has_next or self.next_position is None:
+            return None
+        cursor = self.encode_cursor(self.next_position)
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.previous_position is None:
+            return None
+        cursor = self.encode_cursor(self.previous_position, reverse=True)
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+def get_paginated_serializer(serializer_class):
+    name = serializer_class.__name__
+    if name.endswith("Serializer"):
+        name = name[: -len("Serializer")]
+    name = f"Paginated{name}ListSerializer"
+
+    if name not in _paginated_serializer_cache:
+        _paginated_serializer_cache[name] = type(
+            name,
+            (serializers.Serializer,),
+            {
+                "next": serializers.URLField(allow_null=True),
+                "previous": serializers.URLField(allow_null=True),
+                "results": serializer_class(many=True),
+            },
+        )
+    return _paginated_serializer_cache[name]
@@ -0,0 +1,124 @@
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+
+RESPONSE_CACHE_NAMESPACES = ("post-detail", "user-posts", "user-detail", "post-comments")
+VERSION_KEY_PREFIX = "rc:v"
+ENTRY_KEY_PREFIX = "rc:e"
+STATS_KEY_PREFIX = "rc:s"
+
+
+def get_response_cache():
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def get_response_cache_timeout():
+    return getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+
+
+def get_version_key(scope, object_id):
+    return f"{VERSION_KEY_PREFIX}:{scope}:{object_id}"
+
+
+def get_entry_key(namespace, request):
+    url = request.build_absolute_uri()
+    digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return f"{ENTRY_KEY_PREFIX}:{namespace}:{digest}"
+
+
+def get_versions(dependencies):
+    cache = get_response_cache()
+    keys = []
+    for scope, object_id in dependencies:
+        keys.append(get_version_key(scope, object_id))
+
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # A missing version must never match a stored entry, so start each
+            # key from a fresh value instead of a fixed one like 0.
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return versions
+
+
+def invalidate(scope, object_id):
+    if object_id is None:
+        return
+
+    try:
+        get_response_cache().incr(get_version_key(scope, object_id))
+    except ValueError:
+        pass
+
+
+def invalidate_on_commit(scope, object_id):
+    """
+    Bumps the version once the surrounding transaction commits.
+
+    Bumping earlier would let a request that misses the cache before the
+    commit store the old rows under the new version.
+    """
+
+    transaction.on_commit(partial(invalidate, scope, object_id))
+
+
+def record_cache_event(namespace, event):
+    cache = get_response_cache()
+    key = f"{STATS_KEY_PREFIX}:{namespace}:{event}"
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def get_response_cache_stats():
+    cache = get_response_cache()
+    stats = {}
+    for namespace in RESPONSE_CACHE_NAMESPACES:
+        hits = cache.get(f"{STATS_KEY_PREFIX}:{namespace}:hits", 0)
+        misses = cache.get(f"{STATS_KEY_PREFIX}:{namespace}:misses", 0)
+        total = hits + misses
+        hit_ratio = 0.0
+        if total:
+            hit_ratio = round(hits / total, 4)
+        stats[namespace] = {"hits": hits, "misses": misses, "hit_ratio": hit_ratio}
+    return stats
+
+
+def get_cached_response(request, namespace, build_response, dependencies, get_data_dependencies=None):
+    timeout = get_response_cache_timeout()
+    if not timeout:
+        return build_response()
+
+    cache = get_response_cache()
+    entry_key = get_entry_key(namespace, request)
+    entry = cache.get(entry_key)
+    if entry is not None:
+        current_versions = cache.get_many(list(entry["versions"].keys()))
+        if current_versions == entry["versions"]:
+            record_cache_event(namespace, "hits")
+            response = Response(entry["data"], status=entry["status"])
+            response["X-Cache"] = "HIT"
+            return response
+
+    record_cache_event(namespace, "misses")
+    versions = get_versions(dependencies)
+    response = build_response()
+    if response.status_code == 200:
+        if get_data_dependencies is not None:
+            versions.update(get_versions(get_data_dependencies(response.data)))
+        cache.set(
+            entry_key,
+            {"status": response.status_code, "data": response.data, "versions": versions},
+            timeout,
+        )
+    response["X-Cache"] = "MISS"
+    return response
@@ -0,0 +1,59 @@
+import copy
+
+
+class FieldTrackerMixin:
+    """
+    Remembers the loaded values of `tracked_fields` so saves can tell what changed.
+
+    The snapshot is taken in `from_db` and refreshed after each save, so
+    `has_field_changed` compares in memory instead of re-reading the row.
+    Fields that were deferred when the instance was loaded count as changed
+    once they are assigned, since their old value is unknown.
+    """
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def _snapshot_tracked_fields(self, field_names=None):
+        tracked_values = self.__dict__.setdefault("_tracked_values", {})
+        for field_name in self.tracked_fields:
+            if field_names is not None and field_name not in field_names:
+                continue
+            attname = self._meta.get_field(field_name).attname
+            if attname in self.__dict__:
+                tracked_values[field_name] = copy.deepcopy(self.__dict__[attname])
+
+    def get_tracked_value(self, field_name, default=None):
+        return self.__dict__.get("_tracked_values", {}).get(field_name, default)
+
+    def has_field_changed(self, field_name, update_fields=None):
+        if update_fields is not None and field_name not in update_fields:
+            return False
+
+        tracked_values = self.__dict__.get("_tracked_values", {})
+        if field_name not in tracked_values:
+            return True
+        attname = self._meta.get_field(field_name).attname
+        return tracked_values[field_name] != getattr(self, attname)
+
+    def get_changed_fields(self, update_fields=None):
+        changed_fields = []
+        for field_name in self.tracked_fields:
+            if self.has_field_changed(field_name, update_fields):
+                changed_fields.append(field_name)
+        return changed_fields
+
+    def save(self, *args, **kwargs):
+        # post_save receivers run inside super().save() and still see the
+        # values from before this save.
+        super().save(*args, **kwargs)
+        self._snapshot_tracked_fields(kwargs.get("update_fields"))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._snapshot_tracked_fields(fields)
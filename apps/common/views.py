@@ -0,0 +1,34 @@
+from drf_spectacular.utils import OpenApiResponse, extend_schema, extend_schema_view
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .email_executor import get_email_executor_metrics
+from .response_cache import get_response_cache_stats
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="Get runtime metrics",
+        description=(
+            "Returns response cache hit/miss counters per endpoint and, once the in-process email "
+            "executor has started, its queue depth, throughput and latency. Staff only."
+        ),
+        tags=["Metrics"],
+        responses={
+            200: OpenApiResponse(description="Metrics by component"),
+            401: OpenApiResponse(description="Authentication required"),
+            403: OpenApiResponse(description="Staff access required"),
+        },
+    )
+)
+class MetricsAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        metrics = {
+            "response_cache": get_response_cache_stats(),
+            "email_executor": get_email_executor_metrics(),
+        }
+        return Response(metrics, status=status.HTTP_200_OK)
@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from .models import ImageBlob, UploadSession
+
+
+@admin.register(ImageBlob)
+class ImageBlobAdmin(admin.ModelAdmin):
+	list_display = ("id", "path", "size", "width", "height", "animated", "ref_count", "renditions_generated_at", "last_uploaded_at", "created_at")
+	search_fields = ("digest", "path")
+	readonly_fields = ("digest", "path", "size", "ref_count", "renditions", "renditions_generated_at")
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+	list_display = ("id", "owner", "filename", "size", "received_bytes", "status", "expires_at")
+	list_filter = ("status",)
+	search_fields = ("filename", "owner__username")
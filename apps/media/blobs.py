@@ -0,0 +1,262 @@
+import hashlib
+import mimetypes
+import tempfile
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from apps.common.counters import adjust_counters
+from .models import ImageBlob
+from .probe import ImageProbeError, probe_image_file
+
+
+BLOB_DIRECTORY = "uploads"
+
+
+def get_blob_grace_hours():
+    return getattr(settings, "IMAGE_BLOB_GRACE_HOURS", 24)
+
+
+def get_blob_path(digest, extension):
+    return f"{BLOB_DIRECTORY}/{digest[:2]}/{digest}{extension}"
+
+
+def get_media_url_path():
+    return urlsplit(settings.MEDIA_URL).path
+
+
+def get_media_path(url):
+    """Returns the storage path behind one of our media URLs, or None for other URLs."""
+
+    if not url:
+        return None
+    media_url_path = get_media_url_path()
+    path = urlsplit(url).path
+    if not path.startswith(media_url_path):
+        return None
+    return path[len(media_url_path):] or None
+
+
+def store_image_blob(image_file, image_info):
+    """
+    Stores an uploaded image under the SHA-256 of its bytes and returns its path.
+
+    The upload is hashed while it is copied to a temporary file, so the bytes
+    are read once. If a blob with the same digest is already stored, nothing is
+    written and the existing path is returned.
+    """
+
+    extension = image_info["extension"]
+    with tempfile.NamedTemporaryFile(suffix=extension) as temp_file:
+        hasher = hashlib.sha256()
+        size = 0
+        for chunk in image_file.chunks():
+            hasher.update(chunk)
+            temp_file.write(chunk)
+            size += len(chunk)
+        digest = hasher.hexdigest()
+
+        now = timezone.now()
+        blob = ImageBlob.objects.filter(digest=digest).first()
+        if blob is not None and default_storage.exists(blob.path):
+            # Touching the blob restarts its grace period so it cannot be
+            # reclaimed before the caller stores a reference to it.
+            if ImageBlob.objects.filter(pk=blob.pk).update(last_uploaded_at=now):
+                return blob.path
+
+        path = blob.path if blob is not None else get_blob_path(digest, extension)
+        if not default_storage.exists(path):
+            temp_file.flush()
+            temp_file.seek(0)
+            saved_path = str(default_storage.save(path, File(temp_file, name=path))).replace("\\", "/")
+            if saved_path != path:
+                # Another upload of the same bytes won the race; its copy is identical.
+                default_storage.delete(saved_path)
+
+    blob, created = ImageBlob.objects.get_or_create(
+        digest=digest,
+        defaults={
+            "path": path,
+            "size": size,
+            "content_type": image_info["content_type"],
+            "width": image_info["width"],
+            "height": image_info["height"],
+            "animated": image_info["animated"],
+            "last_uploaded_at": now,
+        },
+    )
+    if not created:
+        ImageBlob.objects.filter(pk=blob.pk).update(last_uploaded_at=now)
+    return blob.path
+
+
+def get_image_dimensions(urls):
+    """Maps each of our media URLs in `urls` to the `(width, height)` recorded for its blob."""
+
+    urls_by_path = {}
+    for url in urls:
+        path = get_media_path(url)
+        if path:
+            urls_by_path.setdefault(path, []).append(url)
+    if not urls_by_path:
+        return {}
+
+    dimensions = {}
+    rows = ImageBlob.objects.filter(path__in=list(urls_by_path)).values_list("path", "width", "height")
+    for path, width, height in rows:
+        for url in urls_by_path[path]:
+            dimensions[url] = (width, height)
+    return dimensions
+
+
+def adjust_image_references(added=(), removed=()):
+    """Moves blob reference counts for image URLs that were set or cleared."""
+
+    deltas_by_path = {}
+    for urls, delta in ((added, 1), (removed, -1)):
+        for url in urls:
+            path = get_media_path(url)
+            if path:
+                deltas_by_path[path] = deltas_by_path.get(path, 0) + delta
+
+    deltas_by_path = {path: delta for path, delta in deltas_by_path.items() if delta}
+    if not deltas_by_path:
+        return 0
+
+    deltas_by_pk = {}
+    for pk, path in ImageBlob.objects.filter(path__in=list(deltas_by_path)).values_list("pk", "path"):
+        deltas_by_pk[pk] = deltas_by_path[path]
+    return adjust_counters(ImageBlob, deltas_by_pk, "ref_count")
+
+
+def get_image_referrers(path):
+    from apps.posts.models import Post
+
+    posts = Post.objects.filter(image_path=path)
+    users = get_user_model().objects.filter(profile_pic_path=path)
+    return posts, users
+
+
+def get_referenced_image_paths(paths):
+    """Returns the subset of `paths` that a post image or profile picture points at."""
+
+    from apps.posts.models import Post
+
+    paths = list(paths)
+    referenced = set(Post.objects.filter(image_path__in=paths).values_list("image_path", flat=True))
+    referenced.update(
+        get_user_model().objects.filter(profile_pic_path__in=paths).values_list("profile_pic_path", flat=True)
+    )
+    return referenced
+
+
+def iter_unregistered_image_paths(batch_size=500):
+    """Yields media paths used by posts and profiles that have no blob, i.e. uploads made before blobs existed."""
+
+    from apps.posts.models import Post
+
+    path_querysets = (
+        Post.objects.exclude(image_path="").values_list("image_path", flat=True).distinct(),
+        get_user_model().objects.exclude(profile_pic_path="").values_list("profile_pic_path", flat=True).distinct(),
+    )
+    seen = set()
+    batch = []
+    for paths in path_querysets:
+        for path in paths.iterator():
+            if path not in seen:
+                seen.add(path)
+                batch.append(path)
+            if len(batch) >= batch_size:
+                yield from filter_unregistered_paths(batch)
+                batch = []
+    yield from filter_unregistered_paths(batch)
+
+
+def filter_unregistered_paths(paths):
+    if not paths:
+        return []
+    registered = set(ImageBlob.objects.filter(path__in=paths).values_list("path", flat=True))
+    return [path for path in paths if path not in registered]
+
+
+def register_existing_image(path):
+    """
+    Creates the blob for a stored upload that predates content addressing.
+
+    The file keeps its name. Its reference count is taken from the image
+    columns, and files whose bytes are already stored under another blob are
+    left alone.
+    """
+
+    if not default_storage.exists(path):
+        return None
+
+    hasher = hashlib.sha256()
+    size = 0
+    with default_storage.open(path, "rb") as image_file:
+        for chunk in image_file.chunks():
+            hasher.update(chunk)
+            size += len(chunk)
+    digest = hasher.hexdigest()
+
+    try:
+        with default_storage.open(path, "rb") as image_file:
+            image_info = probe_image_file(image_file)
+    except ImageProbeError:
+        image_info = {"content_type": mimetypes.guess_type(path)[0] or "", "width": None, "height": None, "animated": False}
+
+    posts, users = get_image_referrers(path)
+    blob = ImageBlob(
+        digest=digest,
+        path=path,
+        size=size,
+        content_type=image_info["content_type"],
+        width=image_info["width"],
+        height=image_info["height"],
+        animated=image_info["animated"],
+        ref_count=posts.count() + users.count(),
+    )
+    # bulk_create skips post_save, so the caller decides how renditions are made.
+    ImageBlob.objects.bulk_create([blob], ignore_conflicts=True)
+    return ImageBlob.objects.filter(digest=digest, path=path).first()
+
+
+def reclaim_image_blobs(grace_hours=None, batch_size=100, now=None):
+    """
+    Deletes blobs nothing has referenced for longer than the grace period.
+
+    The counters decide which blobs are candidates; each batch of candidates
+    is checked against the indexed image path columns once more before rows
+    and files are removed, so a drifted counter can never cost a live image.
+    """
+
+    if grace_hours is None:
+        grace_hours = get_blob_grace_hours()
+    if now is None:
+        now = timezone.now()
+    cutoff = now - timedelta(hours=grace_hours)
+
+    candidates = ImageBlob.objects.filter(ref_count=0, last_uploaded_at__lt=cutoff)
+    reclaimed = 0
+    last_id = 0
+    while True:
+        batch = list(candidates.filter(id__gt=last_id).order_by("id")[:batch_size])
+        if not batch:
+            return reclaimed
+        last_id = batch[-1].id
+
+        referenced = get_referenced_image_paths(blob.path for blob in batch)
+        for blob in batch:
+            if blob.path in referenced:
+                continue
+            with transaction.atomic():
+                deleted, _ = candidates.filter(pk=blob.pk).delete()
+            if deleted:
+                default_storage.delete(blob.path)
+                reclaimed += 1
@@ -0,0 +1,43 @@
+from io import BytesIO
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it no renditions are made.
+    Image = None
+    ImageOps = None
+
+
+# This module runs inside rendition worker processes, so it must not import
+# Django models or settings.
+
+
+def is_imaging_available():
+    return Image is not None
+
+
+def render_image_renditions(source_path, widths, image_format="webp", quality=80):
+    """
+    Resizes and re-encodes the image at `source_path` to each width narrower
+    than the original.
+
+    Returns `{"width", "height", "renditions": [{"width", "height", "content"}]}`
+    where `content` is the encoded bytes. Animated images use their first frame.
+    """
+
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            has_alpha = image.mode in ("LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+
+        renditions = []
+        for width in sorted(set(widths)):
+            if width >= image.width:
+                continue
+            height = max(round(image.height * width / image.width), 1)
+            resized = image.resize((width, height), Image.Resampling.LANCZOS)
+            output = BytesIO()
+            resized.save(output, format=image_format.upper(), quality=quality)
+            renditions.append({"width": width, "height": height, "content": output.getvalue()})
+
+        return {"width": image.width, "height": image.height, "renditions": renditions}
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.media.blobs import iter_unregistered_image_paths, register_existing_image
+from apps.media.imaging import is_imaging_available, render_image_renditions
+from apps.media.models import ImageBlob
+from apps.media.renditions import get_render_arguments, get_rendition_executor, store_blob_renditions
+
+
+class Command(BaseCommand):
+    help = (
+        "Registers uploads made before content-addressed storage and renders the configured "
+        "renditions for every image that has none yet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Render every image again, e.g. after IMAGE_RENDITION_WIDTHS changed.",
+        )
+
+    def handle(self, *args, **options):
+        if not is_imaging_available():
+            raise CommandError("Pillow is required to generate image renditions.")
+
+        registered = 0
+        for path in iter_unregistered_image_paths():
+            if register_existing_image(path) is not None:
+                registered += 1
+
+        blobs = ImageBlob.objects.filter(animated=False)
+        if not options["force"]:
+            blobs = blobs.filter(renditions_generated_at__isnull=True)
+
+        executor = get_rendition_executor()
+        generated = 0
+        failed = 0
+        last_id = 0
+        while True:
+            batch = list(blobs.filter(id__gt=last_id).order_by("id")[: options["batch_size"]])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            futures = []
+            for blob in batch:
+                try:
+                    futures.append((blob, executor.submit(render_image_renditions, *get_render_arguments(blob))))
+                except OSError as exc:
+                    failed += 1
+                    self.stderr.write(f"{blob.path}: {exc}")
+            for blob, future in futures:
+                try:
+                    store_blob_renditions(blob, future.result())
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"{blob.path}: {exc}")
+                else:
+                    generated += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Registered {registered} existing uploads. "
+                f"Generated renditions for {generated} images, {failed} failed."
+            )
+        )
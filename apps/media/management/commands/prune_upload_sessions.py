@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.media.sessions import prune_upload_sessions
+
+
+class Command(BaseCommand):
+    help = "Deletes expired resumable upload sessions and their partial files. Run it on a schedule."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        deleted = prune_upload_sessions(batch_size=max(options["batch_size"], 1))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired upload sessions."))
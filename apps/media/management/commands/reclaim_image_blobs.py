@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.media.blobs import get_blob_grace_hours, reclaim_image_blobs
+
+
+class Command(BaseCommand):
+    help = "Deletes uploaded images that no post or profile has referenced for longer than the grace period."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grace-hours", type=float, default=None)
+        parser.add_argument("--batch-size", type=int, default=100)
+
+    def handle(self, *args, **options):
+        grace_hours = options["grace_hours"]
+        if grace_hours is None:
+            grace_hours = get_blob_grace_hours()
+        reclaimed = reclaim_image_blobs(grace_hours=grace_hours, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Reclaimed {reclaimed} image blobs."))
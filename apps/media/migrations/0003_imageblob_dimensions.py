@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-17 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0002_imageblob_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imageblob',
+            name='animated',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='imageblob',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='imageblob',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
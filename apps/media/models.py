@@ -0,0 +1,63 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+from apps.common.counters import DenormalizedCounterMixin
+
+
+class ImageBlob(DenormalizedCounterMixin, models.Model):
+    digest = models.CharField(max_length=64, unique=True)
+    path = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    content_type = models.CharField(max_length=100, blank=True)
+    width = models.PositiveIntegerField(blank=True, null=True)
+    height = models.PositiveIntegerField(blank=True, null=True)
+    animated = models.BooleanField(default=False)
+    # Number of `Post.image` / `User.profile_pic` values pointing at the blob.
+    ref_count = models.PositiveIntegerField(default=0)
+    last_uploaded_at = models.DateTimeField(default=timezone.now)
+    # Width (as a string) -> {"path", "width", "height", "size", "content_type"}.
+    renditions = models.JSONField(default=dict, blank=True)
+    renditions_generated_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    counter_fields = ("ref_count",)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["ref_count", "last_uploaded_at"]),
+        ]
+
+    def __str__(self):
+        return self.path
+
+
+class UploadSession(models.Model):
+    STATUS_OPEN = "open"
+    STATUS_COMPLETED = "completed"
+    STATUS_CHOICES = [
+        (STATUS_OPEN, "Open"),
+        (STATUS_COMPLETED, "Completed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="upload_sessions")
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    size = models.PositiveBigIntegerField()
+    received_bytes = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_OPEN)
+    url = models.URLField(blank=True)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["expires_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.received_bytes}/{self.size})"
@@ -0,0 +1,210 @@
+import struct
+
+
+PROBE_HEADER_BYTES = 32
+# A JPEG can carry large EXIF/ICC segments before its frame header; they are
+# skipped with seeks, so this only bounds how many segment headers are read.
+MAX_PROBE_SEGMENTS = 256
+EXIF_HEAD_BYTES = 4096
+
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+GIF_ANIMATION_EXTENSIONS = (b"NETSCAPE2.0", b"ANIMEXTS1.0")
+
+IMAGE_FORMATS = {
+    "jpeg": {"content_types": ("image/jpeg", "image/jpg", "image/pjpeg"), "extensions": (".jpg", ".jpeg")},
+    "png": {"content_types": ("image/png", "image/apng"), "extensions": (".png",)},
+    "webp": {"content_types": ("image/webp",), "extensions": (".webp",)},
+    "gif": {"content_types": ("image/gif",), "extensions": (".gif",)},
+}
+
+
+class ImageProbeError(ValueError):
+    pass
+
+
+def read_exact(image_file, size):
+    data = image_file.read(size)
+    if len(data) != size:
+        raise ImageProbeError("Image file is truncated.")
+    return data
+
+
+def sniff_image_format(header):
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    return None
+
+
+def get_exif_orientation(data):
+    if not data.startswith(b"Exif\x00\x00") or len(data) < 14:
+        return 1
+    tiff = data[6:]
+    byte_order = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+    if byte_order is None:
+        return 1
+    (ifd_offset,) = struct.unpack(byte_order + "I", tiff[4:8])
+    if ifd_offset + 2 > len(tiff):
+        return 1
+    (entry_count,) = struct.unpack(byte_order + "H", tiff[ifd_offset:ifd_offset + 2])
+    for index in range(entry_count):
+        entry_offset = ifd_offset + 2 + index * 12
+        if entry_offset + 12 > len(tiff):
+            break
+        tag, _, _, value = struct.unpack(byte_order + "HHIH", tiff[entry_offset:entry_offset + 10])
+        if tag == 0x0112:
+            return value
+    return 1
+
+
+def probe_jpeg(image_file):
+    image_file.seek(2)
+    orientation = 1
+    for _ in range(MAX_PROBE_SEGMENTS):
+        marker = read_exact(image_file, 2)
+        while marker[1] == 0xFF:
+            # Fill bytes before a marker.
+            marker = marker[1:] + read_exact(image_file, 1)
+        if marker[0] != 0xFF:
+            raise ImageProbeError("Invalid JPEG marker.")
+
+        code = marker[1]
+        if code == 0x01 or 0xD0 <= code <= 0xD7:
+            continue
+        if code in (0xD9, 0xDA):
+            break
+
+        (length,) = struct.unpack(">H", read_exact(image_file, 2))
+        if length < 2:
+            raise ImageProbeError("Invalid JPEG segment length.")
+        if code in JPEG_SOF_MARKERS:
+            _, height, width = struct.unpack(">BHH", read_exact(image_file, 5))
+            if orientation in (5, 6, 7, 8):
+                # Displayed rotated by 90 degrees.
+                width, height = height, width
+            return width, height, False
+        if code == 0xE1 and orientation == 1:
+            # IFD0, where the orientation tag lives, sits at the start of the segment.
+            head_size = min(length - 2, EXIF_HEAD_BYTES)
+            orientation = get_exif_orientation(read_exact(image_file, head_size))
+            image_file.seek(length - 2 - head_size, 1)
+            continue
+        image_file.seek(length - 2, 1)
+    raise ImageProbeError("JPEG frame header not found.")
+
+
+def probe_png(image_file):
+    image_file.seek(8)
+    length, chunk_type = struct.unpack(">I4s", read_exact(image_file, 8))
+    if chunk_type != b"IHDR" or length != 13:
+        raise ImageProbeError("PNG header chunk missing.")
+    width, height = struct.unpack(">II", read_exact(image_file, 8))
+    image_file.seek(length - 8 + 4, 1)
+
+    # An APNG announces itself with an acTL chunk before the first IDAT.
+    for _ in range(MAX_PROBE_SEGMENTS):
+        chunk_header = image_file.read(8)
+        if len(chunk_header) < 8:
+            break
+        length, chunk_type = struct.unpack(">I4s", chunk_header)
+        if chunk_type == b"acTL":
+            return width, height, True
+        if chunk_type in (b"IDAT", b"IEND"):
+            break
+        image_file.seek(length + 4, 1)
+    return width, height, False
+
+
+def probe_webp(image_file):
+    image_file.seek(12)
+    chunk_type, _ = struct.unpack("<4sI", read_exact(image_file, 8))
+    if chunk_type == b"VP8X":
+        flags = read_exact(image_file, 4)[0]
+        size = read_exact(image_file, 6)
+        width = int.from_bytes(size[:3], "little") + 1
+        height = int.from_bytes(size[3:], "little") + 1
+        return width, height, bool(flags & 0x02)
+    if chunk_type == b"VP8 ":
+        frame = read_exact(image_file, 10)
+        if frame[3:6] != b"\x9d\x01\x2a":
+            raise ImageProbeError("Invalid WebP frame.")
+        width, height = struct.unpack("<HH", frame[6:10])
+        return width & 0x3FFF, height & 0x3FFF, False
+    if chunk_type == b"VP8L":
+        frame = read_exact(image_file, 5)
+        if frame[0] != 0x2F:
+            raise ImageProbeError("Invalid WebP frame.")
+        bits = int.from_bytes(frame[1:5], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1, False
+    raise ImageProbeError("Unsupported WebP chunk.")
+
+
+def probe_gif(image_file):
+    image_file.seek(6)
+    width, height, flags = struct.unpack("<HHB", read_exact(image_file, 5))
+    image_file.seek(2, 1)
+    if flags & 0x80:
+        image_file.seek(3 * (2 ** ((flags & 0x07) + 1)), 1)
+
+    # Looping GIFs carry an application extension ahead of the first frame;
+    # frames themselves are not walked.
+    for _ in range(MAX_PROBE_SEGMENTS):
+        introducer = image_file.read(1)
+        if introducer != b"\x21":
+            break
+        label = read_exact(image_file, 1)
+        first_block = True
+        while True:
+            block_size = read_exact(image_file, 1)[0]
+            if block_size == 0:
+                break
+            block = read_exact(image_file, block_size)
+            if first_block and label == b"\xff" and block in GIF_ANIMATION_EXTENSIONS:
+                return width, height, True
+            first_block = False
+    return width, height, False
+
+
+PROBES = {"jpeg": probe_jpeg, "png": probe_png, "webp": probe_webp, "gif": probe_gif}
+
+
+def probe_image_file(image_file, max_pixels=None):
+    """
+    Reads an image's type, size and animation flag from its headers only.
+
+    Only the magic bytes and the few header structures holding the
+    dimensions are read; pixel data is never decoded. Raises
+    `ImageProbeError` for unknown or truncated files and for images over
+    `max_pixels`.
+    """
+
+    image_file.seek(0)
+    image_format = sniff_image_format(image_file.read(PROBE_HEADER_BYTES))
+    if image_format is None:
+        raise ImageProbeError("Unsupported image format.")
+
+    try:
+        width, height, animated = PROBES[image_format](image_file)
+    except struct.error:
+        raise ImageProbeError("Image file is truncated.")
+    finally:
+        image_file.seek(0)
+
+    if not width or not height:
+        raise ImageProbeError("Image has no dimensions.")
+    if max_pixels and width * height > max_pixels:
+        raise ImageProbeError("Image dimensions are too large.")
+
+    return {
+        "format": image_format,
+        "content_type": IMAGE_FORMATS[image_format]["content_types"][0],
+        "extension": IMAGE_FORMATS[image_format]["extensions"][0],
+        "width": width,
+        "height": height,
+        "animated": animated,
+    }
@@ -0,0 +1,234 @@
+import atexit
+import logging
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from apps.common.response_cache import invalidate
+from .blobs import get_image_referrers, get_media_path, get_media_url_path
+from .imaging import is_imaging_available, render_image_renditions
+from .models import ImageBlob
+
+
+logger = logging.getLogger(__name__)
+
+RENDITION_DIRECTORY = "renditions"
+MANIFESTS_CONTEXT_KEY = "image_rendition_manifests"
+
+_executor = None
+_executor_lock = threading.Lock()
+_store_queue = queue.Queue()
+_store_thread = None
+
+
+def get_rendition_widths():
+    return getattr(settings, "IMAGE_RENDITION_WIDTHS", (96, 480, 1080))
+
+
+def get_rendition_format():
+    return getattr(settings, "IMAGE_RENDITION_FORMAT", "webp").lower()
+
+
+def get_rendition_quality():
+    return getattr(settings, "IMAGE_RENDITION_QUALITY", 80)
+
+
+def get_rendition_path(digest, width, image_format):
+    return f"{RENDITION_DIRECTORY}/{digest[:2]}/{digest}-{width}w.{image_format}"
+
+
+def get_rendition_executor():
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            # Spawned workers only import `imaging`, so no database connection
+            # or thread state is inherited from the web process.
+            _executor = ProcessPoolExecutor(
+                max_workers=max(getattr(settings, "IMAGE_RENDITION_WORKERS", 2), 1),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def get_rendition_store_thread():
+    """Starts the thread that waits for rendered images and saves them, off the pool's own threads."""
+
+    global _store_thread
+
+    with _executor_lock:
+        if _store_thread is None:
+            _store_thread = threading.Thread(target=run_rendition_store, name="image-rendition-store", daemon=True)
+            _store_thread.start()
+        return _store_thread
+
+
+def run_rendition_store():
+    while True:
+        item = _store_queue.get()
+        if item is None:
+            connection.close()
+            return
+        blob, future = item
+        close_old_connections()
+        try:
+            store_blob_renditions(blob, future.result())
+        except Exception:
+            logger.exception("Could not generate renditions for %s", blob.path)
+        finally:
+            close_old_connections()
+
+
+def shutdown_rendition_executor(wait=True):
+    global _executor, _store_thread
+
+    with _executor_lock:
+        executor = _executor
+        store_thread = _store_thread
+        _executor = None
+        _store_thread = None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+    if store_thread is not None:
+        # Queued after every pending result, so those are still saved.
+        _store_queue.put(None)
+        if wait:
+            store_thread.join()
+
+
+atexit.register(shutdown_rendition_executor)
+
+
+def get_render_arguments(blob):
+    # The worker opens the file itself, so only its path is pickled to the
+    # pool and no image bytes are read on the calling thread.
+    return (
+        default_storage.path(blob.path),
+        get_rendition_widths(),
+        get_rendition_format(),
+        get_rendition_quality(),
+    )
+
+
+def store_blob_renditions(blob, result):
+    """Saves rendered files next to the blob and records them in its manifest."""
+
+    image_format = get_rendition_format()
+    manifest = {}
+    for rendition in result["renditions"]:
+        path = get_rendition_path(blob.digest, rendition["width"], image_format)
+        if not default_storage.exists(path):
+            default_storage.save(path, ContentFile(rendition["content"]))
+        manifest[str(rendition["width"])] = {
+            "path": path,
+            "width": rendition["width"],
+            "height": rendition["height"],
+            "size": len(rendition["content"]),
+            "content_type": f"image/{image_format}",
+        }
+
+    ImageBlob.objects.filter(pk=blob.pk).update(renditions=manifest, renditions_generated_at=timezone.now())
+    refresh_image_referrers(blob.path)
+    return manifest
+
+
+def refresh_image_referrers(path):
+    """
+    Makes cached responses and ETags of posts and users showing `path` pick up new renditions.
+
+    Posts get `counters_updated_at` moved rather than `updated_at`: the srcset
+    is derived data, not an edit.
+    """
+
+    posts, users = get_image_referrers(path)
+    rows = list(posts.order_by().values_list("id", "author_id"))
+    if rows:
+        posts.update(counters_updated_at=timezone.now())
+    for post_id, author_id in rows:
+        invalidate("post", post_id)
+        invalidate("user-posts", author_id)
+
+    for user_id in users.values_list("id", flat=True):
+        invalidate("user", user_id)
+
+
+def generate_blob_renditions(blob):
+    if not is_imaging_available():
+        return None
+    return store_blob_renditions(blob, render_image_renditions(*get_render_arguments(blob)))
+
+
+def submit_blob_renditions(blob_id):
+    blob = ImageBlob.objects.filter(pk=blob_id).first()
+    if blob is None:
+        return None
+    try:
+        future = get_rendition_executor().submit(render_image_renditions, *get_render_arguments(blob))
+    except Exception:
+        logger.exception("Could not queue renditions for %s", blob.path)
+        return None
+    get_rendition_store_thread()
+    _store_queue.put((blob, future))
+    return future
+
+
+def schedule_blob_renditions(blob_id):
+    """Renders the blob's renditions once the surrounding transaction commits."""
+
+    if not is_imaging_available():
+        return
+    if getattr(settings, "IMAGE_RENDITIONS_ASYNC", True):
+        transaction.on_commit(partial(submit_blob_renditions, blob_id))
+        return
+
+    blob = ImageBlob.objects.filter(pk=blob_id).first()
+    if blob is not None:
+        transaction.on_commit(partial(generate_blob_renditions, blob))
+
+
+def load_rendition_manifests(context, urls):
+    """Loads the manifests of every image in `urls` into a serializer context with one query."""
+
+    manifests = context.setdefault(MANIFESTS_CONTEXT_KEY, {})
+    missing_paths = set()
+    for url in urls:
+        path = get_media_path(url)
+        if path and path not in manifests:
+            missing_paths.add(path)
+    if not missing_paths:
+        return manifests
+
+    for path in missing_paths:
+        manifests[path] = {}
+    for path, renditions in ImageBlob.objects.filter(path__in=missing_paths).values_list("path", "renditions"):
+        manifests[path] = renditions or {}
+    return manifests
+
+
+def build_srcset(url, manifest):
+    if not manifest:
+        return ""
+
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}" if parts.netloc else ""
+    candidates = []
+    for rendition in sorted(manifest.values(), key=lambda item: item["width"]):
+        candidates.append(f"{origin}{get_media_url_path()}{rendition['path']} {rendition['width']}w")
+    return ", ".join(candidates)
+
+
+def get_image_srcset(context, url):
+    path = get_media_path(url)
+    if not path:
+        return ""
+    manifests = load_rendition_manifests(context, [url])
+    return build_srcset(url, manifests.get(path))
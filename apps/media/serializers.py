@@ -0,0 +1,71 @@
+from django.db.models.manager import BaseManager
+from rest_framework import serializers
+
+from .models import UploadSession
+from .renditions import get_image_srcset, load_rendition_manifests
+from .sessions import get_session_max_bytes
+
+
+def get_source_value(item, source):
+    for attribute in source.split("."):
+        item = getattr(item, attribute, None)
+        if item is None:
+            return ""
+    return item
+
+
+class ImageSrcsetListSerializer(serializers.ListSerializer):
+    """
+    Loads the rendition manifests for a whole page before its items are serialized.
+
+    `srcset_source_fields` on the child may use dotted paths such as
+    `actor.profile_pic` for images of nested objects.
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, BaseManager) else data)
+        urls = []
+        for item in items:
+            for field_name in self.child.srcset_source_fields:
+                urls.append(get_source_value(item, field_name))
+        load_rendition_manifests(self.context, urls)
+        return super().to_representation(items)
+
+
+class ImageSrcsetMixin:
+    srcset_source_fields = ()
+
+    def get_srcset(self, url):
+        return get_image_srcset(self.context, url)
+
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    filename = serializers.CharField(max_length=255)
+    content_type = serializers.CharField(max_length=100)
+    size = serializers.IntegerField(min_value=1)
+
+    def validate_content_type(self, value):
+        value = value.strip().lower()
+        if not value.startswith("image/"):
+            raise serializers.ValidationError("Only image files allowed.")
+        return value
+
+    def validate_size(self, value):
+        max_size = get_session_max_bytes()
+        if value > max_size:
+            raise serializers.ValidationError(f"Image must be under {max_size // (1024 * 1024)}MB.")
+        return value
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    offset = serializers.IntegerField(source="received_bytes", read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = ["id", "filename", "content_type", "size", "offset", "status", "url", "expires_at", "created_at"]
+        read_only_fields = fields
+
+
+class UploadSessionOffsetSerializer(serializers.Serializer):
+    offset = serializers.IntegerField()
+    size = serializers.IntegerField()
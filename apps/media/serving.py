@@ -0,0 +1,187 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+
+from .blobs import BLOB_DIRECTORY
+from .renditions import RENDITION_DIRECTORY
+
+
+# `uploads/ab/<sha256>.png` and `renditions/ab/<sha256>-480w.webp` never change
+# once written, so they can be cached forever.
+CONTENT_ADDRESSED_PATH = re.compile(
+    rf"^(?:{BLOB_DIRECTORY}|{RENDITION_DIRECTORY})/[0-9a-f]{{2}}/(?P<digest>[0-9a-f]{{64}})(?P<variant>-\d+w)?\.\w+$"
+)
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class FileRange:
+    """
+    Limits reads from an open file to one byte range.
+
+    There is deliberately no `fileno()`: WSGI file wrappers that find one
+    sendfile from the current offset to EOF and would overrun the range.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def resolve_media_file(path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("File not found.")
+    if not os.path.isfile(full_path):
+        raise Http404("File not found.")
+    return full_path
+
+
+def get_media_etag(path, stat_result):
+    match = CONTENT_ADDRESSED_PATH.match(path)
+    if match is not None:
+        return quote_etag(f"{match.group('digest')}{match.group('variant') or ''}")
+    return quote_etag(f"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}")
+
+
+def get_media_cache_control(path):
+    if CONTENT_ADDRESSED_PATH.match(path):
+        return IMMUTABLE_CACHE_CONTROL
+    return f"public, max-age={getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600)}"
+
+
+def strip_weak_prefix(etag):
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def is_not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        etags = [strip_weak_prefix(value) for value in parse_etags(if_none_match)]
+        return "*" in etags or etag in etags
+
+    if_modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+
+def parse_range(request, size, etag, last_modified):
+    """
+    Returns `(start, end)` for a single satisfiable byte range, None to send
+    the whole file, or raises ValueError when the range cannot be satisfied.
+
+    Multi-range requests are answered with the whole file, which RFC 9110 allows.
+    """
+
+    header = request.headers.get("Range", "")
+    match = RANGE_PATTERN.match(header.strip())
+    if match is None:
+        return None
+
+    if_range = request.headers.get("If-Range", "").strip()
+    if if_range:
+        if_range_date = parse_http_date_safe(if_range)
+        if if_range_date is None and if_range != etag:
+            return None
+        if if_range_date is not None and if_range_date != last_modified:
+            return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if start >= size or start > end:
+            raise ValueError(header)
+    elif last:
+        suffix_length = int(last)
+        if suffix_length == 0 or size == 0:
+            raise ValueError(header)
+        start = max(size - suffix_length, 0)
+        end = size - 1
+    else:
+        return None
+    return start, end
+
+
+def get_offload_response(path, full_path, content_type):
+    """
+    Hands the transfer to the front proxy when X-Accel-Redirect or X-Sendfile is configured.
+
+    The proxy then answers Range requests itself.
+    """
+
+    accel_prefix = getattr(settings, "MEDIA_X_ACCEL_REDIRECT_PREFIX", "")
+    if accel_prefix:
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = f"{accel_prefix.rstrip('/')}/{path}"
+        return response
+    if getattr(settings, "MEDIA_X_SENDFILE", False):
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = full_path
+        return response
+    return None
+
+
+def build_media_response(request, path):
+    full_path = resolve_media_file(path)
+    stat_result = os.stat(full_path)
+    size = stat_result.st_size
+    last_modified = int(stat_result.st_mtime)
+    etag = get_media_etag(path, stat_result)
+    content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    validators = {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        "Cache-Control": get_media_cache_control(path),
+    }
+
+    if is_not_modified(request, etag, last_modified):
+        response = HttpResponseNotModified()
+    else:
+        response = get_offload_response(path, full_path, content_type)
+    if response is not None:
+        for header, value in validators.items():
+            response[header] = value
+        return response
+
+    try:
+        byte_range = parse_range(request, size, etag, last_modified)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        response["Accept-Ranges"] = "bytes"
+        return response
+
+    media_file = open(full_path, "rb")
+    if byte_range is None:
+        # A plain file lets the WSGI server's file wrapper use os.sendfile.
+        response = FileResponse(media_file, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(FileRange(media_file, start, end - start + 1), status=206, content_type=content_type)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = end - start + 1
+
+    response["Accept-Ranges"] = "bytes"
+    for header, value in validators.items():
+        response[header] = value
+    return response
@@ -0,0 +1,225 @@
+import os
+import re
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import NotFound
+
+from apps.common.image_utils import upload_image_file
+from .models import UploadSession
+
+try:
+    import fcntl
+except ImportError:  # Windows: chunk writes of one session are not serialized.
+    fcntl = None
+
+
+CONTENT_RANGE_PATTERN = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+class UploadOffsetConflict(Exception):
+    def __init__(self, offset):
+        super().__init__(f"Expected a range starting at byte {offset}.")
+        self.offset = offset
+
+
+def get_session_max_bytes():
+    return getattr(settings, "UPLOAD_SESSION_MAX_BYTES", 20 * 1024 * 1024)
+
+
+def get_session_ttl():
+    return timedelta(hours=getattr(settings, "UPLOAD_SESSION_TTL_HOURS", 24))
+
+
+def get_session_directory():
+    directory = getattr(settings, "UPLOAD_SESSION_DIR", None)
+    if not directory:
+        directory = os.path.join(tempfile.gettempdir(), "blog-upload-sessions")
+    os.makedirs(directory, exist_ok=True)
+    return str(directory)
+
+
+def get_session_file_path(session):
+    return os.path.join(get_session_directory(), f"{session.pk}.part")
+
+
+def remove_session_file(session):
+    try:
+        os.remove(get_session_file_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def create_upload_session(owner, filename, content_type, size):
+    session = UploadSession.objects.create(
+        owner=owner,
+        filename=filename,
+        content_type=content_type,
+        size=size,
+        expires_at=timezone.now() + get_session_ttl(),
+    )
+    open(get_session_file_path(session), "wb").close()
+    return session
+
+
+def get_owned_session(owner, session_id):
+    session = UploadSession.objects.filter(pk=session_id, owner=owner, expires_at__gt=timezone.now()).first()
+    if session is None:
+        raise NotFound("Upload session not found.")
+    return session
+
+
+def parse_content_range(header, size):
+    match = CONTENT_RANGE_PATTERN.match((header or "").strip())
+    if match is None:
+        raise serializers.ValidationError({"Content-Range": ["Expected `bytes <start>-<end>/<size>`."]})
+
+    start, end = int(match.group(1)), int(match.group(2))
+    total = match.group(3)
+    if end < start or end >= size or (total != "*" and int(total) != size):
+        raise serializers.ValidationError({"Content-Range": ["Range does not fit the session size."]})
+    return start, end
+
+
+def refresh_session(session):
+    try:
+        session.refresh_from_db(fields=["status", "received_bytes", "url"])
+    except UploadSession.DoesNotExist:
+        raise NotFound("Upload session not found.")
+
+
+def lock_session_file(session, mode):
+    """
+    Opens the partial file and takes an exclusive lock on it, so chunk writes
+    and finalization of one session run one at a time across workers.
+
+    Returns None once the file is gone, i.e. the session was finalized or
+    deleted meanwhile. The lock is released when the file is closed.
+    """
+
+    try:
+        part_file = open(get_session_file_path(session), mode)
+    except FileNotFoundError:
+        return None
+    if fcntl is not None:
+        fcntl.flock(part_file.fileno(), fcntl.LOCK_EX)
+    return part_file
+
+
+def append_session_chunk(session, stream, start, end):
+    """
+    Writes one byte range of the upload straight from the request stream.
+
+    The body is copied in fixed-size reads, so it is never held in memory
+    as a whole. A range must start at the current offset; the offset only
+    moves once the whole range has arrived, so a dropped request can simply
+    be resent.
+    """
+
+    part_file = lock_session_file(session, "r+b")
+    if part_file is None:
+        refresh_session(session)
+        raise serializers.ValidationError({"detail": ["Upload session is already finalized."]})
+
+    with part_file:
+        # Re-read under the lock: a concurrent request may have moved the offset.
+        refresh_session(session)
+        if session.status != UploadSession.STATUS_OPEN:
+            raise serializers.ValidationError({"detail": ["Upload session is already finalized."]})
+        if start != session.received_bytes:
+            raise UploadOffsetConflict(session.received_bytes)
+
+        expected = end - start + 1
+        written = 0
+        part_file.seek(start)
+        while written < expected:
+            chunk = stream.read(min(STREAM_CHUNK_BYTES, expected - written))
+            if not chunk:
+                break
+            part_file.write(chunk)
+            written += len(chunk)
+        # Drop bytes past the range, e.g. from an earlier attempt that failed midway.
+        part_file.truncate()
+        part_file.flush()
+
+        if written != expected or stream.read(1):
+            raise serializers.ValidationError({"detail": ["Request body does not match Content-Range."]})
+
+        updated = UploadSession.objects.filter(pk=session.pk).update(
+            received_bytes=end + 1,
+            expires_at=timezone.now() + get_session_ttl(),
+            updated_at=timezone.now(),
+        )
+    if not updated:
+        raise NotFound("Upload session not found.")
+    session.received_bytes = end + 1
+    return session
+
+
+def finalize_upload_session(request, session):
+    """Validates and stores the assembled file like a single-request upload and returns its URL."""
+
+    if session.status == UploadSession.STATUS_COMPLETED:
+        return session.url
+
+    part_file = lock_session_file(session, "rb")
+    if part_file is None:
+        refresh_session(session)
+        if session.status == UploadSession.STATUS_COMPLETED:
+            return session.url
+        raise NotFound("Upload session not found.")
+
+    with part_file:
+        # A concurrent finalize may have finished while this one waited for the lock.
+        refresh_session(session)
+        if session.status == UploadSession.STATUS_COMPLETED:
+            return session.url
+        if session.received_bytes != session.size:
+            raise serializers.ValidationError(
+                {"detail": [f"Upload is incomplete: {session.received_bytes} of {session.size} bytes received."]}
+            )
+
+        image_file = UploadedFile(
+            file=part_file,
+            name=session.filename,
+            content_type=session.content_type,
+            size=session.size,
+        )
+        url = upload_image_file(request, image_file, max_size=get_session_max_bytes())
+
+        UploadSession.objects.filter(pk=session.pk).update(
+            status=UploadSession.STATUS_COMPLETED,
+            url=url,
+            updated_at=timezone.now(),
+        )
+        remove_session_file(session)
+    session.status = UploadSession.STATUS_COMPLETED
+    session.url = url
+    return url
+
+
+def delete_upload_session(session):
+    session.delete()
+    remove_session_file(session)
+
+
+def prune_upload_sessions(now=None, batch_size=500):
+    """Deletes expired sessions, finished or not, together with their partial files."""
+
+    if now is None:
+        now = timezone.now()
+
+    deleted = 0
+    while True:
+        sessions = list(UploadSession.objects.filter(expires_at__lte=now).order_by("expires_at")[:batch_size])
+        if not sessions:
+            return deleted
+        UploadSession.objects.filter(pk__in=[session.pk for session in sessions]).delete()
+        for session in sessions:
+            remove_session_file(session)
+        deleted += len(sessions)
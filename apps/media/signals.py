@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.posts.models import Post
+from .blobs import adjust_image_references, get_image_dimensions, get_media_path
+from .models import ImageBlob
+from .renditions import schedule_blob_renditions
+
+
+User = get_user_model()
+
+
+def update_image_reference(instance, field_name, created, update_fields=None):
+    new_url = getattr(instance, field_name)
+    if created:
+        adjust_image_references(added=[new_url])
+        return
+    if not instance.has_field_changed(field_name, update_fields):
+        return
+    # An unknown old value (the field was deferred) only leaks a reference,
+    # which keeps the old blob alive rather than reclaiming a live one.
+    old_url = instance.get_tracked_value(field_name)
+    adjust_image_references(added=[new_url], removed=[old_url] if old_url else [])
+
+
+def copy_image_metadata(instance, field_name, update_fields=None):
+    """
+    Stores the media path and probed dimensions of the image URL next to it
+    when the URL changes.
+    """
+
+    if not instance._state.adding and not instance.has_field_changed(field_name, update_fields):
+        return
+    url = getattr(instance, field_name)
+    width, height = get_image_dimensions([url]).get(url, (None, None))
+    metadata = {
+        f"{field_name}_path": get_media_path(url) or "",
+        f"{field_name}_width": width,
+        f"{field_name}_height": height,
+    }
+    for name, value in metadata.items():
+        setattr(instance, name, value)
+    if update_fields is not None and not set(metadata).issubset(update_fields):
+        # A narrow update_fields save would leave the stored metadata stale.
+        type(instance)._base_manager.filter(pk=instance.pk).update(**metadata)
+
+
+@receiver(pre_save, sender=Post)
+def set_post_image_metadata(sender, instance, update_fields=None, **kwargs):
+    copy_image_metadata(instance, "image", update_fields)
+
+
+@receiver(pre_save, sender=User)
+def set_profile_pic_metadata(sender, instance, update_fields=None, **kwargs):
+    copy_image_metadata(instance, "profile_pic", update_fields)
+
+
+@receiver(post_save, sender=Post)
+def update_post_image_reference(sender, instance, created, update_fields=None, **kwargs):
+    update_image_reference(instance, "image", created, update_fields)
+
+
+@receiver(post_delete, sender=Post)
+def release_post_image_reference(sender, instance, **kwargs):
+    adjust_image_references(removed=[instance.image])
+
+
+@receiver(post_save, sender=User)
+def update_profile_pic_reference(sender, instance, created, update_fields=None, **kwargs):
+    update_image_reference(instance, "profile_pic", created, update_fields)
+
+
+@receiver(post_delete, sender=User)
+def release_profile_pic_reference(sender, instance, **kwargs):
+    adjust_image_references(removed=[instance.profile_pic])
+
+
+@receiver(post_save, sender=ImageBlob)
+def generate_new_blob_renditions(sender, instance, created, **kwargs):
+    # Renditions keep only the first frame, so animated images are served as uploaded.
+    if created and not instance.animated:
+        schedule_blob_renditions(instance.pk)
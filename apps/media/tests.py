@@ -0,0 +1,568 @@
+import os
+import shutil
+import struct
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import skipUnless
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from apps.posts.models import Post
+from apps.users.models import Follow
+from .blobs import reclaim_image_blobs, register_existing_image
+from .imaging import is_imaging_available, render_image_renditions
+from .models import ImageBlob, UploadSession
+from .probe import ImageProbeError, probe_image_file
+from .renditions import get_render_arguments, get_rendition_executor, store_blob_renditions
+from .sessions import UploadOffsetConflict, append_session_chunk, finalize_upload_session, get_session_file_path
+
+
+User = get_user_model()
+MEDIA_ROOT = tempfile.mkdtemp(prefix="blog-media-")
+UPLOAD_SESSION_DIR = tempfile.mkdtemp(prefix="blog-upload-sessions-")
+
+
+def sendfile_wrapper(filelike, block_size=8192):
+    # Mirrors uWSGI's file wrapper: anything with a descriptor is sent from
+    # the current offset to EOF.
+    if hasattr(filelike, "fileno"):
+        yield os.read(filelike.fileno(), os.fstat(filelike.fileno()).st_size)
+        return
+    while True:
+        data = filelike.read(block_size)
+        if not data:
+            return
+        yield data
+
+
+def make_png(width, height):
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + header + b"\x00" * 4
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageBlobTests(APITestCase):
+    def setUp(self):
+        self.addCleanup(shutil.rmtree, MEDIA_ROOT, ignore_errors=True)
+        self.user = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            password="strong-pass-123",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def upload(self, content=None, name="photo.png", content_type="image/png"):
+        if content is None:
+            content = make_png(64, 48)
+        image = SimpleUploadedFile(name, content, content_type=content_type)
+        response = self.client.post(reverse("image-upload"), {"file": image}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data["url"]
+
+    def test_identical_uploads_share_one_content_addressed_file(self):
+        first_url = self.upload(name="first.png")
+        second_url = self.upload(name="second")
+        other_url = self.upload(content=make_png(48, 64))
+
+        self.assertEqual(first_url, second_url)
+        self.assertNotEqual(first_url, other_url)
+        self.assertEqual(ImageBlob.objects.count(), 2)
+
+        blob = ImageBlob.objects.get(path=first_url.split("/media/", 1)[1])
+        self.assertEqual(blob.size, len(make_png(64, 48)))
+        self.assertTrue(blob.path.endswith(f"{blob.digest}.png"))
+        blob_directory = os.path.dirname(os.path.join(MEDIA_ROOT, blob.path))
+        self.assertEqual(os.listdir(blob_directory), [os.path.basename(blob.path)])
+
+    def test_post_and_profile_references_are_counted(self):
+        url = self.upload()
+        blob = ImageBlob.objects.get()
+
+        post = Post.objects.create(author=self.user, name="Photo", content="Body", image=url)
+        self.user.profile_pic = url
+        self.user.save()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 2)
+
+        post.image = "https://example.com/elsewhere.jpg"
+        post.save()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+
+        self.user.delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 0)
+
+    def test_reclaim_deletes_only_unreferenced_blobs_past_the_grace_period(self):
+        kept_url = self.upload(content=make_png(10, 10))
+        orphan_url = self.upload(content=make_png(20, 20))
+        recent_url = self.upload(content=make_png(30, 30))
+        Post.objects.create(author=self.user, name="Photo", content="Body", image=kept_url)
+        ImageBlob.objects.exclude(path=recent_url.split("/media/", 1)[1]).update(
+            last_uploaded_at=timezone.now() - timedelta(days=2)
+        )
+
+        out = StringIO()
+        call_command("reclaim_image_blobs", "--grace-hours", "24", stdout=out)
+
+        self.assertIn("Reclaimed 1 image blobs.", out.getvalue())
+        orphan_path = orphan_url.split("/media/", 1)[1]
+        self.assertFalse(ImageBlob.objects.filter(path=orphan_path).exists())
+        self.assertFalse(os.path.exists(os.path.join(MEDIA_ROOT, orphan_path)))
+        self.assertEqual(ImageBlob.objects.count(), 2)
+
+    def test_reclaim_skips_blobs_whose_counter_missed_a_reference(self):
+        for size in (10, 20, 30):
+            url = self.upload(content=make_png(size, size))
+            post = Post.objects.create(author=self.user, name="Photo", content="Body", image=url)
+            self.assertEqual(post.image_path, url.split("/media/", 1)[1])
+        ImageBlob.objects.update(ref_count=0, last_uploaded_at=timezone.now() - timedelta(days=2))
+
+        # One candidate batch, one indexed path lookup per image column, and
+        # the empty batch that ends the scan, however many blobs there are.
+        with self.assertNumQueries(4):
+            self.assertEqual(reclaim_image_blobs(), 0)
+
+        for blob in ImageBlob.objects.all():
+            self.assertTrue(os.path.exists(os.path.join(MEDIA_ROOT, blob.path)))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageProbeTests(APITestCase):
+    def setUp(self):
+        self.addCleanup(shutil.rmtree, MEDIA_ROOT, ignore_errors=True)
+        self.user = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            password="strong-pass-123",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_probe_reads_dimensions_and_animation_from_headers(self):
+        exif = b"Exif\x00\x00II*\x00" + struct.pack("<IHHHIHH", 8, 1, 0x0112, 3, 1, 6, 0) + b"\x00" * 4
+        rotated_jpeg = (
+            b"\xff\xd8\xff\xe1" + struct.pack(">H", len(exif) + 2) + exif
+            + b"\xff\xc0" + struct.pack(">HBHH", 17, 8, 300, 400) + b"\x00" * 12
+        )
+        animated_gif = (
+            b"GIF89a" + struct.pack("<HHBBB", 10, 20, 0, 0, 0)
+            + b"\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00\x2c"
+        )
+        animated_webp = (
+            b"RIFF\x00\x00\x00\x00WEBPVP8X" + struct.pack("<I", 10)
+            + b"\x02\x00\x00\x00" + (99).to_bytes(3, "little") + (49).to_bytes(3, "little")
+        )
+
+        jpeg_info = probe_image_file(BytesIO(rotated_jpeg))
+        gif_info = probe_image_file(BytesIO(animated_gif))
+        webp_info = probe_image_file(BytesIO(animated_webp))
+
+        self.assertEqual((jpeg_info["width"], jpeg_info["height"], jpeg_info["animated"]), (300, 400, False))
+        self.assertEqual((gif_info["width"], gif_info["height"], gif_info["animated"]), (10, 20, True))
+        self.assertEqual((webp_info["format"], webp_info["width"], webp_info["height"]), ("webp", 100, 50))
+        self.assertTrue(webp_info["animated"])
+        with self.assertRaises(ImageProbeError):
+            probe_image_file(BytesIO(rotated_jpeg[:30]))
+
+    def test_upload_rejects_bad_images_before_writing_anything(self):
+        cases = [
+            ("photo.png", b"not-an-image", "image/png"),
+            ("photo.png", make_png(64, 48), "image/jpeg"),
+            ("photo.gif", make_png(64, 48), "image/png"),
+            ("bomb.png", make_png(100_000, 100_000), "image/png"),
+        ]
+        for name, content, content_type in cases:
+            with self.subTest(name=name, content_type=content_type):
+                image = SimpleUploadedFile(name, content, content_type=content_type)
+                response = self.client.post(reverse("image-upload"), {"file": image}, format="multipart")
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertFalse(ImageBlob.objects.exists())
+        self.assertFalse(os.path.exists(os.path.join(MEDIA_ROOT, "uploads")))
+
+    @override_settings(ALLOWED_HOSTS=["example.com"])
+    def test_image_dimensions_are_stored_next_to_image_urls(self):
+        image = SimpleUploadedFile("photo.png", make_png(640, 360), content_type="image/png")
+        response = self.client.post(
+            reverse("post-list-create"),
+            {"name": "Photo", "content": "Body", "file": image},
+            format="multipart",
+            HTTP_HOST="example.com",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data["image_width"], response.data["image_height"]), (640, 360))
+
+        post = Post.objects.get()
+        self.user.profile_pic = post.image
+        self.user.save()
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.profile_pic_width, self.user.profile_pic_height), (640, 360))
+
+        post.image = "https://example.com/elsewhere.jpg"
+        post.save()
+        post.refresh_from_db()
+        self.assertIsNone(post.image_width)
+        self.assertIsNone(post.image_height)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, RESPONSE_CACHE_TIMEOUT=0)
+class ImageRenditionTests(APITestCase):
+    def setUp(self):
+        self.addCleanup(shutil.rmtree, MEDIA_ROOT, ignore_errors=True)
+        self.user = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            password="strong-pass-123",
+        )
+
+    def create_blob(self, digest, widths=(96, 480)):
+        renditions = {}
+        for width in widths:
+            renditions[str(width)] = {
+                "path": f"renditions/{digest[:2]}/{digest}-{width}w.webp",
+                "width": width,
+                "height": width,
+                "size": 100,
+                "content_type": "image/webp",
+            }
+        return ImageBlob.objects.create(
+            digest=digest,
+            path=f"uploads/{digest[:2]}/{digest}.jpg",
+            size=1000,
+            renditions=renditions,
+            renditions_generated_at=timezone.now(),
+        )
+
+    def test_post_list_exposes_srcset_with_one_manifest_query(self):
+        for index in range(3):
+            digest = f"{index:02d}" + "a" * 62
+            self.create_blob(digest)
+            Post.objects.create(
+                author=self.user,
+                name=f"Post {index}",
+                content="Body",
+                image=f"http://testserver/media/uploads/{digest[:2]}/{digest}.jpg",
+            )
+        Post.objects.create(author=self.user, name="External", content="Body", image="https://example.com/a.jpg")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("post-list-create"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        manifest_queries = [query for query in queries.captured_queries if '"media_imageblob"' in query["sql"]]
+        self.assertEqual(len(manifest_queries), 1)
+
+        srcsets = {item["name"]: item["image_srcset"] for item in response.data["results"]}
+        self.assertEqual(srcsets["External"], "")
+        digest = "00" + "a" * 62
+        self.assertEqual(
+            srcsets["Post 0"],
+            f"http://testserver/media/renditions/00/{digest}-96w.webp 96w, "
+            f"http://testserver/media/renditions/00/{digest}-480w.webp 480w",
+        )
+
+    def test_follower_list_exposes_profile_pic_srcset(self):
+        digest = "b" * 64
+        self.create_blob(digest, widths=(96,))
+        follower = User.objects.create_user(
+            username="bob",
+            email="bob@example.com",
+            password="strong-pass-123",
+            profile_pic=f"http://testserver/media/uploads/bb/{digest}.jpg",
+        )
+        Follow.objects.create(follower=follower, following=self.user)
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(reverse("user-follower-list", kwargs={"user_id": self.user.id}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"][0]["profile_pic_srcset"],
+            f"http://testserver/media/renditions/bb/{digest}-96w.webp 96w",
+        )
+
+    def test_existing_uploads_are_registered_with_their_references(self):
+        path = default_storage.save("uploads/legacy-upload.jpg", ContentFile(b"legacy-image-bytes"))
+        Post.objects.create(
+            author=self.user,
+            name="Old post",
+            content="Body",
+            image=f"http://testserver/media/{path}",
+        )
+
+        blob = register_existing_image(path)
+
+        self.assertEqual(blob.path, path)
+        self.assertEqual(blob.ref_count, 1)
+        self.assertEqual(blob.content_type, "image/jpeg")
+        self.assertIsNone(blob.renditions_generated_at)
+
+    def test_new_renditions_refresh_referrers_without_marking_them_edited(self):
+        blob = self.create_blob("b" * 64, widths=())
+        post = Post.objects.create(
+            author=self.user,
+            name="Photo",
+            content="Body",
+            image=f"http://testserver/media/{blob.path}",
+        )
+
+        result = {"renditions": [{"width": 96, "height": 96, "content": b"rendition"}]}
+        with self.assertNumQueries(4):
+            store_blob_renditions(blob, result)
+
+        refreshed = Post.objects.get(pk=post.pk)
+        self.assertEqual(refreshed.updated_at, post.updated_at)
+        self.assertIsNotNone(refreshed.counters_updated_at)
+        self.assertEqual(sorted(ImageBlob.objects.get().renditions), ["96"])
+
+    @skipUnless(is_imaging_available(), "Pillow is not installed")
+    @override_settings(IMAGE_RENDITIONS_ASYNC=False, IMAGE_RENDITION_WIDTHS=(96, 480, 1080))
+    def test_upload_renders_narrower_renditions_after_commit(self):
+        from PIL import Image
+
+        source = BytesIO()
+        Image.new("RGB", (600, 300), "red").save(source, format="PNG")
+        image = SimpleUploadedFile("wide.png", source.getvalue(), content_type="image/png")
+        self.client.force_authenticate(user=self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("image-upload"), {"file": image}, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        blob = ImageBlob.objects.get()
+        self.assertEqual(sorted(blob.renditions), ["480", "96"])
+        self.assertEqual(blob.renditions["480"]["height"], 240)
+        self.assertTrue(default_storage.exists(blob.renditions["96"]["path"]))
+
+    @skipUnless(is_imaging_available(), "Pillow is not installed")
+    @override_settings(IMAGE_RENDITION_WIDTHS=(96,))
+    def test_rendition_workers_read_the_blob_from_its_path(self):
+        from PIL import Image
+
+        source = BytesIO()
+        Image.new("RGB", (200, 100), "blue").save(source, format="PNG")
+        path = default_storage.save("uploads/cc/pool-source.png", ContentFile(source.getvalue()))
+        blob = ImageBlob.objects.create(digest="c" * 64, path=path, size=len(source.getvalue()))
+
+        arguments = get_render_arguments(blob)
+        self.assertEqual(arguments[0], default_storage.path(path))
+        self.assertFalse(any(isinstance(argument, bytes) for argument in arguments))
+
+        result = get_rendition_executor().submit(render_image_renditions, *arguments).result(timeout=60)
+        self.assertEqual((result["width"], result["height"]), (200, 100))
+        self.assertEqual([rendition["width"] for rendition in result["renditions"]], [96])
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    UPLOAD_SESSION_DIR=UPLOAD_SESSION_DIR,
+    ALLOWED_HOSTS=["testserver", "example.com"],
+)
+class UploadSessionTests(APITestCase):
+    def setUp(self):
+        self.addCleanup(shutil.rmtree, MEDIA_ROOT, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, UPLOAD_SESSION_DIR, ignore_errors=True)
+
+        self.user = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            password="strong-pass-123",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.content = make_png(320, 200) + b"\x00" * 100
+
+    def create_session(self, size=None):
+        response = self.client.post(
+            reverse("upload-session-create"),
+            {"filename": "photo.png", "content_type": "image/png", "size": size or len(self.content)},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data["id"]
+
+    def put_range(self, session_id, start, end):
+        return self.client.put(
+            reverse("upload-session-detail", kwargs={"session_id": session_id}),
+            self.content[start:end + 1],
+            content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=f"bytes {start}-{end}/{len(self.content)}",
+        )
+
+    def test_upload_resumes_from_offset_and_finalizes_to_a_blob(self):
+        session_id = self.create_session()
+        detail_url = reverse("upload-session-detail", kwargs={"session_id": session_id})
+
+        response = self.put_range(session_id, 0, 49)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["offset"], 50)
+
+        # A retried or skipped range is refused with the offset to resume from.
+        response = self.put_range(session_id, 80, 99)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["offset"], 50)
+        self.assertEqual(self.client.get(detail_url).data["offset"], 50)
+
+        finalize_url = reverse("upload-session-finalize", kwargs={"session_id": session_id})
+        response = self.client.post(finalize_url, HTTP_HOST="example.com")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.put_range(session_id, 50, len(self.content) - 1)
+        self.assertEqual(response.data["offset"], len(self.content))
+
+        response = self.client.post(finalize_url, HTTP_HOST="example.com")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn("/media/uploads/", response.data["url"])
+        blob = ImageBlob.objects.get()
+        self.assertEqual((blob.size, blob.width, blob.height), (len(self.content), 320, 200))
+        self.assertEqual(os.listdir(UPLOAD_SESSION_DIR), [])
+
+        repeated = self.client.post(finalize_url, HTTP_HOST="example.com")
+        self.assertEqual(repeated.data["url"], response.data["url"])
+
+    def test_body_shorter_than_range_does_not_move_the_offset(self):
+        session_id = self.create_session()
+
+        response = self.client.put(
+            reverse("upload-session-detail", kwargs={"session_id": session_id}),
+            self.content[:10],
+            content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=f"bytes 0-49/{len(self.content)}",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(UploadSession.objects.get().received_bytes, 0)
+
+    def test_stale_requests_recheck_the_session_under_the_file_lock(self):
+        session_id = self.create_session()
+        stale = UploadSession.objects.get(pk=session_id)
+        self.put_range(session_id, 0, 49)
+
+        # A racing chunk for the same range must neither move the offset nor
+        # overwrite the bytes that were already accepted.
+        with self.assertRaises(UploadOffsetConflict) as conflict:
+            append_session_chunk(stale, BytesIO(b"\xff" * 50), 0, 49)
+        self.assertEqual(conflict.exception.offset, 50)
+        with open(get_session_file_path(stale), "rb") as part_file:
+            self.assertEqual(part_file.read(), self.content[:50])
+
+        self.put_range(session_id, 50, len(self.content) - 1)
+        stale = UploadSession.objects.get(pk=session_id)
+        finalize_url = reverse("upload-session-finalize", kwargs={"session_id": session_id})
+        url = self.client.post(finalize_url, HTTP_HOST="example.com").data["url"]
+
+        # A second finalize that loaded the session before the first one
+        # completed finds the partial file gone and returns the same URL.
+        request = APIRequestFactory().post(finalize_url, HTTP_HOST="example.com")
+        self.assertEqual(finalize_upload_session(request, stale), url)
+        self.assertEqual(ImageBlob.objects.count(), 1)
+
+    def test_sessions_are_private_and_expired_ones_are_pruned(self):
+        session_id = self.create_session()
+        other = User.objects.create_user(username="bob", email="bob@example.com", password="strong-pass-123")
+        self.client.force_authenticate(user=other)
+        response = self.client.get(reverse("upload-session-detail", kwargs={"session_id": session_id}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        UploadSession.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+        out = StringIO()
+        call_command("prune_upload_sessions", stdout=out)
+
+        self.assertIn("Deleted 1 expired upload sessions.", out.getvalue())
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(os.listdir(UPLOAD_SESSION_DIR), [])
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, MEDIA_X_ACCEL_REDIRECT_PREFIX="", MEDIA_X_SENDFILE=False)
+class MediaServingTests(APITestCase):
+    def setUp(self):
+        self.addCleanup(shutil.rmtree, MEDIA_ROOT, ignore_errors=True)
+        self.content = bytes(range(100))
+        self.digest = "c" * 64
+        self.blob_path = default_storage.save(f"uploads/cc/{self.digest}.png", ContentFile(self.content))
+        self.url = f"/media/{self.blob_path}"
+
+    def get(self, url, **headers):
+        response = self.client.get(url, headers=headers)
+        self.addCleanup(response.close)
+        return response
+
+    def test_content_addressed_files_are_immutable_and_revalidate(self):
+        response = self.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["Content-Length"], "100")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["ETag"], f'"{self.digest}"')
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+
+        self.assertEqual(self.get(self.url, if_none_match=f'W/"{self.digest}"').status_code, 304)
+        self.assertEqual(self.get(self.url, if_modified_since=response["Last-Modified"]).status_code, 304)
+        self.assertEqual(self.get(self.url, if_none_match='"other"').status_code, status.HTTP_200_OK)
+
+    def test_range_requests_return_partial_content(self):
+        response = self.get(self.url, range="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 10-19/100")
+        self.assertEqual(response["Content-Length"], "10")
+        self.assertEqual(b"".join(response.streaming_content), self.content[10:20])
+
+        response = self.get(self.url, range="bytes=-5")
+        self.assertEqual(b"".join(response.streaming_content), self.content[95:])
+
+        response = self.get(self.url, range="bytes=200-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */100")
+
+        response = self.get(self.url, range="bytes=10-19", if_range='"stale"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+
+    def test_range_is_not_overrun_by_a_sendfile_file_wrapper(self):
+        def run(**environ):
+            setup_testing_defaults(environ)
+            environ.update(PATH_INFO=self.url, HTTP_HOST="testserver", **{"wsgi.file_wrapper": sendfile_wrapper})
+            statuses = []
+            body = WSGIHandler()(environ, lambda status, headers: statuses.append(status))
+            try:
+                return statuses[0], b"".join(body)
+            finally:
+                body.close()
+
+        self.assertEqual(run(HTTP_RANGE="bytes=10-19"), ("206 Partial Content", self.content[10:20]))
+        self.assertEqual(run(), ("200 OK", self.content))
+
+    def test_other_files_get_short_caching_and_paths_stay_inside_media_root(self):
+        path = default_storage.save("uploads/legacy.jpg", ContentFile(b"legacy"))
+
+        response = self.get(f"/media/{path}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Cache-Control"], "public, max-age=3600")
+
+        self.assertEqual(self.get("/media/../manage.py").status_code, 404)
+        self.assertEqual(self.get("/media/uploads/missing.png").status_code, 404)
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+
+    @override_settings(MEDIA_X_ACCEL_REDIRECT_PREFIX="/protected-media/")
+    def test_transfer_is_offloaded_to_the_proxy_when_configured(self):
+        response = self.get(self.url, range="bytes=0-9")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{self.blob_path}")
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], f'"{self.digest}"')
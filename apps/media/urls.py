@@ -0,0 +1,13 @@
+from django.urls import path
+
+from .views import UploadSessionCreateAPIView, UploadSessionDetailAPIView, UploadSessionFinalizeAPIView
+
+urlpatterns = [
+    path("uploads/sessions/", UploadSessionCreateAPIView.as_view(), name="upload-session-create"),
+    path("uploads/sessions/<uuid:session_id>/", UploadSessionDetailAPIView.as_view(), name="upload-session-detail"),
+    path(
+        "uploads/sessions/<uuid:session_id>/finalize/",
+        UploadSessionFinalizeAPIView.as_view(),
+        name="upload-session-finalize",
+    ),
+]
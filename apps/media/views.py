@@ -0,0 +1,148 @@
+from io import BytesIO
+
+from django.views.decorators.http import require_safe
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema, extend_schema_view
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.users.serializers import ImageUploadResponseSerializer
+from .serializers import UploadSessionCreateSerializer, UploadSessionOffsetSerializer, UploadSessionSerializer
+from .serving import build_media_response
+from .sessions import (
+    UploadOffsetConflict,
+    append_session_chunk,
+    create_upload_session,
+    delete_upload_session,
+    finalize_upload_session,
+    get_owned_session,
+    parse_content_range,
+)
+
+
+SESSION_ID_PARAMETER = OpenApiParameter("session_id", str, OpenApiParameter.PATH, description="Upload session id")
+
+
+@extend_schema_view(
+    post=extend_schema(
+        summary="Start a resumable image upload",
+        description=(
+            "Creates an upload session for a file of `size` bytes. Send the bytes with `PUT` in one or more "
+            "ranges, then call finalize."
+        ),
+        tags=["Uploads"],
+        request=UploadSessionCreateSerializer,
+        responses={
+            201: UploadSessionSerializer,
+            400: OpenApiResponse(description="Validation error"),
+            401: OpenApiResponse(description="Authentication required"),
+        },
+    )
+)
+class UploadSessionCreateAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = UploadSessionCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = create_upload_session(request.user, **serializer.validated_data)
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="Get an upload session",
+        description="Returns the session, including `offset`: the number of bytes received so far.",
+        tags=["Uploads"],
+        parameters=[SESSION_ID_PARAMETER],
+        responses={
+            200: UploadSessionSerializer,
+            401: OpenApiResponse(description="Authentication required"),
+            404: OpenApiResponse(description="Upload session not found or expired"),
+        },
+    ),
+    put=extend_schema(
+        summary="Upload a byte range",
+        description=(
+            "Appends the raw request body at the range given by `Content-Range: bytes <start>-<end>/<size>`. "
+            "`start` must equal the current offset; otherwise 409 is returned with the offset to resume from."
+        ),
+        tags=["Uploads"],
+        parameters=[
+            SESSION_ID_PARAMETER,
+            OpenApiParameter("Content-Range", str, OpenApiParameter.HEADER, required=True),
+        ],
+        request={"application/octet-stream": bytes},
+        responses={
+            200: UploadSessionOffsetSerializer,
+            400: OpenApiResponse(description="Invalid range or body"),
+            401: OpenApiResponse(description="Authentication required"),
+            404: OpenApiResponse(description="Upload session not found or expired"),
+            409: UploadSessionOffsetSerializer,
+        },
+    ),
+    delete=extend_schema(
+        summary="Cancel an upload session",
+        tags=["Uploads"],
+        parameters=[SESSION_ID_PARAMETER],
+        responses={
+            204: OpenApiResponse(description="Upload session deleted"),
+            401: OpenApiResponse(description="Authentication required"),
+            404: OpenApiResponse(description="Upload session not found or expired"),
+        },
+    ),
+)
+class UploadSessionDetailAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, session_id):
+        session = get_owned_session(request.user, session_id)
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_200_OK)
+
+    def put(self, request, session_id):
+        session = get_owned_session(request.user, session_id)
+        start, end = parse_content_range(request.headers.get("Content-Range"), session.size)
+        try:
+            # The raw stream is read directly; request.data is never parsed.
+            append_session_chunk(session, request.stream or BytesIO(), start, end)
+        except UploadOffsetConflict as exc:
+            return Response({"offset": exc.offset, "size": session.size}, status=status.HTTP_409_CONFLICT)
+        return Response({"offset": session.received_bytes, "size": session.size}, status=status.HTTP_200_OK)
+
+    def delete(self, request, session_id):
+        delete_upload_session(get_owned_session(request.user, session_id))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@extend_schema_view(
+    post=extend_schema(
+        summary="Finalize a resumable image upload",
+        description=(
+            "Validates the assembled file with the same rules as `POST /api/uploads/image/` and stores it. "
+            "Calling it again returns the same URL."
+        ),
+        tags=["Uploads"],
+        request=None,
+        parameters=[SESSION_ID_PARAMETER],
+        responses={
+            201: ImageUploadResponseSerializer,
+            400: OpenApiResponse(description="Upload incomplete or invalid image"),
+            401: OpenApiResponse(description="Authentication required"),
+            404: OpenApiResponse(description="Upload session not found or expired"),
+        },
+    )
+)
+class UploadSessionFinalizeAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, session_id):
+        session = get_owned_session(request.user, session_id)
+        return Response({"url": finalize_upload_session(request, session)}, status=status.HTTP_201_CREATED)
+
+
+@require_safe
+def serve_media(request, path):
+    """Serves uploaded files with range and conditional request support."""
+
+    return build_media_response(request, path)
@@ -0,0 +1,26 @@
+from django.contrib import admin
+
+from .models import EmailOutbox, FanOutJob, Notification
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+	list_display = ("id", "subject", "status", "attempts", "available_at", "sent_at", "created_at")
+	search_fields = ("subject",)
+	list_filter = ("status", "created_at")
+	readonly_fields = ("attempts", "sent_at", "last_error")
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+	list_display = ("id", "recipient", "kind", "actor", "is_read", "created_at")
+	list_filter = ("kind", "is_read", "created_at")
+	raw_id_fields = ("recipient", "actor", "post", "comment")
+
+
+@admin.register(FanOutJob)
+class FanOutJobAdmin(admin.ModelAdmin):
+	list_display = ("id", "kind", "post", "author", "cursor_created_at", "created_at")
+	list_filter = ("kind",)
+	raw_id_fields = ("author", "post")
+	readonly_fields = ("cursor_created_at", "cursor_id")
@@ -0,0 +1,145 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from apps.common.email_notifications import send_activity_email
+from .models import EmailDigestEvent, EmailDigestWindow
+
+
+DIGEST_SAMPLE_NAMES = 3
+
+
+def get_digest_window_seconds():
+    return getattr(settings, "EMAIL_DIGEST_WINDOW_SECONDS", 900)
+
+
+def queue_activity_email(recipient, kind, actor, subject, message, post=None):
+    """
+    Emails `recipient` about one like, comment or follow, at most once per window.
+
+    The first event of a kind is sent straight away and opens a window for
+    that recipient and kind; events inside the window are stored and later
+    sent together as one digest by `flush_email_digests`.
+    """
+
+    if not recipient.email:
+        return
+
+    window_seconds = get_digest_window_seconds()
+    if window_seconds <= 0:
+        send_activity_email(subject=subject, message=message, recipient_list=[recipient.email])
+        return
+
+    now = timezone.now()
+    if EmailDigestWindow.objects.filter(recipient=recipient, kind=kind, ends_at__gt=now).exists():
+        EmailDigestEvent.objects.create(recipient=recipient, kind=kind, actor=actor, post=post)
+        return
+
+    send_activity_email(subject=subject, message=message, recipient_list=[recipient.email])
+    EmailDigestWindow.objects.update_or_create(
+        recipient=recipient,
+        kind=kind,
+        defaults={"ends_at": now + timedelta(seconds=window_seconds)},
+    )
+
+
+def get_display_name(display_name, username):
+    if display_name:
+        return display_name
+    return username
+
+
+def join_names(names, total):
+    if total > len(names):
+        others = total - len(names)
+        return f"{', '.join(names)} and {others} {'other' if others == 1 else 'others'}"
+    if len(names) > 1:
+        return f"{', '.join(names[:-1])} and {names[-1]}"
+    return names[0]
+
+
+def get_actor_names(events, post_id=None):
+    if post_id is not None:
+        events = events.filter(post_id=post_id)
+    rows = (
+        events.values("actor_id", "actor__display_name", "actor__username")
+        .annotate(last_event_id=Max("id"))
+        .order_by("-last_event_id")[:DIGEST_SAMPLE_NAMES]
+    )
+    names = []
+    for row in rows:
+        names.append(get_display_name(row["actor__display_name"], row["actor__username"]))
+    return names
+
+
+def render_digest(kind, events):
+    if kind == EmailDigestWindow.KIND_FOLLOW:
+        total = events.aggregate(actors=Count("actor", distinct=True))["actors"]
+        names = join_names(get_actor_names(events), total)
+        if total == 1:
+            return f"{names} started following you", f"{names} followed you."
+        return f"{total} people started following you", f"{names} followed you."
+
+    posts = list(
+        events.values("post_id", "post__name")
+        .annotate(event_count=Count("id"), actor_count=Count("actor", distinct=True))
+        .order_by("-event_count", "post_id")
+    )
+    noun = "like" if kind == EmailDigestWindow.KIND_LIKE else "comment"
+    verb = "liked" if kind == EmailDigestWindow.KIND_LIKE else "commented on"
+
+    if len(posts) == 1:
+        post = posts[0]
+        names = join_names(get_actor_names(events, post["post_id"]), post["actor_count"])
+        message = f'{names} {verb} your post "{post["post__name"]}".'
+        if post["event_count"] == 1 or (kind == EmailDigestWindow.KIND_LIKE and post["actor_count"] == 1):
+            return f"{names} {verb} your post", message
+        if kind == EmailDigestWindow.KIND_LIKE:
+            return f'{post["actor_count"]} people liked your post', message
+        return f'{post["event_count"]} new comments on your post', message
+
+    total = 0
+    lines = []
+    for post in posts:
+        total += post["event_count"]
+        count_text = f'{post["event_count"]} {noun}{"" if post["event_count"] == 1 else "s"}'
+        lines.append(f'- "{post["post__name"]}": {count_text}')
+    subject = f"{total} new {noun}s on {len(posts)} of your posts"
+    return subject, "\n".join(lines)
+
+
+def flush_email_digests(now=None, batch_size=500):
+    """Sends one digest per recipient and kind whose window has ended."""
+
+    if now is None:
+        now = timezone.now()
+    window_seconds = get_digest_window_seconds()
+
+    windows = list(
+        EmailDigestWindow.objects.select_related("recipient").filter(ends_at__lte=now).order_by("ends_at")[:batch_size]
+    )
+    sent = 0
+    for window in windows:
+        with transaction.atomic():
+            events = EmailDigestEvent.objects.filter(recipient_id=window.recipient_id, kind=window.kind)
+            last_event_id = events.aggregate(last_id=Max("id"))["last_id"]
+            if last_event_id is None:
+                # Nothing arrived during the window; the next event is sent
+                # immediately again.
+                window.delete()
+                continue
+
+            events = events.filter(id__lte=last_event_id)
+            subject, message = render_digest(window.kind, events)
+            send_activity_email(subject=subject, message=message, recipient_list=[window.recipient.email])
+            events.delete()
+
+            # Keep the window open after a digest so the recipient gets at
+            # most one email of this kind per window.
+            window.ends_at = now + timedelta(seconds=max(window_seconds, 0))
+            window.save(update_fields=["ends_at"])
+            sent += 1
+    return sent
@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from apps.users.models import Follow
+from .inbox import create_notifications, get_notification_chunk_size
+from .models import FanOutJob, Notification
+from .outbox import enqueue_email
+
+
+def get_new_post_email_chunk_size():
+    return max(getattr(settings, "NEW_POST_EMAIL_CHUNK_SIZE", 500), 1)
+
+
+def get_fan_out_chunk_size(job):
+    if job.kind == FanOutJob.KIND_EMAIL:
+        return get_new_post_email_chunk_size()
+    return get_notification_chunk_size()
+
+
+def get_next_followers(job, chunk_size):
+    # Only those already following when the post was published.
+    follows = Follow.objects.filter(following_id=job.author_id, created_at__lte=job.created_at)
+    if job.cursor_created_at is not None:
+        follows = follows.filter(
+            Q(created_at__lt=job.cursor_created_at) | Q(created_at=job.cursor_created_at, id__lt=job.cursor_id)
+        )
+    rows = follows.order_by("-created_at", "-id").values_list("id", "created_at", "follower_id", "follower__email")
+    return list(rows[:chunk_size])
+
+
+def expand_fan_out_job(job):
+    """Writes the rows for the job's next chunk of followers and moves its cursor past them."""
+
+    chunk_size = get_fan_out_chunk_size(job)
+    rows = get_next_followers(job, chunk_size)
+    if job.kind == FanOutJob.KIND_EMAIL:
+        # Always through the outbox, whatever EMAIL_USE_OUTBOX says: the rows
+        # commit with the cursor, so a failed send is retried, not skipped.
+        recipients = [email for _, _, _, email in rows if email]
+        if recipients:
+            enqueue_email(job.subject, job.message, recipients, job.delivery)
+    else:
+        create_notifications(
+            [follower_id for _, _, follower_id, _ in rows],
+            Notification.KIND_POST,
+            actor_id=job.author_id,
+            post_id=job.post_id,
+            chunk_size=chunk_size,
+        )
+
+    if len(rows) < chunk_size:
+        job.delete()
+    else:
+        job.cursor_id, job.cursor_created_at = rows[-1][0], rows[-1][1]
+        job.save(update_fields=["cursor_id", "cursor_created_at"])
+    return len(rows)
+
+
+def process_fan_out_jobs(max_chunks=10):
+    """
+    Expands queued fan-out jobs one chunk per transaction and returns the
+    number of chunks written.
+
+    The job row stays locked while its chunk is written, and the chunk
+    commits together with the new cursor, so each follower is covered once
+    even with several workers or a crash midway.
+    """
+
+    chunks = 0
+    while chunks < max_chunks:
+        with transaction.atomic():
+            job = FanOutJob.objects.select_for_update(skip_locked=True).order_by("id").first()
+            if job is None:
+                return chunks
+            expand_fan_out_job(job)
+        chunks += 1
+    return chunks
@@ -0,0 +1,123 @@
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F
+from django.utils import timezone
+
+from apps.common.counters import adjust_counter, adjust_counters
+from .models import Notification
+
+
+User = get_user_model()
+
+UNREAD_COUNTER_FIELD = "unread_notification_count"
+
+
+def get_notification_chunk_size():
+    return max(getattr(settings, "NOTIFICATION_FANOUT_CHUNK_SIZE", 1000), 1)
+
+
+def get_notification_retention_days():
+    return getattr(settings, "NOTIFICATION_RETENTION_DAYS", 30)
+
+
+def create_notification(recipient_id, kind, actor_id, post_id=None, comment_id=None):
+    notification = Notification.objects.create(
+        recipient_id=recipient_id,
+        kind=kind,
+        actor_id=actor_id,
+        post_id=post_id,
+        comment_id=comment_id,
+    )
+    adjust_counter(User, recipient_id, UNREAD_COUNTER_FIELD, 1)
+    return notification
+
+
+def create_notifications(recipient_ids, kind, actor_id, post_id=None, chunk_size=None):
+    """
+    Writes the same notification for a stream of recipients, one chunk at a time.
+
+    Each chunk costs one multi-row INSERT and one UPDATE of the unread
+    counters, whatever the number of recipients in it.
+    """
+
+    if chunk_size is None:
+        chunk_size = get_notification_chunk_size()
+
+    recipient_ids = iter(recipient_ids)
+    total = 0
+    while True:
+        chunk = list(islice(recipient_ids, chunk_size))
+        if not chunk:
+            return total
+
+        notifications = []
+        for recipient_id in chunk:
+            notifications.append(
+                Notification(recipient_id=recipient_id, kind=kind, actor_id=actor_id, post_id=post_id)
+            )
+        Notification.objects.bulk_create(notifications)
+        User.objects.filter(pk__in=chunk).update(
+            **{UNREAD_COUNTER_FIELD: F(UNREAD_COUNTER_FIELD) + 1}
+        )
+        total += len(chunk)
+
+
+def mark_notifications_read(user_id, up_to_id, from_id=None):
+    notifications = Notification.objects.filter(recipient_id=user_id, is_read=False, id__lte=up_to_id)
+    if from_id is not None:
+        notifications = notifications.filter(id__gte=from_id)
+
+    marked = notifications.update(is_read=True)
+    adjust_counter(User, user_id, UNREAD_COUNTER_FIELD, -marked)
+    return marked
+
+
+def release_unread_notifications(notifications):
+    """
+    Takes the unread ones among `notifications`, which are about to be
+    deleted, off their recipients' unread counters.
+
+    It costs one grouped query and one UPDATE however many rows go, so the
+    deletion itself can stay a bulk cascade.
+    """
+
+    rows = notifications.filter(is_read=False).order_by().values("recipient_id").annotate(unread=Count("id"))
+    return adjust_counters(User, {row["recipient_id"]: -row["unread"] for row in rows}, UNREAD_COUNTER_FIELD)
+
+
+def get_unread_notification_count(user_id):
+    return User.objects.filter(pk=user_id).values_list(UNREAD_COUNTER_FIELD, flat=True).first() or 0
+
+
+def prune_read_notifications(retention_days=None, batch_size=1000, now=None):
+    """
+    Deletes read notifications older than the retention period in id batches.
+
+    Ids grow with `created_at`, so the cutoff is turned into an id once and
+    each batch is a primary key range scan rather than a `created_at` scan.
+    """
+
+    if retention_days is None:
+        retention_days = get_notification_retention_days()
+    if now is None:
+        now = timezone.now()
+    cutoff = now - timedelta(days=retention_days)
+
+    first_kept_id = (
+        Notification.objects.filter(created_at__gte=cutoff).order_by("id").values_list("id", flat=True).first()
+    )
+    old_notifications = Notification.objects.filter(is_read=True)
+    if first_kept_id is not None:
+        old_notifications = old_notifications.filter(id__lt=first_kept_id)
+
+    deleted = 0
+    while True:
+        batch_ids = list(old_notifications.order_by("id").values_list("id", flat=True)[:batch_size])
+        if not batch_ids:
+            return deleted
+        batch_deleted, _ = Notification.objects.filter(id__in=batch_ids).delete()
+        deleted += batch_deleted
+        old_notifications = old_notifications.filter(id__gt=batch_ids[-1])
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.notifications.inbox import get_notification_retention_days, prune_read_notifications
+
+
+class Command(BaseCommand):
+    help = "Deletes read notifications older than the retention period, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        days = options["days"]
+        if days is None:
+            days = get_notification_retention_days()
+
+        deleted = prune_read_notifications(retention_days=days, batch_size=max(options["batch_size"], 1))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} read notifications older than {days} days."))
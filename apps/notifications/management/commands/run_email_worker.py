@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications.digests import flush_email_digests
+from apps.notifications.fanout import process_fan_out_jobs
+from apps.notifications.outbox import get_outbox_batch_size, process_email_outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends queued activity emails from the outbox, retrying failed ones with backoff, "
+        "expands new-post fan-out jobs and queues digests for windows that have ended."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--poll-interval", type=float, default=5.0)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Stop when no email is ready to send instead of polling for more.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"] or get_outbox_batch_size()
+        total_sent = 0
+        total_failed = 0
+        total_digests = 0
+        total_chunks = 0
+
+        try:
+            while True:
+                chunks = process_fan_out_jobs()
+                total_chunks += chunks
+                total_digests += flush_email_digests()
+                claimed, sent, failed = process_email_outbox(batch_size=batch_size)
+                total_sent += sent
+                total_failed += failed
+                if claimed or chunks:
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Queued {total_digests} digests. Sent {total_sent} emails, {total_failed} failed. "
+                f"Expanded {total_chunks} fan-out chunks."
+            )
+        )
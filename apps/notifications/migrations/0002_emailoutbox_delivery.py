@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailoutbox',
+            name='delivery',
+            field=models.CharField(choices=[('single', 'One message to all recipients'), ('bcc', 'One message, recipients in Bcc'), ('personalized', 'One message per recipient')], default='single', max_length=12),
+        ),
+    ]
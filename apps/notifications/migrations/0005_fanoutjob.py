@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-17 16:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification'),
+        ('posts', '0012_post_image_path'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FanOutJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('email', 'Email'), ('notification', 'Notification')], max_length=12)),
+                ('subject', models.CharField(blank=True, max_length=255)),
+                ('message', models.TextField(blank=True)),
+                ('delivery', models.CharField(choices=[('single', 'One message to all recipients'), ('bcc', 'One message, recipients in Bcc'), ('personalized', 'One message per recipient')], default='single', max_length=12)),
+                ('cursor_created_at', models.DateTimeField(blank=True, null=True)),
+                ('cursor_id', models.PositiveBigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.post')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,161 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+from apps.common.email_messages import DELIVERY_CHOICES, DELIVERY_SINGLE
+
+
+class EmailOutbox(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENDING, "Sending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    delivery = models.CharField(max_length=12, choices=DELIVERY_CHOICES, default=DELIVERY_SINGLE)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # Earliest time the row may be claimed: creation time, the next retry,
+    # or the end of the current worker's lease while it is being sent.
+    available_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.recipients)} ({self.status})"
+
+
+class EmailDigestWindow(models.Model):
+    KIND_LIKE = "like"
+    KIND_COMMENT = "comment"
+    KIND_FOLLOW = "follow"
+    KIND_CHOICES = [
+        (KIND_LIKE, "Like"),
+        (KIND_COMMENT, "Comment"),
+        (KIND_FOLLOW, "Follow"),
+    ]
+
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Until this time, events of this kind for the recipient are buffered
+    # instead of emailed.
+    ends_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["recipient", "kind"], name="unique_email_digest_window")
+        ]
+        indexes = [
+            models.Index(fields=["ends_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} digest for {self.recipient_id} until {self.ends_at}"
+
+
+class EmailDigestEvent(models.Model):
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    kind = models.CharField(max_length=10, choices=EmailDigestWindow.KIND_CHOICES)
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    post = models.ForeignKey("posts.Post", on_delete=models.CASCADE, related_name="+", blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["recipient", "kind", "id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} by {self.actor_id} for {self.recipient_id}"
+
+
+class Notification(models.Model):
+    KIND_POST = "post"
+    KIND_LIKE = "like"
+    KIND_COMMENT = "comment"
+    KIND_FOLLOW = "follow"
+    KIND_CHOICES = [
+        (KIND_POST, "New post"),
+        (KIND_LIKE, "Like"),
+        (KIND_COMMENT, "Comment"),
+        (KIND_FOLLOW, "Follow"),
+    ]
+
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="notifications",
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    post = models.ForeignKey("posts.Post", on_delete=models.CASCADE, related_name="+", blank=True, null=True)
+    comment = models.ForeignKey(
+        "posts.Comment",
+        on_delete=models.CASCADE,
+        related_name="+",
+        blank=True,
+        null=True,
+    )
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-id"]
+        indexes = [
+            models.Index(fields=["recipient", "-id"]),
+            models.Index(fields=["recipient", "is_read", "-id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} by {self.actor_id} for {self.recipient_id}"
+
+
+class FanOutJob(models.Model):
+    """
+    A new post that still has to reach the author's followers.
+
+    The row is written in the post's transaction; `run_email_worker` expands
+    it into per-follower emails or notifications one chunk at a time.
+    """
+
+    KIND_EMAIL = "email"
+    KIND_NOTIFICATION = "notification"
+    KIND_CHOICES = [
+        (KIND_EMAIL, "Email"),
+        (KIND_NOTIFICATION, "Notification"),
+    ]
+
+    kind = models.CharField(max_length=12, choices=KIND_CHOICES)
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    post = models.ForeignKey("posts.Post", on_delete=models.CASCADE, related_name="+")
+    subject = models.CharField(max_length=255, blank=True)
+    message = models.TextField(blank=True)
+    delivery = models.CharField(max_length=12, choices=DELIVERY_CHOICES, default=DELIVERY_SINGLE)
+    # Keyset position of the last expanded follow, in the
+    # (`following`, -`created_at`, -`id`) index order.
+    cursor_created_at = models.DateTimeField(blank=True, null=True)
+    cursor_id = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.kind} fan-out of post {self.post_id}"
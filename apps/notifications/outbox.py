@@ -0,0 +1,159 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from apps.common.email_messages import DELIVERY_PERSONALIZED, DELIVERY_SINGLE, build_email_messages
+from .models import EmailOutbox
+
+
+def get_outbox_batch_size():
+    return max(getattr(settings, "EMAIL_OUTBOX_BATCH_SIZE", 100), 1)
+
+
+def get_outbox_max_attempts():
+    return max(getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 5), 1)
+
+
+def get_outbox_lease_seconds():
+    return getattr(settings, "EMAIL_OUTBOX_LEASE_SECONDS", 300)
+
+
+def get_retry_delay(attempts):
+    base_delay = getattr(settings, "EMAIL_OUTBOX_RETRY_BASE_SECONDS", 60)
+    max_delay = getattr(settings, "EMAIL_OUTBOX_RETRY_MAX_SECONDS", 3600)
+    return timedelta(seconds=min(base_delay * 2 ** max(attempts - 1, 0), max_delay))
+
+
+def enqueue_email(subject, message, recipients, delivery=DELIVERY_SINGLE):
+    """
+    Stores an email for the worker to send and returns the number of rows.
+
+    Called from signal handlers, so the row is written in the same
+    transaction as the change that triggered it and is rolled back with it.
+    Personalized emails get one row per recipient, inserted in one query, so
+    a rejected address only retries its own message.
+    """
+
+    if delivery == DELIVERY_PERSONALIZED:
+        entries = []
+        for recipient in recipients:
+            entries.append(
+                EmailOutbox(
+                    subject=subject[:255],
+                    message=message,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    recipients=[recipient],
+                )
+            )
+        EmailOutbox.objects.bulk_create(entries)
+        return len(entries)
+
+    EmailOutbox.objects.create(
+        subject=subject[:255],
+        message=message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipients),
+        delivery=delivery,
+    )
+    return 1
+
+
+def claim_email_batch(batch_size=None, now=None):
+    if batch_size is None:
+        batch_size = get_outbox_batch_size()
+    if now is None:
+        now = timezone.now()
+
+    # Rows left in `sending` by a worker that died are claimable again once
+    # their lease runs out.
+    with transaction.atomic():
+        entries = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(
+                status__in=[EmailOutbox.STATUS_PENDING, EmailOutbox.STATUS_SENDING],
+                available_at__lte=now,
+            )
+            .order_by("available_at", "id")[:batch_size]
+        )
+        if entries:
+            lease_until = now + timedelta(seconds=get_outbox_lease_seconds())
+            EmailOutbox.objects.filter(id__in=[entry.id for entry in entries]).update(
+                status=EmailOutbox.STATUS_SENDING,
+                available_at=lease_until,
+            )
+    return entries
+
+
+def deliver_email_batch(entries, connection=None):
+    if not entries:
+        return 0, 0
+
+    if connection is None:
+        connection = get_connection(fail_silently=False)
+
+    now = timezone.now()
+    max_attempts = get_outbox_max_attempts()
+    sent_ids = []
+    failures = []
+
+    try:
+        connection.open()
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        for entry in entries:
+            failures.append((entry, error))
+    else:
+        # One connection for the whole batch; messages are still sent one at
+        # a time so a rejected recipient only fails its own row.
+        try:
+            for entry in entries:
+                try:
+                    connection.send_messages(
+                        build_email_messages(
+                            entry.subject,
+                            entry.message,
+                            entry.from_email,
+                            entry.recipients,
+                            entry.delivery,
+                            connection=connection,
+                        )
+                    )
+                except Exception as exc:
+                    failures.append((entry, f"{type(exc).__name__}: {exc}"))
+                else:
+                    sent_ids.append(entry.id)
+        finally:
+            connection.close()
+
+    if sent_ids:
+        EmailOutbox.objects.filter(id__in=sent_ids).update(
+            status=EmailOutbox.STATUS_SENT,
+            sent_at=now,
+            last_error="",
+        )
+
+    for entry, error in failures:
+        attempts = entry.attempts + 1
+        if attempts >= max_attempts:
+            status = EmailOutbox.STATUS_FAILED
+            available_at = now
+        else:
+            status = EmailOutbox.STATUS_PENDING
+            available_at = now + get_retry_delay(attempts)
+        EmailOutbox.objects.filter(id=entry.id).update(
+            status=status,
+            attempts=attempts,
+            available_at=available_at,
+            last_error=error,
+        )
+
+    return len(sent_ids), len(failures)
+
+
+def process_email_outbox(batch_size=None, connection=None):
+    entries = claim_email_batch(batch_size)
+    sent, failed = deliver_email_batch(entries, connection=connection)
+    return len(entries), sent, failed
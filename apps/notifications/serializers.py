@@ -0,0 +1,36 @@
+from rest_framework import serializers
+
+from apps.media.serializers import ImageSrcsetListSerializer
+from apps.users.serializers import UserPublicSerializer
+from .models import Notification
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    actor = UserPublicSerializer(read_only=True)
+
+    srcset_source_fields = ("actor.profile_pic",)
+
+    class Meta:
+        model = Notification
+        fields = ["id", "kind", "actor", "post", "comment", "is_read", "created_at"]
+        list_serializer_class = ImageSrcsetListSerializer
+
+
+class NotificationMarkReadSerializer(serializers.Serializer):
+    up_to_id = serializers.IntegerField(min_value=1)
+    from_id = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        from_id = attrs.get("from_id")
+        if from_id is not None and from_id > attrs["up_to_id"]:
+            raise serializers.ValidationError({"from_id": "Must not be greater than up_to_id."})
+        return attrs
+
+
+class NotificationMarkReadResponseSerializer(serializers.Serializer):
+    marked = serializers.IntegerField()
+    unread_count = serializers.IntegerField()
+
+
+class NotificationUnreadCountSerializer(serializers.Serializer):
+    unread_count = serializers.IntegerField()
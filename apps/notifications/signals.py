@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Q, QuerySet
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from apps.posts.models import Comment, Post
+from .inbox import release_unread_notifications
+from .models import Notification
+
+
+User = get_user_model()
+
+
+# Notifications have no delete signals of their own, so the cascades below and
+# `prune_read_notifications` stay bulk deletes. Unread counters are settled
+# from the deleted parents instead, before the cascade runs.
+
+
+def is_cascaded_from(origin, *models):
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(origin_model, models)
+
+
+def get_deleted_parents(instance, origin):
+    """
+    Returns the parents to settle notifications for: the instance, or the
+    whole queryset on the first signal of a queryset delete. Returns None
+    once that queryset has been settled.
+    """
+
+    if not isinstance(origin, QuerySet) or origin.model is not type(instance):
+        return [instance]
+    if getattr(origin, "_notifications_released", False):
+        return None
+    origin._notifications_released = True
+    return origin
+
+
+@receiver(pre_delete, sender=User)
+def release_notifications_of_deleted_users(sender, instance, origin=None, **kwargs):
+    users = get_deleted_parents(instance, origin)
+    if users is None:
+        return
+    # The users' own notifications go with their rows and counters.
+    notifications = Notification.objects.filter(
+        Q(actor__in=users)
+        | Q(post__author__in=users)
+        | Q(comment__author__in=users)
+        | Q(comment__post__author__in=users)
+    ).exclude(recipient__in=users)
+    release_unread_notifications(notifications)
+
+
+@receiver(pre_delete, sender=Post)
+def release_notifications_of_deleted_posts(sender, instance, origin=None, **kwargs):
+    if is_cascaded_from(origin, User):
+        return
+    posts = get_deleted_parents(instance, origin)
+    if posts is not None:
+        release_unread_notifications(Notification.objects.filter(Q(post__in=posts) | Q(comment__post__in=posts)))
+
+
+@receiver(pre_delete, sender=Comment)
+def release_notifications_of_deleted_comments(sender, instance, origin=None, **kwargs):
+    if is_cascaded_from(origin, User, Post):
+        return
+    comments = get_deleted_parents(instance, origin)
+    if comments is not None:
+        release_unread_notifications(Notification.objects.filter(comment__in=comments))
@@ -0,0 +1,549 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import skipIf
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models.deletion import Collector
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.common import email_executor
+from apps.common.email_executor import (
+    OVERFLOW_DROP_OLDEST,
+    OVERFLOW_SPILL,
+    EmailExecutor,
+    get_email_executor,
+    shutdown_email_executor,
+)
+from apps.common.email_notifications import send_activity_email
+from apps.posts.models import Comment, Post, PostLike
+from apps.users.models import Follow
+from .digests import flush_email_digests
+from .fanout import process_fan_out_jobs
+from .inbox import create_notifications, prune_read_notifications
+from .models import EmailDigestEvent, EmailDigestWindow, EmailOutbox, FanOutJob, Notification
+from .outbox import claim_email_batch, deliver_email_batch, process_email_outbox
+
+
+User = get_user_model()
+
+
+class FailingConnection:
+    def __init__(self, failing_recipients):
+        self.failing_recipients = failing_recipients
+        self.sent = []
+        self.open_calls = 0
+
+    def open(self):
+        self.open_calls += 1
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        for message in messages:
+            if set(message.to) & self.failing_recipients:
+                raise ConnectionError("recipient refused")
+            self.sent.append(message)
+        return len(messages)
+
+
+class GatedConnection:
+    instances = 0
+
+    def __init__(self, gate, fail_silently=False):
+        GatedConnection.instances += 1
+        self.gate = gate
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        self.gate.wait(5)
+        mail.outbox.extend(messages)
+        return len(messages)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    DEFAULT_FROM_EMAIL="no-reply@test.local",
+    EMAIL_USE_OUTBOX=True,
+    EMAIL_OUTBOX_MAX_ATTEMPTS=2,
+    EMAIL_OUTBOX_RETRY_BASE_SECONDS=60,
+)
+class EmailOutboxTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username="outbox-author",
+            email="outbox-author@example.com",
+            password="strong-pass-123",
+        )
+        self.actor = User.objects.create_user(
+            username="outbox-actor",
+            email="outbox-actor@example.com",
+            password="strong-pass-123",
+        )
+        self.post = Post.objects.create(author=self.author, name="Outbox post", content="Body")
+
+    def test_like_queues_email_instead_of_sending_it(self):
+        self.client.force_authenticate(user=self.actor)
+
+        response = self.client.post(reverse("post-like-toggle", kwargs={"post_id": self.post.id}))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(mail.outbox), 0)
+        entry = EmailOutbox.objects.get()
+        self.assertEqual(entry.status, EmailOutbox.STATUS_PENDING)
+        self.assertEqual(entry.recipients, [self.author.email])
+        self.assertIn("liked your post", entry.subject)
+
+    def test_outbox_row_is_rolled_back_with_its_trigger(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                PostLike.objects.create(post=self.post, user=self.actor)
+                raise RuntimeError("abort")
+
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_worker_sends_queued_emails_over_one_connection(self):
+        self.client.force_authenticate(user=self.actor)
+        self.client.post(reverse("post-like-toggle", kwargs={"post_id": self.post.id}))
+        self.client.post(reverse("follow-toggle", kwargs={"user_id": self.author.id}))
+
+        out = StringIO()
+        call_command("run_email_worker", "--once", stdout=out)
+
+        self.assertIn("Queued 0 digests. Sent 2 emails, 0 failed.", out.getvalue())
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            EmailOutbox.objects.filter(status=EmailOutbox.STATUS_SENT, sent_at__isnull=False).count(),
+            2,
+        )
+        self.assertEqual(process_email_outbox(), (0, 0, 0))
+
+    def test_failed_delivery_is_retried_with_backoff_then_marked_failed(self):
+        self.client.force_authenticate(user=self.actor)
+        self.client.post(reverse("post-like-toggle", kwargs={"post_id": self.post.id}))
+        self.client.post(
+            reverse("post-comment-list-create", kwargs={"post_id": self.post.id}),
+            {"content": "Hello"},
+            format="json",
+        )
+        EmailOutbox.objects.filter(subject__contains="commented").update(recipients=["bounce@example.com"])
+
+        connection = FailingConnection({"bounce@example.com"})
+        self.assertEqual(process_email_outbox(connection=connection), (2, 1, 1))
+        self.assertEqual(connection.open_calls, 1)
+        self.assertEqual(len(connection.sent), 1)
+
+        failed = EmailOutbox.objects.get(recipients=["bounce@example.com"])
+        self.assertEqual(failed.status, EmailOutbox.STATUS_PENDING)
+        self.assertEqual(failed.attempts, 1)
+        self.assertIn("recipient refused", failed.last_error)
+        self.assertGreater(failed.available_at, timezone.now())
+        self.assertEqual(claim_email_batch(), [])
+
+        EmailOutbox.objects.filter(id=failed.id).update(available_at=timezone.now())
+        deliver_email_batch(claim_email_batch(), connection=connection)
+
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, EmailOutbox.STATUS_FAILED)
+        self.assertEqual(failed.attempts, 2)
+
+    def test_expired_lease_makes_row_claimable_again(self):
+        self.client.force_authenticate(user=self.actor)
+        self.client.post(reverse("post-like-toggle", kwargs={"post_id": self.post.id}))
+
+        self.assertEqual(len(claim_email_batch()), 1)
+        self.assertEqual(claim_email_batch(), [])
+
+        later = timezone.now() + timedelta(hours=1)
+        self.assertEqual(len(claim_email_batch(now=later)), 1)
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    DEFAULT_FROM_EMAIL="no-reply@test.local",
+)
+class EmailExecutorTests(APITestCase):
+    def setUp(self):
+        GatedConnection.instances = 0
+        self.gate = threading.Event()
+        self.addCleanup(self.gate.set)
+        self.addCleanup(shutdown_email_executor)
+
+    def make_executor(self, **kwargs):
+        executor = EmailExecutor(connection_factory=lambda **_: GatedConnection(self.gate), **kwargs)
+        self.addCleanup(executor.shutdown, 5)
+        return executor
+
+    @override_settings(EMAIL_USE_OUTBOX=False, EMAIL_SEND_ASYNC=True, EMAIL_EXECUTOR_WORKERS=2)
+    def test_async_send_uses_shared_executor_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(5):
+                send_activity_email("Hello", "Body", [f"user-{index}@example.com"])
+
+        executor = get_email_executor()
+        self.assertEqual(len(executor.workers), 2)
+        shutdown_email_executor(timeout=5)
+
+        self.assertEqual(len(mail.outbox), 5)
+        metrics = executor.get_metrics()
+        self.assertEqual(metrics["sent"], 5)
+        self.assertEqual(metrics["queue_depth"], 0)
+
+    def test_workers_reuse_one_connection_each(self):
+        self.gate.set()
+        executor = self.make_executor(max_workers=2, max_queue_size=10)
+        for index in range(8):
+            executor.submit("Hello", "Body", [f"user-{index}@example.com"])
+        executor.shutdown(5)
+
+        self.assertEqual(len(mail.outbox), 8)
+        self.assertLessEqual(GatedConnection.instances, 2)
+        self.assertGreaterEqual(executor.get_metrics()["max_latency_seconds"], 0)
+
+    def test_drop_oldest_policy_keeps_queue_bounded(self):
+        executor = self.make_executor(max_workers=1, max_queue_size=2, overflow_policy=OVERFLOW_DROP_OLDEST)
+        executor.submit("first", "Body", ["a@example.com"])
+        self.assertTrue(wait_for(lambda: executor.queue.qsize() == 0))
+        for index in range(5):
+            executor.submit(f"queued-{index}", "Body", ["a@example.com"])
+
+        metrics = executor.get_metrics()
+        self.assertEqual(metrics["queue_depth"], 2)
+        self.assertEqual(metrics["dropped"], 3)
+
+        self.gate.set()
+        executor.shutdown(5)
+        self.assertEqual([message.subject for message in mail.outbox], ["first", "queued-3", "queued-4"])
+
+    def test_spill_policy_writes_overflow_to_disk_and_replays_it(self):
+        spill_dir = tempfile.mkdtemp()
+        spill_path = os.path.join(spill_dir, "spill.jsonl")
+        executor = self.make_executor(
+            max_workers=1,
+            max_queue_size=1,
+            overflow_policy=OVERFLOW_SPILL,
+            spill_path=spill_path,
+        )
+        executor.submit("first", "Body", ["a@example.com"])
+        self.assertTrue(wait_for(lambda: executor.queue.qsize() == 0))
+        for index in range(3):
+            executor.submit(f"queued-{index}", "Body", ["a@example.com"])
+
+        self.assertEqual(executor.get_metrics()["spilled"], 2)
+        self.assertTrue(os.path.exists(spill_path))
+
+        self.gate.set()
+        self.assertTrue(wait_for(lambda: executor.get_metrics()["sent"] == 4))
+        executor.shutdown(5)
+        self.assertFalse(os.path.exists(spill_path))
+        self.assertEqual(len(mail.outbox), 4)
+
+    @skipIf(email_executor.fcntl is None, "fcntl is not available")
+    def test_spill_replay_waits_for_another_process_holding_the_file(self):
+        spill_path = os.path.join(tempfile.mkdtemp(), "spill.jsonl")
+        with open(spill_path, "w", encoding="utf-8") as spill_file:
+            spill_file.write(
+                json.dumps({"subject": "spilled", "message": "Body", "recipients": ["a@example.com"], "delivery": "single"})
+                + "\n"
+            )
+        executor = self.make_executor(max_workers=1, overflow_policy=OVERFLOW_SPILL, spill_path=spill_path)
+
+        with open(f"{spill_path}.lock", "a", encoding="utf-8") as lock_file:
+            email_executor.fcntl.flock(lock_file.fileno(), email_executor.fcntl.LOCK_EX)
+            replay = threading.Thread(target=executor._reload_spilled)
+            replay.start()
+            replay.join(0.3)
+            self.assertTrue(replay.is_alive())
+            self.assertTrue(os.path.exists(spill_path))
+
+        replay.join(5)
+        self.assertFalse(replay.is_alive())
+        self.assertFalse(os.path.exists(spill_path))
+        self.assertEqual(executor.queue.get_nowait()[0], "spilled")
+        executor.queue.task_done()
+
+    def test_shutdown_timeout_persists_queued_emails_for_the_next_executor(self):
+        spill_path = os.path.join(tempfile.mkdtemp(), "spill.jsonl")
+        executor = self.make_executor(max_workers=1, max_queue_size=1, block_timeout=0, spill_path=spill_path)
+        executor.submit("first", "Body", ["a@example.com"])
+        self.assertTrue(wait_for(lambda: executor.queue.qsize() == 0))
+        executor.submit("queued", "Body", ["a@example.com"])
+
+        started = time.monotonic()
+        executor.shutdown(0.2)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertTrue(os.path.exists(spill_path))
+
+        self.gate.set()
+        next_executor = self.make_executor(max_workers=1, spill_path=spill_path)
+        next_executor.submit("next", "Body", ["a@example.com"])
+        next_executor.shutdown(5)
+        self.assertFalse(os.path.exists(spill_path))
+        self.assertTrue(wait_for(lambda: len(mail.outbox) == 3))
+        self.assertEqual(sorted(message.subject for message in mail.outbox), ["first", "next", "queued"])
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    DEFAULT_FROM_EMAIL="no-reply@test.local",
+    EMAIL_USE_OUTBOX=True,
+    EMAIL_DIGEST_WINDOW_SECONDS=600,
+)
+class EmailDigestTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username="digest-author",
+            email="digest-author@example.com",
+            password="strong-pass-123",
+        )
+        self.post = Post.objects.create(author=self.author, name="Viral post", content="Body")
+        self.fans = []
+        for index in range(5):
+            self.fans.append(
+                User.objects.create_user(
+                    username=f"fan-{index}",
+                    email=f"fan-{index}@example.com",
+                    password="strong-pass-123",
+                )
+            )
+
+    def later(self, seconds=601):
+        return timezone.now() + timedelta(seconds=seconds)
+
+    def test_likes_inside_window_are_sent_as_one_digest(self):
+        for fan in self.fans:
+            PostLike.objects.create(post=self.post, user=fan)
+
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+        self.assertEqual(EmailDigestEvent.objects.count(), 4)
+        self.assertEqual(flush_email_digests(), 0)
+
+        self.assertEqual(flush_email_digests(now=self.later()), 1)
+        self.assertFalse(EmailDigestEvent.objects.exists())
+
+        process_email_outbox()
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].subject, "fan-0 liked your post")
+        digest = mail.outbox[1]
+        self.assertEqual(digest.to, [self.author.email])
+        self.assertEqual(digest.subject, "4 people liked your post")
+        self.assertEqual(digest.body, 'fan-4, fan-3, fan-2 and 1 other liked your post "Viral post".')
+
+    def test_repeated_likes_from_one_person_name_them_in_the_digest(self):
+        PostLike.objects.create(post=self.post, user=self.fans[0])
+        for _ in range(2):
+            PostLike.objects.create(post=self.post, user=self.fans[1])
+            PostLike.objects.filter(post=self.post, user=self.fans[1]).delete()
+
+        self.assertEqual(EmailDigestEvent.objects.count(), 2)
+        flush_email_digests(now=self.later())
+
+        digest = EmailOutbox.objects.last()
+        self.assertEqual(digest.subject, "fan-1 liked your post")
+        self.assertEqual(digest.message, 'fan-1 liked your post "Viral post".')
+
+    def test_digest_keeps_the_window_open_to_cap_the_send_rate(self):
+        for fan in self.fans[:2]:
+            Follow.objects.create(follower=fan, following=self.author)
+        flush_email_digests(now=self.later())
+
+        window = EmailDigestWindow.objects.get(recipient=self.author, kind=EmailDigestWindow.KIND_FOLLOW)
+        self.assertGreater(window.ends_at, self.later(500))
+
+        Follow.objects.create(follower=self.fans[2], following=self.author)
+        self.assertEqual(EmailOutbox.objects.count(), 2)
+        self.assertEqual(EmailDigestEvent.objects.count(), 1)
+
+        self.assertEqual(flush_email_digests(now=self.later(1300)), 1)
+        self.assertEqual(EmailOutbox.objects.last().subject, "fan-2 started following you")
+
+        # A window that ends with nothing buffered is closed, so the next
+        # event is emailed right away.
+        self.assertEqual(flush_email_digests(now=self.later(2000)), 0)
+        self.assertFalse(EmailDigestWindow.objects.exists())
+
+    def test_comments_on_several_posts_are_listed_per_post(self):
+        other_post = Post.objects.create(author=self.author, name="Other post", content="Body")
+        Comment.objects.create(post=self.post, author=self.fans[0], content="First")
+        for fan in self.fans[1:4]:
+            Comment.objects.create(post=self.post, author=fan, content="Nice")
+        Comment.objects.create(post=other_post, author=self.fans[4], content="Also nice")
+
+        flush_email_digests(now=self.later())
+
+        digest = EmailOutbox.objects.last()
+        self.assertEqual(digest.subject, "4 new comments on 2 of your posts")
+        self.assertEqual(digest.message, '- "Viral post": 3 comments\n- "Other post": 1 comment')
+
+
+class NotificationInboxTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username="inbox-author",
+            email="inbox-author@example.com",
+            password="strong-pass-123",
+        )
+        self.fan = User.objects.create_user(
+            username="inbox-fan",
+            email="inbox-fan@example.com",
+            password="strong-pass-123",
+        )
+        self.post = Post.objects.create(author=self.author, name="Inbox post", content="Body")
+
+    def get_unread_count(self, user):
+        user.refresh_from_db(fields=["unread_notification_count"])
+        return user.unread_notification_count
+
+    def test_activity_creates_notifications_and_unread_counter(self):
+        Follow.objects.create(follower=self.fan, following=self.author)
+        like = PostLike.objects.create(post=self.post, user=self.fan)
+        Comment.objects.create(post=self.post, author=self.fan, content="Hi")
+        PostLike.objects.create(post=self.post, user=self.author)
+
+        self.assertEqual(self.get_unread_count(self.author), 3)
+        self.client.force_authenticate(user=self.author)
+        response = self.client.get(reverse("notification-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["kind"] for item in response.data["results"]], ["comment", "like", "follow"])
+        self.assertEqual(response.data["results"][0]["actor"]["username"], self.fan.username)
+
+        # Deleting the post cascades to its notifications and their counts.
+        like.post.delete()
+        self.assertEqual(self.get_unread_count(self.author), 1)
+
+    def test_deleting_parents_settles_unread_counters_and_keeps_fast_delete(self):
+        other = User.objects.create_user(
+            username="inbox-other",
+            email="inbox-other@example.com",
+            password="strong-pass-123",
+        )
+        other_post = Post.objects.create(author=self.author, name="Other post", content="Body")
+        Follow.objects.create(follower=self.fan, following=self.author)
+        PostLike.objects.create(post=self.post, user=self.fan)
+        Comment.objects.create(post=other_post, author=other, content="Hi")
+        PostLike.objects.create(post=other_post, user=other)
+        Comment.objects.create(post=self.post, author=other, content="Hello")
+        self.assertEqual(self.get_unread_count(self.author), 5)
+
+        self.assertTrue(Collector(using="default").can_fast_delete(Notification.objects.all()))
+
+        # Every notification the fan caused goes, and only once.
+        self.fan.delete()
+        self.assertEqual(self.get_unread_count(self.author), 3)
+
+        Post.objects.filter(pk__in=[self.post.pk, other_post.pk]).delete()
+        self.assertEqual(self.get_unread_count(self.author), 0)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_new_post_notifies_followers_from_one_job_in_chunks(self):
+        followers = []
+        for index in range(5):
+            follower = User.objects.create_user(
+                username=f"inbox-follower-{index}",
+                email=f"inbox-follower-{index}@example.com",
+                password="strong-pass-123",
+            )
+            Follow.objects.create(follower=follower, following=self.author)
+            followers.append(follower)
+
+        FanOutJob.objects.all().delete()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Post.objects.create(author=self.author, name="Rolled back post", content="Body")
+            raise RuntimeError
+        self.assertFalse(FanOutJob.objects.exists())
+
+        # Creating the post only writes the job rows, whatever the follower count.
+        post = Post.objects.create(author=self.author, name="Fan-out post", content="Body")
+        self.assertEqual(FanOutJob.objects.filter(post=post).count(), 2)
+        self.assertFalse(Notification.objects.filter(kind=Notification.KIND_POST).exists())
+
+        with self.settings(NOTIFICATION_FANOUT_CHUNK_SIZE=2):
+            # The email job fits in one chunk; the notification job needs three.
+            self.assertEqual(process_fan_out_jobs(max_chunks=2), 2)
+            self.assertEqual(Notification.objects.filter(kind=Notification.KIND_POST, post=post).count(), 2)
+            call_command("run_email_worker", "--once", stdout=StringIO())
+
+        self.assertFalse(FanOutJob.objects.exists())
+        self.assertEqual(Notification.objects.filter(kind=Notification.KIND_POST, post=post).count(), 5)
+        for follower in followers:
+            self.assertEqual(self.get_unread_count(follower), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            create_notifications([follower.id for follower in followers], Notification.KIND_POST, self.author.id, post.id, 2)
+        self.assertEqual(len(queries.captured_queries), 6)
+
+    def test_list_paginates_by_cursor_and_marks_read_by_range(self):
+        for index in range(5):
+            Notification.objects.create(recipient=self.author, kind=Notification.KIND_FOLLOW, actor=self.fan)
+        User.objects.filter(pk=self.author.pk).update(unread_notification_count=5)
+        ids = list(Notification.objects.filter(recipient=self.author).order_by("id").values_list("id", flat=True))
+
+        self.client.force_authenticate(user=self.author)
+        first_page = self.client.get(reverse("notification-list"), {"page_size": 2})
+        self.assertEqual([item["id"] for item in first_page.data["results"]], [ids[4], ids[3]])
+        second_page = self.client.get(first_page.data["next"])
+        self.assertEqual([item["id"] for item in second_page.data["results"]], [ids[2], ids[1]])
+
+        response = self.client.post(
+            reverse("notification-mark-read"),
+            {"from_id": ids[1], "up_to_id": ids[3]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"marked": 3, "unread_count": 2})
+
+        unread = self.client.get(reverse("notification-list"), {"unread": "true"})
+        self.assertEqual([item["id"] for item in unread.data["results"]], [ids[4], ids[0]])
+        count = self.client.get(reverse("notification-unread-count"))
+        self.assertEqual(count.data, {"unread_count": 2})
+
+        response = self.client.post(
+            reverse("notification-mark-read"),
+            {"from_id": ids[3], "up_to_id": ids[1]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_prune_deletes_only_old_read_notifications(self):
+        for is_read in (True, True, False):
+            Notification.objects.create(recipient=self.author, kind=Notification.KIND_FOLLOW, actor=self.fan, is_read=is_read)
+        Notification.objects.update(created_at=timezone.now() - timedelta(days=40))
+        recent = Notification.objects.create(
+            recipient=self.author, kind=Notification.KIND_FOLLOW, actor=self.fan, is_read=True
+        )
+
+        self.assertEqual(prune_read_notifications(retention_days=30, batch_size=1), 2)
+        remaining = set(Notification.objects.values_list("id", "is_read"))
+        self.assertEqual(len(remaining), 2)
+        self.assertIn((recent.id, True), remaining)
+
+        out = StringIO()
+        call_command("prune_notifications", "--days", "30", stdout=out)
+        self.assertIn("Deleted 0 read notifications", out.getvalue())
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import NotificationListAPIView, NotificationMarkReadAPIView, NotificationUnreadCountAPIView
+
+urlpatterns = [
+    path("notifications/", NotificationListAPIView.as_view(), name="notification-list"),
+    path("notifications/unread-count/", NotificationUnreadCountAPIView.as_view(), name="notification-unread-count"),
+    path("notifications/read/", NotificationMarkReadAPIView.as_view(), name="notification-mark-read"),
+]
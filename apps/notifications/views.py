@@ -0,0 +1,94 @@
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema, extend_schema_view
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.common.pagination import PAGINATION_PARAMETERS, KeysetPagination, get_paginated_serializer
+from .inbox import get_unread_notification_count, mark_notifications_read
+from .models import Notification
+from .serializers import (
+    NotificationMarkReadResponseSerializer,
+    NotificationMarkReadSerializer,
+    NotificationSerializer,
+    NotificationUnreadCountSerializer,
+)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="List notifications",
+        description="Returns your notifications, newest first.",
+        tags=["Notifications"],
+        parameters=[
+            OpenApiParameter("unread", bool, OpenApiParameter.QUERY, description="Only return unread notifications"),
+            *PAGINATION_PARAMETERS,
+        ],
+        responses={
+            200: get_paginated_serializer(NotificationSerializer),
+            401: OpenApiResponse(description="Authentication required"),
+        },
+    )
+)
+class NotificationListAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        notifications = Notification.objects.select_related("actor").filter(recipient=request.user)
+        if request.query_params.get("unread", "").strip().lower() in ("1", "true", "yes"):
+            notifications = notifications.filter(is_read=False)
+
+        paginator = KeysetPagination(ordering=("-id",))
+        page = paginator.paginate_queryset(notifications, request, view=self)
+        serializer = NotificationSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="Get unread notification count",
+        description="Returns the number of unread notifications, read from a counter on the user.",
+        tags=["Notifications"],
+        responses={
+            200: NotificationUnreadCountSerializer,
+            401: OpenApiResponse(description="Authentication required"),
+        },
+    )
+)
+class NotificationUnreadCountAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({"unread_count": get_unread_notification_count(request.user.id)}, status=status.HTTP_200_OK)
+
+
+@extend_schema_view(
+    post=extend_schema(
+        summary="Mark notifications as read",
+        description=(
+            "Marks every unread notification with an id up to `up_to_id` (and from `from_id`, when given) "
+            "as read in one update."
+        ),
+        tags=["Notifications"],
+        request=NotificationMarkReadSerializer,
+        responses={
+            200: NotificationMarkReadResponseSerializer,
+            400: OpenApiResponse(description="Validation error"),
+            401: OpenApiResponse(description="Authentication required"),
+        },
+    )
+)
+class NotificationMarkReadAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = NotificationMarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        marked = mark_notifications_read(
+            request.user.id,
+            serializer.validated_data["up_to_id"],
+            from_id=serializer.validated_data.get("from_id"),
+        )
+        response_data = {"marked": marked, "unread_count": get_unread_notification_count(request.user.id)}
+        return Response(response_data, status=status.HTTP_200_OK)
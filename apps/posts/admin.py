@@ -5,10 +5,11 @@ from .models import Comment, Post, PostLike, Tag
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-	list_display = ("id", "name", "author", "created_at")
+	list_display = ("id", "name", "author", "like_count", "comment_count", "created_at")
 	search_fields = ("name",)
 	list_filter = ("created_at",)
 	filter_horizontal = ("tags",)
+	readonly_fields = ("like_count", "comment_count", "counters_updated_at")
 
 
 @admin.register(Comment)
@@ -26,5 +27,6 @@ class PostLikeAdmin(admin.ModelAdmin):
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
-	list_display = ("id", "name", "created_at")
+	list_display = ("id", "name", "post_count", "created_at")
 	search_fields = ("name",)
+	readonly_fields = ("post_count",)
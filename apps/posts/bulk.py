@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.db import transaction
+
+from apps.common.response_cache import invalidate_on_commit
+from apps.media.blobs import adjust_image_references, get_image_dimensions, get_media_path
+from .models import Post, Tag
+from .search import index_new_posts
+from .serializers import PostSerializer
+from .tags import adjust_tag_post_counts, record_tag_activity
+from .timeline import fan_out_posts
+
+
+def get_bulk_create_limit():
+    return getattr(settings, "POST_BULK_MAX_ITEMS", 500)
+
+
+def resolve_tags(tag_names):
+    if not tag_names:
+        return {}
+
+    tags_by_name = {}
+    for tag in Tag.objects.filter(name__in=tag_names):
+        tags_by_name[tag.name] = tag
+
+    missing_names = []
+    for name in tag_names:
+        if name not in tags_by_name:
+            missing_names.append(name)
+
+    if missing_names:
+        # Another request may create the same tag concurrently; ignore the
+        # conflict and read both sets of rows back.
+        Tag.objects.bulk_create([Tag(name=name) for name in missing_names], ignore_conflicts=True)
+        for tag in Tag.objects.filter(name__in=missing_names):
+            tags_by_name[tag.name] = tag
+    return tags_by_name
+
+
+def validate_bulk_posts(items):
+    valid_items = []
+    results = []
+    for index, item in enumerate(items):
+        serializer = PostSerializer(data=item)
+        if serializer.is_valid():
+            valid_items.append((index, serializer.validated_data))
+            results.append(None)
+        else:
+            results.append({"index": index, "success": False, "errors": serializer.errors})
+    return valid_items, results
+
+
+def create_posts_in_bulk(author, valid_items):
+    posts = []
+    tag_names_by_index = []
+    all_tag_names = set()
+    for _, validated_data in valid_items:
+        validated_data = dict(validated_data)
+        tag_names = validated_data.pop("tag_names", [])
+        posts.append(Post(author=author, **validated_data))
+        tag_names_by_index.append(tag_names)
+        all_tag_names.update(tag_names)
+
+    # bulk_create skips pre_save, so copy the image path and probed sizes here.
+    dimensions = get_image_dimensions([post.image for post in posts])
+    for post in posts:
+        post.image_path = get_media_path(post.image) or ""
+        post.image_width, post.image_height = dimensions.get(post.image, (None, None))
+
+    with transaction.atomic():
+        posts = Post.objects.bulk_create(posts)
+        tags_by_name = resolve_tags(sorted(all_tag_names))
+
+        through_rows = []
+        tag_names_by_post_id = {}
+        tag_deltas = {}
+        for post, tag_names in zip(posts, tag_names_by_index):
+            tag_names_by_post_id[post.pk] = tag_names
+            for name in tag_names:
+                tag_id = tags_by_name[name].pk
+                through_rows.append(Post.tags.through(post_id=post.pk, tag_id=tag_id))
+                tag_deltas[tag_id] = tag_deltas.get(tag_id, 0) + 1
+        Post.tags.through.objects.bulk_create(through_rows)
+
+        # bulk_create sends no post_save/m2m_changed signals, so do the work
+        # of those receivers here once for the whole batch. New-post emails
+        # are deliberately not sent for bulk imports.
+        index_new_posts(posts, tag_names_by_post_id)
+        adjust_tag_post_counts(tag_deltas)
+        record_tag_activity(tag_deltas)
+        fan_out_posts(author.id, posts)
+        adjust_image_references(added=[post.image for post in posts])
+        invalidate_on_commit("user-posts", author.id)
+
+    return posts
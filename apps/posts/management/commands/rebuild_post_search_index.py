@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.posts.search import is_search_index_available, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search index for posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        if not is_search_index_available():
+            self.stdout.write("Full-text search index is only available on SQLite; nothing to do.")
+            return
+
+        indexed = rebuild_search_index(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} posts."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.common.counters import count_subquery, reconcile_counters
+from apps.posts.models import Comment, Post, PostLike
+
+
+class Command(BaseCommand):
+    help = "Recomputes Post.like_count and Post.comment_count from PostLike and Comment rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        checked, fixed = reconcile_counters(
+            Post,
+            {
+                "like_count": count_subquery(PostLike, "post"),
+                "comment_count": count_subquery(Comment, "post"),
+            },
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} posts, fixed {fixed}."))
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-17 09:12
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    Post = apps.get_model("posts", "Post")
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_fts "
+        "USING fts5(name, content, tags, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+
+    for post in Post.objects.prefetch_related("tags").iterator(chunk_size=500):
+        tag_names = " ".join(tag.name for tag in post.tags.all())
+        schema_editor.execute(
+            "INSERT INTO posts_post_fts (rowid, name, content, tags) VALUES (%s, %s, %s, %s)",
+            [post.pk, post.name, post.content, tag_names],
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    schema_editor.execute("DROP TABLE IF EXISTS posts_post_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_post_category_post_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
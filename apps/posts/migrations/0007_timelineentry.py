@@ -0,0 +1,57 @@
+# Generated by Django 6.0.1 on 2026-10-17 10:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_timelines(apps, schema_editor):
+    Follow = apps.get_model("users", "Follow")
+    Post = apps.get_model("posts", "Post")
+    TimelineEntry = apps.get_model("posts", "TimelineEntry")
+
+    for follow in Follow.objects.iterator(chunk_size=500):
+        recent_posts = (
+            Post.objects.filter(author_id=follow.following_id)
+            .order_by("-created_at", "-id")
+            .values_list("id", "created_at")[:50]
+        )
+        entries = []
+        for post_id, created_at in recent_posts:
+            entries.append(
+                TimelineEntry(
+                    user_id=follow.follower_id,
+                    post_id=post_id,
+                    author_id=follow.following_id,
+                    created_at=created_at,
+                )
+            )
+        TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_like_count_post_comment_count'),
+        ('users', '0008_remove_follow_prevent_self_follow'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='posts.post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at', '-post_id'],
+                'indexes': [models.Index(fields=['user', '-created_at', '-post'], name='posts_timel_user_id_11fac5_idx'), models.Index(fields=['user', 'author'], name='posts_timel_user_id_b036fb_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'post'), name='unique_timeline_entry')],
+            },
+        ),
+        migrations.RunPython(backfill_timelines, migrations.RunPython.noop),
+    ]
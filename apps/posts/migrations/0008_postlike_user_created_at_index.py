@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-17 11:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_timelineentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='postlike',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='posts_postl_user_id_0b2519_idx'),
+        ),
+    ]
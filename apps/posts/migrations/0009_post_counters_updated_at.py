@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_postlike_user_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='counters_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 6.0.1 on 2026-10-17 12:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_tag_post_counts(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    Tag = apps.get_model("posts", "Tag")
+    PostTag = Post.tags.through
+
+    post_counts = (
+        PostTag.objects.filter(tag=OuterRef("pk"))
+        .order_by()
+        .values("tag")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    Tag.objects.update(post_count=Coalesce(Subquery(post_counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_counters_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['-post_count', 'name'], name='posts_tag_post_co_604799_idx'),
+        ),
+        migrations.AddField(
+            model_name='tagactivity',
+            name='tag',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='posts.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='tagactivity',
+            index=models.Index(fields=['bucket_start'], name='posts_tagac_bucket__8872c6_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='tagactivity',
+            constraint=models.UniqueConstraint(fields=('tag', 'bucket_start'), name='unique_tag_activity_bucket'),
+        ),
+        migrations.RunPython(backfill_tag_post_counts, migrations.RunPython.noop),
+    ]
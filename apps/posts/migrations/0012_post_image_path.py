@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-17 16:30
+
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_image(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    media_url_path = urlsplit(settings.MEDIA_URL).path
+
+    batch = []
+    for post in Post.objects.exclude(image="").only("id", "image").iterator():
+        path = urlsplit(post.image).path
+        if path.startswith(media_url_path) and path != media_url_path:
+            post.image_path = path[len(media_url_path):]
+            batch.append(post)
+        if len(batch) >= 500:
+            Post.objects.bulk_update(batch, ["image_path"])
+            batch = []
+    Post.objects.bulk_update(batch, ["image_path"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_image_dimensions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_image, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,9 @@
 from django.conf import settings
 from django.db import models
 
+from apps.common.counters import DenormalizedCounterMixin
+from apps.common.tracking import FieldTrackerMixin
+
 
 class TimeStampedModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -10,7 +13,7 @@ class TimeStampedModel(models.Model):
         abstract = True
 
 
-class Post(TimeStampedModel):
+class Post(FieldTrackerMixin, DenormalizedCounterMixin, TimeStampedModel):
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -19,26 +22,64 @@ class Post(TimeStampedModel):
     name = models.CharField(max_length=150)
     content = models.TextField()
     image = models.URLField(blank=True)
+    image_width = models.PositiveIntegerField(blank=True, null=True)
+    image_height = models.PositiveIntegerField(blank=True, null=True)
+    # Storage path behind `image` when it is one of our media URLs.
+    image_path = models.CharField(max_length=255, blank=True, db_index=True, editable=False)
     category = models.CharField(max_length=80, blank=True, db_index=True)
     tags = models.ManyToManyField("Tag", related_name="posts", blank=True)
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    counters_updated_at = models.DateTimeField(blank=True, null=True)
+
+    counter_fields = ("like_count", "comment_count", "counters_updated_at")
+    tracked_fields = ("name", "content", "image")
 
     class Meta:
-        ordering = ["-created_at"]
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"]),
+            models.Index(fields=["author", "-created_at", "-id"]),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Tag(TimeStampedModel):
+class Tag(FieldTrackerMixin, DenormalizedCounterMixin, TimeStampedModel):
     name = models.CharField(max_length=50, unique=True)
+    post_count = models.PositiveIntegerField(default=0)
+
+    counter_fields = ("post_count",)
+    tracked_fields = ("name",)
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["-post_count", "name"]),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class TagActivity(models.Model):
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="activity")
+    bucket_start = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tag", "bucket_start"], name="unique_tag_activity_bucket")
+        ]
+        indexes = [
+            models.Index(fields=["bucket_start"]),
+        ]
+
+    def __str__(self):
+        return f"{self.tag_id} tagged {self.count} times from {self.bucket_start}"
+
+
 class Comment(TimeStampedModel):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="comments")
     author = models.ForeignKey(
@@ -49,7 +90,10 @@ class Comment(TimeStampedModel):
     content = models.TextField()
 
     class Meta:
-        ordering = ["created_at"]
+        ordering = ["created_at", "id"]
+        indexes = [
+            models.Index(fields=["post", "created_at", "id"]),
+        ]
 
     def __str__(self):
         return "Comment by " + str(self.author) + " on " + self.post.name
@@ -67,6 +111,37 @@ class PostLike(TimeStampedModel):
         constraints = [
             models.UniqueConstraint(fields=["post", "user"], name="unique_post_like")
         ]
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-id"]),
+        ]
 
     def __str__(self):
         return str(self.user) + " liked " + self.post.name
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+    )
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="timeline_entries")
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["-created_at", "-post_id"]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "post"], name="unique_timeline_entry")
+        ]
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-post"]),
+            models.Index(fields=["user", "author"]),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} in timeline of {self.user_id}"
@@ -0,0 +1,209 @@
+import html
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import Post, Tag
+
+
+SEARCH_TABLE = "posts_post_fts"
+SEARCH_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+SEARCH_SNIPPET_TOKENS = 16
+# FTS5 wraps matches in these private-use characters; the snippet is escaped
+# as text and only then are they turned into <mark> tags.
+SNIPPET_MATCH_START = "\ue000"
+SNIPPET_MATCH_END = "\ue001"
+
+# bm25 column weights for (name, content, tags); a hit in the title or a tag
+# should outrank a passing mention deep in the body.
+SEARCH_COLUMN_WEIGHTS = (10.0, 1.0, 5.0)
+
+
+def is_search_index_available():
+    return connection.vendor == "sqlite"
+
+
+def build_match_query(search_text):
+    tokens = SEARCH_TOKEN_PATTERN.findall(search_text or "")
+    if not tokens:
+        return None
+
+    terms = []
+    for token in tokens:
+        terms.append(f'"{token}"*')
+    return " ".join(terms)
+
+
+def get_search_limit(limit=None):
+    max_results = getattr(settings, "POST_SEARCH_MAX_RESULTS", 50)
+    if limit is None or limit <= 0 or limit > max_results:
+        return max_results
+    return limit
+
+
+def index_post(post, tag_names=None):
+    if not is_search_index_available():
+        return
+
+    if tag_names is None:
+        tag_names = list(Tag.objects.filter(posts=post.pk).values_list("name", flat=True))
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [post.pk])
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, name, content, tags) VALUES (%s, %s, %s, %s)",
+            [post.pk, post.name or "", post.content or "", " ".join(tag_names)],
+        )
+
+
+def index_new_posts(posts, tag_names_by_post_id):
+    if not posts or not is_search_index_available():
+        return
+
+    rows = []
+    for post in posts:
+        tag_names = tag_names_by_post_id.get(post.pk, [])
+        rows.append([post.pk, post.name or "", post.content or "", " ".join(tag_names)])
+
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, name, content, tags) VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+
+
+def index_posts_by_id(post_ids):
+    if not post_ids or not is_search_index_available():
+        return
+
+    posts = Post.objects.filter(id__in=list(post_ids)).prefetch_related("tags")
+    for post in posts:
+        tag_names = []
+        for tag in post.tags.all():
+            tag_names.append(tag.name)
+        index_post(post, tag_names=tag_names)
+
+
+def remove_post_from_index(post_id):
+    if not is_search_index_available():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [post_id])
+
+
+def rebuild_search_index(batch_size=500):
+    if not is_search_index_available():
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+    indexed = 0
+    post_ids = list(Post.objects.order_by("id").values_list("id", flat=True))
+    for start in range(0, len(post_ids), batch_size):
+        batch = post_ids[start:start + batch_size]
+        index_posts_by_id(batch)
+        indexed += len(batch)
+    return indexed
+
+
+def _fetch_index_hits(match_query, category, limit, with_snippets, position, reverse):
+    weights = ", ".join(str(weight) for weight in SEARCH_COLUMN_WEIGHTS)
+    snippet = "NULL"
+    if with_snippets:
+        snippet = (
+            f"snippet({SEARCH_TABLE}, -1, '{SNIPPET_MATCH_START}', '{SNIPPET_MATCH_END}', '…', "
+            f"{SEARCH_SNIPPET_TOKENS})"
+        )
+
+    inner_sql = (
+        f"SELECT {SEARCH_TABLE}.rowid AS post_id, bm25({SEARCH_TABLE}, {weights}) AS search_rank, "
+        f"{snippet} AS search_snippet FROM {SEARCH_TABLE} "
+        f"INNER JOIN posts_post ON posts_post.id = {SEARCH_TABLE}.rowid "
+        f"WHERE {SEARCH_TABLE} MATCH %s"
+    )
+    params = [match_query]
+    if category:
+        inner_sql += " AND lower(posts_post.category) = lower(%s)"
+        params.append(category)
+
+    sql = f"SELECT post_id, search_rank, search_snippet FROM ({inner_sql}) AS hits"
+    comparison = "<" if reverse else ">"
+    if position is not None:
+        sql += (
+            f" WHERE search_rank {comparison} %s"
+            f" OR (search_rank = %s AND post_id {comparison} %s)"
+        )
+        params.extend([position[0], position[0], position[1]])
+
+    direction = "DESC" if reverse else "ASC"
+    sql += f" ORDER BY search_rank {direction}, post_id {direction} LIMIT %s"
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def render_snippet(raw_snippet):
+    """Escapes post text in an FTS snippet so the only markup left is the <mark> around matches."""
+
+    if raw_snippet is None:
+        return None
+    escaped = html.escape(raw_snippet)
+    return escaped.replace(SNIPPET_MATCH_START, "<mark>").replace(SNIPPET_MATCH_END, "</mark>")
+
+
+def _fallback_search(search_text, category, limit, position, reverse):
+    text_filter = (
+        Q(name__icontains=search_text)
+        | Q(content__icontains=search_text)
+        | Q(tags__name__icontains=search_text)
+    )
+    posts = Post.objects.filter(text_filter)
+    if category:
+        posts = posts.filter(category__iexact=category)
+    if position is not None:
+        if reverse:
+            posts = posts.filter(id__lt=position[1])
+        else:
+            posts = posts.filter(id__gt=position[1])
+
+    order = "-id" if reverse else "id"
+    post_ids = list(posts.order_by(order).values_list("id", flat=True).distinct()[:limit])
+
+    hits = []
+    for post_id in post_ids:
+        hits.append((post_id, 0.0, None))
+    return hits
+
+
+def search_posts(search_text, category="", limit=None, with_snippets=False, position=None, reverse=False):
+    match_query = build_match_query(search_text)
+    if match_query is None:
+        return []
+
+    if limit is None:
+        limit = get_search_limit()
+    if is_search_index_available():
+        hits = _fetch_index_hits(match_query, category, limit, with_snippets, position, reverse)
+    else:
+        hits = _fallback_search(search_text, category, limit, position, reverse)
+
+    hit_ids = []
+    for hit in hits:
+        hit_ids.append(hit[0])
+    posts_by_id = Post.objects.select_related("author").prefetch_related("tags").in_bulk(hit_ids)
+
+    results = []
+    for hit in hits:
+        post = posts_by_id.get(hit[0])
+        if post is None:
+            continue
+        post.search_rank = hit[1]
+        post.search_snippet = render_snippet(hit[2]) if with_snippets else None
+        results.append(post)
+    return results
@@ -1,13 +1,18 @@
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
+from apps.media.serializers import ImageSrcsetListSerializer, ImageSrcsetMixin
 from .models import Comment, Post, Tag
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(ImageSrcsetMixin, serializers.ModelSerializer):
     author_username = serializers.CharField(source="author.username", read_only=True)
-    likes_count = serializers.IntegerField(source="likes.count", read_only=True)
-    comments_count = serializers.IntegerField(source="comments.count", read_only=True)
+    likes_count = serializers.IntegerField(source="like_count", read_only=True)
+    comments_count = serializers.IntegerField(source="comment_count", read_only=True)
     tags = serializers.SlugRelatedField(many=True, read_only=True, slug_field="name")
+    liked_by_me = serializers.SerializerMethodField()
+    author_followed_by_me = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
     tag_names = serializers.ListField(
         child=serializers.CharField(max_length=50),
         write_only=True,
@@ -21,17 +26,37 @@ class PostSerializer(serializers.ModelSerializer):
             "name",
             "content",
             "image",
+            "image_width",
+            "image_height",
+            "image_srcset",
             "category",
             "author",
             "author_username",
             "likes_count",
             "comments_count",
+            "liked_by_me",
+            "author_followed_by_me",
             "tags",
             "tag_names",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ["author", "created_at", "updated_at"]
+        read_only_fields = ["author", "image_width", "image_height", "created_at", "updated_at"]
+        list_serializer_class = ImageSrcsetListSerializer
+
+    srcset_source_fields = ("image",)
+
+    @extend_schema_field(serializers.CharField())
+    def get_image_srcset(self, obj):
+        return self.get_srcset(obj.image)
+
+    @extend_schema_field(serializers.BooleanField())
+    def get_liked_by_me(self, obj):
+        return obj.id in self.context.get("liked_post_ids", ())
+
+    @extend_schema_field(serializers.BooleanField())
+    def get_author_followed_by_me(self, obj):
+        return obj.author_id in self.context.get("followed_author_ids", ())
 
     def validate_name(self, value):
         clean_value = value.strip()
@@ -91,6 +116,52 @@ class PostSerializer(serializers.ModelSerializer):
         return post
 
 
+class PostSearchResultSerializer(PostSerializer):
+    search_snippet = serializers.CharField(read_only=True, allow_null=True)
+
+    class Meta(PostSerializer.Meta):
+        fields = PostSerializer.Meta.fields + ["search_snippet"]
+
+
+class LikedPostSerializer(PostSerializer):
+    liked_at = serializers.DateTimeField(read_only=True)
+
+    class Meta(PostSerializer.Meta):
+        fields = PostSerializer.Meta.fields + ["liked_at"]
+
+
+class PostViewerFlagsSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    liked_by_me = serializers.BooleanField()
+    author_followed_by_me = serializers.BooleanField()
+
+
+class PostBulkCreateResultSerializer(serializers.Serializer):
+    index = serializers.IntegerField()
+    success = serializers.BooleanField()
+    post = PostSerializer(required=False)
+    errors = serializers.DictField(required=False)
+
+
+class PostBulkCreateResponseSerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    results = PostBulkCreateResultSerializer(many=True)
+
+
+class TagSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Tag
+        fields = ["id", "name", "post_count"]
+
+
+class TrendingTagSerializer(TagSerializer):
+    trending_score = serializers.IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ["trending_score"]
+
+
 class CommentSerializer(serializers.ModelSerializer):
     author_username = serializers.CharField(source="author.username", read_only=True)
 
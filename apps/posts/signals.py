@@ -1,8 +1,19 @@
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
+from django.utils import timezone
 
-from apps.common.email_notifications import send_activity_email
-from .models import Comment, Post, PostLike
+from apps.common.counters import adjust_counter
+from apps.common.email_messages import DELIVERY_PERSONALIZED
+from apps.common.response_cache import invalidate_on_commit
+from apps.notifications.digests import queue_activity_email
+from apps.notifications.inbox import create_notification
+from apps.notifications.models import EmailDigestWindow, FanOutJob, Notification
+from apps.users.models import Follow
+from .models import Comment, Post, PostLike, Tag
+from .search import index_post, index_posts_by_id, remove_post_from_index
+from .tags import adjust_tag_post_counts, record_tag_activity
+from .timeline import backfill_timeline, fan_out_post, prune_timeline
 
 
 def get_display_text(user):
@@ -11,29 +22,67 @@ def get_display_text(user):
     return user.username
 
 
+def is_deleted_with_post(instance, origin):
+    return isinstance(origin, Post) and origin.pk == instance.post_id
+
+
 @receiver(post_save, sender=Post)
 def send_new_post_email_notification(sender, instance, created, **kwargs):
     if not created:
         return
 
-    author = instance.author
-    author_name = get_display_text(author)
+    author_name = get_display_text(instance.author)
     post_name = instance.name
     post_content = (instance.content or "").strip()
+    subject = f"{author_name} published a new post"
     message = f'{author_name} published a new post: "{post_name}".'
     if post_content:
         message += f'\n\nPost content:\n"{post_content}"'
 
-    follower_emails = author.followers.values_list("email", flat=True)
-    for follower_email in follower_emails:
-        if not follower_email:
-            continue
+    # The follower list can be long, so only one job row is written with the
+    # post; `run_email_worker` expands it into per-follower emails.
+    FanOutJob.objects.create(
+        kind=FanOutJob.KIND_EMAIL,
+        author_id=instance.author_id,
+        post=instance,
+        subject=subject[:255],
+        message=message,
+        delivery=getattr(settings, "NEW_POST_EMAIL_DELIVERY", DELIVERY_PERSONALIZED),
+    )
+
 
-        send_activity_email(
-            subject=f"{author_name} published a new post",
-            message=message,
-            recipient_list=[follower_email],
-        )
+@receiver(post_save, sender=Post)
+def create_new_post_notifications(sender, instance, created, **kwargs):
+    if created:
+        FanOutJob.objects.create(kind=FanOutJob.KIND_NOTIFICATION, author_id=instance.author_id, post=instance)
+
+
+@receiver(post_save, sender=PostLike)
+def create_post_like_notification(sender, instance, created, **kwargs):
+    if not created:
+        return
+
+    post_author_id = instance.post.author_id
+    if post_author_id == instance.user_id:
+        return
+    create_notification(post_author_id, Notification.KIND_LIKE, instance.user_id, post_id=instance.post_id)
+
+
+@receiver(post_save, sender=Comment)
+def create_post_comment_notification(sender, instance, created, **kwargs):
+    if not created:
+        return
+
+    post_author_id = instance.post.author_id
+    if post_author_id == instance.author_id:
+        return
+    create_notification(
+        post_author_id,
+        Notification.KIND_COMMENT,
+        instance.author_id,
+        post_id=instance.post_id,
+        comment_id=instance.pk,
+    )
 
 
 @receiver(post_save, sender=PostLike)
@@ -49,10 +98,13 @@ def send_post_like_email_notification(sender, instance, created, **kwargs):
         return
 
     liker_name = get_display_text(instance.user)
-    send_activity_email(
+    queue_activity_email(
+        recipient=post_author,
+        kind=EmailDigestWindow.KIND_LIKE,
+        actor=instance.user,
+        post=instance.post,
         subject=f"{liker_name} liked your post",
         message=f'{liker_name} liked your post "{instance.post.name}".',
-        recipient_list=[post_author.email],
     )
 
 
@@ -76,8 +128,226 @@ def send_post_comment_email_notification(sender, instance, created, **kwargs):
     if comment_text:
         message += f'\n\nComment:\n"{comment_text}"'
 
-    send_activity_email(
+    queue_activity_email(
+        recipient=post_author,
+        kind=EmailDigestWindow.KIND_COMMENT,
+        actor=commenter,
+        post=instance.post,
         subject=f"{commenter_name} commented on your post",
         message=message,
-        recipient_list=[post_author.email],
     )
+
+
+@receiver(post_save, sender=Post)
+def update_post_search_index(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        index_post(instance, tag_names=[])
+        return
+    # Tags are indexed by the m2m_changed receiver; only re-index for text edits.
+    if not (instance.has_field_changed("name", update_fields) or instance.has_field_changed("content", update_fields)):
+        return
+    index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_deleted_post_from_search_index(sender, instance, **kwargs):
+    remove_post_from_index(instance.pk)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def update_search_index_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        instance._cleared_post_ids = list(instance.posts.values_list("id", flat=True))
+        return
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        index_post(instance)
+        return
+
+    if action == "post_clear":
+        post_ids = getattr(instance, "_cleared_post_ids", [])
+    else:
+        post_ids = pk_set
+    index_posts_by_id(post_ids)
+
+
+@receiver(post_save, sender=Tag)
+def update_search_index_on_tag_rename(sender, instance, created, update_fields=None, **kwargs):
+    if created or not instance.has_field_changed("name", update_fields):
+        return
+    index_posts_by_id(list(instance.posts.values_list("id", flat=True)))
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_posts_of_deleted_tag(sender, instance, **kwargs):
+    instance._deleted_tag_posts = list(instance.posts.values_list("id", "author_id"))
+
+
+@receiver(post_delete, sender=Tag)
+def update_search_index_on_tag_delete(sender, instance, **kwargs):
+    posts = getattr(instance, "_deleted_tag_posts", [])
+    index_posts_by_id([post_id for post_id, _ in posts])
+    invalidate_tagged_posts(posts)
+
+
+@receiver(post_save, sender=PostLike)
+def increment_post_like_count(sender, instance, created, **kwargs):
+    if created:
+        adjust_counter(Post, instance.post_id, "like_count", 1, touch_field="counters_updated_at")
+
+
+@receiver(post_delete, sender=PostLike)
+def decrement_post_like_count(sender, instance, origin=None, **kwargs):
+    if is_deleted_with_post(instance, origin):
+        return
+    adjust_counter(Post, instance.post_id, "like_count", -1, touch_field="counters_updated_at")
+
+
+@receiver(post_save, sender=Comment)
+def increment_post_comment_count(sender, instance, created, **kwargs):
+    if created:
+        adjust_counter(Post, instance.post_id, "comment_count", 1, touch_field="counters_updated_at")
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_post_comment_count(sender, instance, origin=None, **kwargs):
+    if is_deleted_with_post(instance, origin):
+        return
+    adjust_counter(Post, instance.post_id, "comment_count", -1, touch_field="counters_updated_at")
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def remember_tag_links_before_change(sender, instance, action, reverse, pk_set, **kwargs):
+    # pk_set holds every requested id on remove, linked or not, so look up
+    # which links actually exist before they go.
+    if action == "pre_remove":
+        if reverse:
+            instance._removed_post_ids = list(
+                sender.objects.filter(tag_id=instance.pk, post_id__in=pk_set).values_list("post_id", flat=True)
+            )
+        else:
+            instance._removed_tag_ids = list(
+                sender.objects.filter(post_id=instance.pk, tag_id__in=pk_set).values_list("tag_id", flat=True)
+            )
+    elif action == "pre_clear" and not reverse:
+        instance._cleared_tag_ids = list(
+            sender.objects.filter(post_id=instance.pk).values_list("tag_id", flat=True)
+        )
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def update_tag_post_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "post_add":
+        if reverse:
+            deltas = {instance.pk: len(pk_set)}
+        else:
+            deltas = dict.fromkeys(pk_set, 1)
+        adjust_tag_post_counts(deltas)
+        record_tag_activity(deltas)
+        return
+
+    if action == "post_remove":
+        if reverse:
+            deltas = {instance.pk: -len(getattr(instance, "_removed_post_ids", []))}
+        else:
+            deltas = dict.fromkeys(getattr(instance, "_removed_tag_ids", []), -1)
+        adjust_tag_post_counts(deltas)
+    elif action == "post_clear":
+        if reverse:
+            deltas = {instance.pk: -len(getattr(instance, "_cleared_post_ids", []))}
+        else:
+            deltas = dict.fromkeys(getattr(instance, "_cleared_tag_ids", []), -1)
+        adjust_tag_post_counts(deltas)
+
+
+@receiver(pre_delete, sender=Post)
+def decrement_tag_post_counts_on_post_delete(sender, instance, **kwargs):
+    # Deleting a post removes its tag links by cascade, without m2m_changed.
+    tag_ids = Post.tags.through.objects.filter(post_id=instance.pk).values_list("tag_id", flat=True)
+    adjust_tag_post_counts(dict.fromkeys(tag_ids, -1))
+
+
+@receiver(post_save, sender=Post)
+def add_post_to_follower_timelines(sender, instance, created, **kwargs):
+    if created:
+        fan_out_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline_on_follow(sender, instance, created, **kwargs):
+    if created:
+        backfill_timeline(instance.follower_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline_on_unfollow(sender, instance, **kwargs):
+    prune_timeline(instance.follower_id, instance.following_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_cached_post_responses(sender, instance, **kwargs):
+    invalidate_on_commit("post", instance.pk)
+    invalidate_on_commit("user-posts", instance.author_id)
+
+
+def get_tag_change_post_ids(instance, action, reverse, pk_set):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return []
+
+    if not reverse:
+        return [instance.pk]
+    if action == "post_clear":
+        return getattr(instance, "_cleared_post_ids", [])
+    return list(pk_set)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_cached_responses_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    for post_id in get_tag_change_post_ids(instance, action, reverse, pk_set):
+        invalidate_on_commit("post", post_id)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def touch_posts_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    post_ids = get_tag_change_post_ids(instance, action, reverse, pk_set)
+    if not post_ids:
+        return
+
+    now = timezone.now()
+    Post.objects.filter(pk__in=post_ids).update(updated_at=now)
+    if not reverse:
+        instance.updated_at = now
+
+
+def invalidate_tagged_posts(posts):
+    # Post bodies and author post lists both show tag names.
+    for post_id, author_id in posts:
+        invalidate_on_commit("post", post_id)
+    for author_id in {author_id for _, author_id in posts}:
+        invalidate_on_commit("user-posts", author_id)
+
+
+@receiver(post_save, sender=Tag)
+def touch_posts_on_tag_rename(sender, instance, created, update_fields=None, **kwargs):
+    if created or not instance.has_field_changed("name", update_fields):
+        return
+    posts = Post.objects.filter(tags=instance)
+    invalidate_tagged_posts(list(posts.order_by().values_list("id", "author_id")))
+    posts.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=PostLike)
+@receiver(post_delete, sender=PostLike)
+def invalidate_cached_responses_on_like_change(sender, instance, **kwargs):
+    invalidate_on_commit("post", instance.post_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_cached_responses_on_comment_change(sender, instance, **kwargs):
+    invalidate_on_commit("post", instance.post_id)
+    invalidate_on_commit("post-comments", instance.post_id)
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, F, Sum, Value, When
+from django.utils import timezone
+
+from apps.common.counters import adjust_counters
+from .models import Tag, TagActivity
+
+
+def get_trending_window_hours():
+    return max(getattr(settings, "TAG_TRENDING_WINDOW_HOURS", 24), 1)
+
+
+def get_activity_bucket(now=None):
+    if now is None:
+        now = timezone.now()
+    return now.replace(minute=0, second=0, microsecond=0)
+
+
+def get_trending_cutoff(now=None):
+    return get_activity_bucket(now) - timedelta(hours=get_trending_window_hours() - 1)
+
+
+def adjust_tag_post_counts(deltas_by_tag_id):
+    return adjust_counters(Tag, deltas_by_tag_id, "post_count")
+
+
+def record_tag_activity(counts_by_tag_id, now=None):
+    counts = {}
+    for tag_id, count in counts_by_tag_id.items():
+        if count > 0:
+            counts[tag_id] = count
+    if not counts:
+        return
+
+    bucket_start = get_activity_bucket(now)
+    TagActivity.objects.bulk_create(
+        [TagActivity(tag_id=tag_id, bucket_start=bucket_start) for tag_id in counts],
+        ignore_conflicts=True,
+    )
+
+    whens = []
+    for tag_id, count in counts.items():
+        whens.append(When(tag_id=tag_id, then=Value(count)))
+    TagActivity.objects.filter(tag_id__in=list(counts), bucket_start=bucket_start).update(
+        count=F("count") + Case(*whens, default=Value(0))
+    )
+
+    # Old buckets only need dropping once per bucket; the first writer of
+    # each hour does it.
+    if cache.add(f"tag-activity-pruned:{bucket_start.isoformat()}", 1, 3600):
+        prune_tag_activity(now)
+
+
+def prune_tag_activity(now=None):
+    deleted, _ = TagActivity.objects.filter(bucket_start__lt=get_trending_cutoff(now)).delete()
+    return deleted
+
+
+def get_trending_tags(limit=None):
+    if limit is None:
+        limit = getattr(settings, "TAG_TRENDING_LIMIT", 20)
+
+    return (
+        Tag.objects.filter(activity__bucket_start__gte=get_trending_cutoff())
+        .annotate(trending_score=Sum("activity__count"))
+        .order_by("-trending_score", "-post_count", "name")[:limit]
+    )
@@ -1,16 +1,35 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
 from django.contrib.auth import get_user_model
 from django.core import mail
+from django.core.management import call_command
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from .models import Post, PostLike, Tag
+from .models import Comment, Post, PostLike, Tag, TagActivity, TimelineEntry
+from .timeline import fan_out_posts
+from apps.common.response_cache import get_response_cache
+from apps.media.blobs import get_image_referrers
+from apps.media.models import ImageBlob
 from apps.users.models import Follow
+from apps.notifications.fanout import process_fan_out_jobs
+from apps.notifications.models import EmailOutbox, FanOutJob
+from apps.notifications.outbox import process_email_outbox
 
 
 User = get_user_model()
+# Just enough of a JPEG for the header probe: SOI and a 32x16 frame header.
+JPEG_32X16 = b"\xff\xd8\xff\xc0\x00\x11\x08\x00\x10\x00\x20\x03" + b"\x00" * 9 + b"\xff\xd9"
+FILE_CACHE_DIR = tempfile.mkdtemp(prefix="blog-response-cache-")
 
 
 class PostTagAPITests(APITestCase):
@@ -53,7 +72,7 @@ class PostTagAPITests(APITestCase):
 
     @override_settings(ALLOWED_HOSTS=["example.com"])
     def test_create_post_accepts_optional_file_and_sets_image_url(self):
-        image = SimpleUploadedFile("post.jpg", b"fake-image-content", content_type="image/jpeg")
+        image = SimpleUploadedFile("post.jpg", JPEG_32X16, content_type="image/jpeg")
         payload = {
             "name": "Post with uploaded image",
             "content": "Body",
@@ -73,7 +92,7 @@ class PostTagAPITests(APITestCase):
     @override_settings(ALLOWED_HOSTS=["example.com"])
     def test_patch_post_accepts_optional_file_and_updates_image_url(self):
         post = Post.objects.create(author=self.user, name="First", content="Body")
-        image = SimpleUploadedFile("updated.jpg", b"fake-image-content", content_type="image/jpeg")
+        image = SimpleUploadedFile("updated.jpg", JPEG_32X16, content_type="image/jpeg")
 
         response = self.client.patch(
             reverse("post-detail", kwargs={"pk": post.id}),
@@ -184,19 +203,86 @@ class PostQueryFeatureTests(APITestCase):
         response_by_tag = self.client.get(reverse("post-list-create"), {"search": "python"})
 
         self.assertEqual(response_by_content.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response_by_content.data), 1)
-        self.assertEqual(response_by_content.data[0]["id"], self.post_1.id)
+        self.assertEqual(len(response_by_content.data["results"]), 1)
+        self.assertEqual(response_by_content.data["results"][0]["id"], self.post_1.id)
 
         self.assertEqual(response_by_tag.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response_by_tag.data), 1)
-        self.assertEqual(response_by_tag.data[0]["id"], self.post_2.id)
+        self.assertEqual(len(response_by_tag.data["results"]), 1)
+        self.assertEqual(response_by_tag.data["results"][0]["id"], self.post_2.id)
+
+    def test_post_search_matches_name_and_ranks_by_relevance(self):
+        Post.objects.create(
+            author=self.user,
+            name="Weekend notes",
+            content="Mentions django once",
+        )
+
+        response = self.client.get(reverse("post-list-create"), {"search": "django"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(response.data["results"][0]["id"], self.post_1.id)
+
+        first_page = self.client.get(reverse("post-list-create"), {"search": "django", "page_size": 1})
+        second_page = self.client.get(first_page.data["next"])
+        self.assertEqual(
+            [item["id"] for item in first_page.data["results"] + second_page.data["results"]],
+            [item["id"] for item in response.data["results"]],
+        )
+        self.assertIsNone(second_page.data["next"])
+
+    def test_post_search_returns_highlighted_snippets_when_requested(self):
+        response = self.client.get(
+            reverse("post-list-create"),
+            {"search": "backend", "highlight": "true"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIn("<mark>backend</mark>", response.data["results"][0]["search_snippet"])
+
+    def test_post_search_snippet_escapes_post_html(self):
+        Post.objects.create(
+            author=self.user,
+            name="Markup",
+            content='<img src=x onerror="alert(1)"> zebracorn notes',
+        )
+
+        response = self.client.get(reverse("post-list-create"), {"search": "zebracorn", "highlight": "true"})
+
+        snippet = response.data["results"][0]["search_snippet"]
+        self.assertNotIn("<img", snippet)
+        self.assertIn("&lt;img src=x onerror=&quot;alert(1)&quot;&gt;", snippet)
+        self.assertIn("<mark>zebracorn</mark>", snippet)
+
+    def test_post_search_index_follows_edits_tag_changes_and_deletes(self):
+        self.post_2.content = "Now about gardening"
+        self.post_2.save()
+        self.post_2.tags.clear()
+
+        response = self.client.get(reverse("post-list-create"), {"search": "python"})
+        self.assertEqual([item["id"] for item in response.data["results"]], [self.post_2.id])
+
+        response = self.client.get(reverse("post-list-create"), {"search": "gardening"})
+        self.assertEqual([item["id"] for item in response.data["results"]], [self.post_2.id])
+
+        self.django_tag.posts.add(self.post_2)
+        response = self.client.get(reverse("post-list-create"), {"search": "django"})
+        self.assertCountEqual(
+            [item["id"] for item in response.data["results"]],
+            [self.post_1.id, self.post_2.id],
+        )
+
+        self.post_2.delete()
+        response = self.client.get(reverse("post-list-create"), {"search": "gardening"})
+        self.assertEqual(response.data["results"], [])
 
     def test_post_list_can_filter_by_category(self):
         response = self.client.get(reverse("post-list-create"), {"category": "tech"})
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["id"], self.post_1.id)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["id"], self.post_1.id)
 
     def test_liked_posts_are_retrievable_for_user(self):
         response = self.client.get(
@@ -204,8 +290,28 @@ class PostQueryFeatureTests(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["id"], self.post_1.id)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["id"], self.post_1.id)
+
+    def test_liked_posts_are_ordered_by_like_time_and_expose_liked_at(self):
+        older_post = Post.objects.create(author=self.user, name="Older", content="Body")
+        like = PostLike.objects.create(post=older_post, user=self.other_user)
+
+        response = self.client.get(
+            reverse("user-liked-post-list", kwargs={"user_id": self.other_user.id}),
+            {"page_size": 1},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["id"], older_post.id)
+        self.assertEqual(
+            response.data["results"][0]["liked_at"],
+            like.created_at.isoformat().replace("+00:00", "Z"),
+        )
+
+        next_page = self.client.get(response.data["next"])
+        self.assertEqual([item["id"] for item in next_page.data["results"]], [self.post_1.id])
+        self.assertIsNone(next_page.data["next"])
 
     def test_following_posts_are_retrievable_for_user(self):
         Follow.objects.create(follower=self.other_user, following=self.user)
@@ -214,8 +320,753 @@ class PostQueryFeatureTests(APITestCase):
         response = self.client.get(reverse("following-post-list"))
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["id"], self.post_1.id)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["id"], self.post_1.id)
+
+
+class PostPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="page-user",
+            email="page-user@example.com",
+            password="strong-pass-123",
+        )
+        self.posts = []
+        for index in range(5):
+            self.posts.append(
+                Post.objects.create(author=self.user, name=f"Post {index}", content="Body")
+            )
+
+    def test_post_list_walks_pages_with_next_and_previous_cursors(self):
+        seen_ids = []
+        url = reverse("post-list-create") + "?page_size=2"
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                seen_ids.extend(item["id"] for item in response.data["results"])
+                last_response = response
+                url = response.data["next"]
+
+        expected_ids = [post.id for post in reversed(self.posts)]
+        self.assertEqual(seen_ids, expected_ids)
+        for query in queries.captured_queries:
+            self.assertNotIn("OFFSET", query["sql"].upper())
+
+        previous_response = self.client.get(last_response.data["previous"])
+        self.assertEqual(
+            [item["id"] for item in previous_response.data["results"]],
+            expected_ids[2:4],
+        )
+
+    def test_comment_list_is_paginated_oldest_first(self):
+        post = self.posts[0]
+        for index in range(3):
+            Comment.objects.create(post=post, author=self.user, content=f"Comment {index}")
+
+        url = reverse("post-comment-list-create", kwargs={"post_id": post.id})
+        first_page = self.client.get(url, {"page_size": 2})
+        second_page = self.client.get(first_page.data["next"])
+
+        self.assertEqual(
+            [item["content"] for item in first_page.data["results"]],
+            ["Comment 0", "Comment 1"],
+        )
+        self.assertEqual(
+            [item["content"] for item in second_page.data["results"]],
+            ["Comment 2"],
+        )
+        self.assertIsNone(second_page.data["next"])
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(reverse("post-list-create"), {"cursor": "not-a-cursor"})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data["message"], "Invalid cursor.")
+
+
+class PostCounterTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username="counter-author",
+            email="counter-author@example.com",
+            password="strong-pass-123",
+        )
+        self.reader = User.objects.create_user(
+            username="counter-reader",
+            email="counter-reader@example.com",
+            password="strong-pass-123",
+        )
+        self.post = Post.objects.create(author=self.author, name="Counted", content="Body")
+
+    def test_like_and_comment_counters_follow_creates_and_deletes(self):
+        self.client.force_authenticate(user=self.reader)
+        like_url = reverse("post-like-toggle", kwargs={"post_id": self.post.id})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(like_url)
+            Comment.objects.create(post=self.post, author=self.reader, content="First")
+            comment = Comment.objects.create(post=self.post, author=self.author, content="Second")
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (1, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(like_url)
+            comment.delete()
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (0, 1))
+
+        response = self.client.get(reverse("post-detail", kwargs={"pk": self.post.id}))
+        self.assertEqual(response.data["likes_count"], 0)
+        self.assertEqual(response.data["comments_count"], 1)
+
+    def test_counters_are_decremented_when_actor_is_deleted(self):
+        PostLike.objects.create(post=self.post, user=self.reader)
+        Comment.objects.create(post=self.post, author=self.reader, content="Bye")
+
+        self.reader.delete()
+
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (0, 0))
+
+    def test_saving_a_stale_post_keeps_counters(self):
+        stale_post = Post.objects.get(pk=self.post.pk)
+        PostLike.objects.create(post=self.post, user=self.reader)
+
+        stale_post.name = "Renamed"
+        stale_post.save()
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.name, "Renamed")
+        self.assertEqual(self.post.like_count, 1)
+
+    def test_post_list_query_count_does_not_grow_with_page_size(self):
+        def count_list_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse("post-list-create"))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        small_page_queries = count_list_queries()
+        for index in range(5):
+            post = Post.objects.create(author=self.reader, name=f"Extra {index}", content="Body")
+            PostLike.objects.create(post=post, user=self.author)
+        self.assertEqual(count_list_queries(), small_page_queries)
+
+    def test_reconcile_post_counters_repairs_drift(self):
+        PostLike.objects.create(post=self.post, user=self.reader)
+        Post.objects.filter(pk=self.post.pk).update(like_count=7, comment_count=3)
+
+        call_command("reconcile_post_counters", "--batch-size", "1", stdout=StringIO())
+
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (1, 0))
+
+
+class HomeTimelineTests(APITestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(
+            username="timeline-reader",
+            email="timeline-reader@example.com",
+            password="strong-pass-123",
+        )
+        self.author = User.objects.create_user(
+            username="timeline-author",
+            email="timeline-author@example.com",
+            password="strong-pass-123",
+        )
+        self.client.force_authenticate(user=self.reader)
+
+    def get_timeline_ids(self):
+        response = self.client.get(reverse("following-post-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["id"] for item in response.data["results"]]
+
+    def test_new_posts_are_fanned_out_and_removed_on_delete_and_unfollow(self):
+        Follow.objects.create(follower=self.reader, following=self.author)
+        first = Post.objects.create(author=self.author, name="First", content="Body")
+        second = Post.objects.create(author=self.author, name="Second", content="Body")
+
+        self.assertEqual(TimelineEntry.objects.filter(user=self.reader).count(), 2)
+        self.assertEqual(self.get_timeline_ids(), [second.id, first.id])
+
+        second.delete()
+        self.assertEqual(self.get_timeline_ids(), [first.id])
+
+        Follow.objects.get(follower=self.reader, following=self.author).delete()
+        self.assertEqual(self.get_timeline_ids(), [])
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader).exists())
+
+    @override_settings(TIMELINE_MAX_LENGTH=2)
+    def test_timeline_is_capped_per_user(self):
+        Follow.objects.create(follower=self.reader, following=self.author)
+        posts = []
+        for index in range(4):
+            posts.append(Post.objects.create(author=self.author, name=f"Post {index}", content="Body"))
+
+        self.assertEqual(self.get_timeline_ids(), [posts[3].id, posts[2].id])
+
+    @override_settings(TIMELINE_MAX_LENGTH=2, TIMELINE_FANOUT_BATCH_SIZE=4)
+    def test_bulk_fan_out_caps_entries_per_batch_and_trims_every_long_timeline(self):
+        followers = [self.reader]
+        for index in range(2):
+            followers.append(
+                User.objects.create_user(
+                    username=f"timeline-follower-{index}",
+                    email=f"timeline-follower-{index}@example.com",
+                    password="strong-pass-123",
+                )
+            )
+        for follower in followers:
+            Follow.objects.create(follower=follower, following=self.author)
+        posts = []
+        for index in range(3):
+            posts.append(Post.objects.create(author=self.author, name=f"Bulk {index}", content="Body"))
+        TimelineEntry.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(fan_out_posts(self.author.id, posts), 9)
+
+        inserts = []
+        for query in queries.captured_queries:
+            if query["sql"].startswith("INSERT") and '"posts_timelineentry"' in query["sql"]:
+                inserts.append(query)
+        self.assertEqual(len(inserts), 3)
+        for follower in followers:
+            self.assertEqual(TimelineEntry.objects.filter(user=follower).count(), 2)
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=1)
+    def test_high_follower_authors_are_merged_at_read_time(self):
+        regular_author = User.objects.create_user(
+            username="timeline-regular",
+            email="timeline-regular@example.com",
+            password="strong-pass-123",
+        )
+        other_reader = User.objects.create_user(
+            username="timeline-other",
+            email="timeline-other@example.com",
+            password="strong-pass-123",
+        )
+        Follow.objects.create(follower=self.reader, following=self.author)
+        Follow.objects.create(follower=self.reader, following=regular_author)
+        Follow.objects.create(follower=other_reader, following=regular_author)
+
+        celebrity_post = Post.objects.create(author=self.author, name="Celebrity", content="Body")
+        regular_post = Post.objects.create(author=regular_author, name="Regular", content="Body")
+
+        self.assertFalse(TimelineEntry.objects.filter(post=celebrity_post).exists())
+        self.assertEqual(self.get_timeline_ids(), [regular_post.id, celebrity_post.id])
+
+
+class ResponseCacheTestMixin:
+    def setUp(self):
+        get_response_cache().clear()
+        self.author = User.objects.create_user(
+            username="cache-author",
+            email="cache-author@example.com",
+            password="strong-pass-123",
+        )
+        self.reader = User.objects.create_user(
+            username="cache-reader",
+            email="cache-reader@example.com",
+            password="strong-pass-123",
+        )
+        self.post = Post.objects.create(author=self.author, name="Cached", content="Body")
+
+    def test_post_detail_is_cached_until_the_post_is_liked(self):
+        url = reverse("post-detail", kwargs={"pk": self.post.id})
+
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+        cached_response = self.client.get(url)
+        self.assertEqual(cached_response["X-Cache"], "HIT")
+        self.assertEqual(cached_response.data["likes_count"], 0)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            PostLike.objects.create(post=self.post, user=self.reader)
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+        for callback in callbacks:
+            callback()
+
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["likes_count"], 1)
+
+    def test_author_rename_invalidates_their_posts(self):
+        url = reverse("user-post-list", kwargs={"user_id": self.author.id})
+        self.client.get(url)
+
+        self.author.username = "renamed-author"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.save()
+
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["author_username"], "renamed-author")
+
+    def test_comment_list_and_user_detail_are_invalidated_by_writes(self):
+        comments_url = reverse("post-comment-list-create", kwargs={"post_id": self.post.id})
+        user_url = reverse("user-public-detail", kwargs={"user_id": self.author.id})
+        self.client.get(comments_url)
+        self.client.get(user_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, author=self.reader, content="Hello")
+            Follow.objects.create(follower=self.reader, following=self.author)
+
+        comments_response = self.client.get(comments_url)
+        user_response = self.client.get(user_url)
+        self.assertEqual(comments_response["X-Cache"], "MISS")
+        self.assertEqual(len(comments_response.data["results"]), 1)
+        self.assertEqual(user_response["X-Cache"], "MISS")
+        self.assertEqual(user_response.data["followers_count"], 1)
+
+    def test_tag_rename_and_delete_invalidate_tagged_posts(self):
+        tag = Tag.objects.create(name="cached")
+        self.post.tags.add(tag)
+        url = reverse("post-detail", kwargs={"pk": self.post.id})
+        self.client.get(url)
+
+        tag.name = "renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.save()
+
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["tags"], ["renamed"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.delete()
+
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["tags"], [])
+
+    def test_hit_and_miss_counters_are_exposed_to_staff(self):
+        url = reverse("post-detail", kwargs={"pk": self.post.id})
+        self.client.get(url)
+        self.client.get(url)
+        self.client.get(url)
+
+        self.client.force_authenticate(user=self.reader)
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.reader.is_staff = True
+        self.reader.save()
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        stats = response.data["response_cache"]["post-detail"]
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 1))
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "response-cache-tests",
+        }
+    }
+)
+class LocMemResponseCacheTests(ResponseCacheTestMixin, APITestCase):
+    pass
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": FILE_CACHE_DIR,
+        }
+    }
+)
+class FileBasedResponseCacheTests(ResponseCacheTestMixin, APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.addClassCleanup(shutil.rmtree, FILE_CACHE_DIR, ignore_errors=True)
+
+
+class PostBulkCreateTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="bulk-author",
+            email="bulk-author@example.com",
+            password="strong-pass-123",
+        )
+        self.follower = User.objects.create_user(
+            username="bulk-follower",
+            email="bulk-follower@example.com",
+            password="strong-pass-123",
+        )
+        Follow.objects.create(follower=self.follower, following=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("post-bulk-create")
+
+    def build_items(self, count, prefix):
+        items = []
+        for index in range(count):
+            items.append(
+                {
+                    "name": f"{prefix} post {index}",
+                    "content": "Imported body",
+                    "tag_names": ["imported", f"{prefix}-{index}"],
+                }
+            )
+        return items
+
+    def test_bulk_create_inserts_posts_tags_and_side_tables(self):
+        Tag.objects.create(name="imported")
+
+        response = self.client.post(self.url, self.build_items(3, "first"), format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 3)
+        self.assertEqual(response.data["results"][0]["post"]["name"], "first post 0")
+        self.assertEqual(response.data["results"][0]["post"]["tags"], ["first-0", "imported"])
+        self.assertEqual(Tag.objects.filter(name="imported").count(), 1)
+        self.assertEqual(Post.objects.filter(author=self.user).count(), 3)
+        self.assertEqual(TimelineEntry.objects.filter(user=self.follower).count(), 3)
+
+        search_response = self.client.get(reverse("post-list-create"), {"search": "first-2"})
+        self.assertEqual(len(search_response.data["results"]), 1)
+
+    def test_bulk_created_images_are_found_as_references(self):
+        blob = ImageBlob.objects.create(digest="d" * 64, path=f"uploads/dd/{'d' * 64}.png", size=10, width=8, height=4)
+        items = self.build_items(1, "image")
+        items[0]["image"] = f"https://example.com/media/{blob.path}"
+
+        response = self.client.post(self.url, items, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        post = Post.objects.get(author=self.user)
+        self.assertEqual((post.image_path, post.image_width, post.image_height), (blob.path, 8, 4))
+        posts, _ = get_image_referrers(blob.path)
+        self.assertEqual(list(posts), [post])
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+
+    def test_bulk_create_reports_per_item_errors(self):
+        items = self.build_items(2, "mixed")
+        items.insert(1, {"name": "   ", "content": "Body"})
+
+        response = self.client.post(self.url, items, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual((response.data["created"], response.data["failed"]), (2, 1))
+        self.assertTrue(response.data["results"][0]["success"])
+        self.assertFalse(response.data["results"][1]["success"])
+        self.assertIn("name", response.data["results"][1]["errors"])
+        self.assertEqual(response.data["results"][2]["post"]["name"], "mixed post 1")
+
+    def test_bulk_create_rejects_non_list_payload(self):
+        response = self.client.post(self.url, {"name": "Single"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Post.objects.count(), 0)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        self.client.post(self.url, self.build_items(1, "warm-up"), format="json")
+        with CaptureQueriesContext(connection) as small_batch:
+            self.client.post(self.url, self.build_items(2, "small"), format="json")
+        with CaptureQueriesContext(connection) as large_batch:
+            self.client.post(self.url, self.build_items(20, "large"), format="json")
+
+        self.assertEqual(len(small_batch.captured_queries), len(large_batch.captured_queries))
+
+
+class TagCatalogTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="tag-author",
+            email="tag-author@example.com",
+            password="strong-pass-123",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def create_post(self, name, tag_names):
+        response = self.client.post(
+            reverse("post-list-create"),
+            {"name": name, "content": "Body", "tag_names": tag_names},
+            format="json",
+        )
+        return Post.objects.get(id=response.data["id"])
+
+    def get_post_counts(self):
+        return dict(Tag.objects.values_list("name", "post_count"))
+
+    def test_post_count_follows_tag_changes(self):
+        first = self.create_post("First", ["django", "api"])
+        second = self.create_post("Second", ["django"])
+        self.assertEqual(self.get_post_counts(), {"django": 2, "api": 1})
+
+        self.client.patch(
+            reverse("post-detail", kwargs={"pk": first.id}),
+            {"tag_names": ["api", "rest"]},
+            format="json",
+        )
+        self.assertEqual(self.get_post_counts(), {"django": 1, "api": 1, "rest": 1})
+
+        second.tags.remove(Tag.objects.get(name="api"))
+        Tag.objects.get(name="rest").posts.clear()
+        self.assertEqual(self.get_post_counts(), {"django": 1, "api": 1, "rest": 0})
+
+        first.delete()
+        self.assertEqual(self.get_post_counts(), {"django": 1, "api": 0, "rest": 0})
+
+    def test_tag_list_is_ordered_by_post_count_and_paginated(self):
+        self.create_post("One", ["python", "django"])
+        self.create_post("Two", ["python"])
+        self.create_post("Three", ["python", "api"])
+
+        response = self.client.get(reverse("tag-list"), {"page_size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(tag["name"], tag["post_count"]) for tag in response.data["results"]],
+            [("python", 3), ("api", 1)],
+        )
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual([tag["name"] for tag in response.data["results"]], ["django"])
+
+        response = self.client.get(reverse("tag-list"), {"sort": "name"})
+        self.assertEqual([tag["name"] for tag in response.data["results"]], ["api", "django", "python"])
+
+    def test_trending_counts_recent_tagging_events(self):
+        self.create_post("One", ["old", "new"])
+        self.create_post("Two", ["new"])
+        TagActivity.objects.filter(tag__name="old").update(
+            bucket_start=timezone.now() - timedelta(days=3)
+        )
+
+        response = self.client.get(reverse("tag-trending-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(tag["name"], tag["trending_score"]) for tag in response.data],
+            [("new", 2)],
+        )
+
+    def test_tag_post_list_uses_keyset_pagination(self):
+        for index in range(3):
+            self.create_post(f"Tagged {index}", ["keyset"])
+        self.create_post("Untagged", [])
+
+        url = reverse("tag-post-list", kwargs={"name": "keyset"})
+        first_page = self.client.get(url, {"page_size": 2})
+        with CaptureQueriesContext(connection) as queries:
+            second_page = self.client.get(first_page.data["next"])
+
+        self.assertEqual([post["name"] for post in first_page.data["results"]], ["Tagged 2", "Tagged 1"])
+        self.assertEqual([post["name"] for post in second_page.data["results"]], ["Tagged 0"])
+        for query in queries.captured_queries:
+            self.assertNotIn("OFFSET", query["sql"].upper())
+
+        missing = self.client.get(reverse("tag-post-list", kwargs={"name": "missing"}))
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+
+
+    def test_saving_tag_without_renaming_does_not_touch_its_posts(self):
+        post = self.create_post("Tracked", ["python"])
+        tag = Tag.objects.get(name="python")
+        updated_at = Post.objects.get(pk=post.pk).updated_at
+
+        with CaptureQueriesContext(connection) as queries:
+            tag.save()
+        self.assertEqual(len(queries.captured_queries), 1)
+        self.assertEqual(Post.objects.get(pk=post.pk).updated_at, updated_at)
+
+        tag.name = "python3"
+        tag.save()
+        self.assertGreater(Post.objects.get(pk=post.pk).updated_at, updated_at)
+        response = self.client.get(reverse("post-list-create"), {"search": "python3"})
+        self.assertEqual([item["id"] for item in response.data["results"]], [post.id])
+
+
+class ViewerFlagTests(APITestCase):
+    def setUp(self):
+        get_response_cache().clear()
+        self.author = User.objects.create_user(
+            username="flag-author",
+            email="flag-author@example.com",
+            password="strong-pass-123",
+        )
+        self.other_author = User.objects.create_user(
+            username="flag-other",
+            email="flag-other@example.com",
+            password="strong-pass-123",
+        )
+        self.viewer = User.objects.create_user(
+            username="flag-viewer",
+            email="flag-viewer@example.com",
+            password="strong-pass-123",
+        )
+        self.liked_post = Post.objects.create(author=self.author, name="Liked", content="Body")
+        self.other_post = Post.objects.create(author=self.other_author, name="Other", content="Body")
+        PostLike.objects.create(post=self.liked_post, user=self.viewer)
+        Follow.objects.create(follower=self.viewer, following=self.author)
+
+    def get_flags(self, results):
+        flags = {}
+        for item in results:
+            flags[item["name"]] = (item["liked_by_me"], item["author_followed_by_me"])
+        return flags
+
+    def test_post_list_flags_use_one_query_each_per_page(self):
+        self.client.force_authenticate(user=self.viewer)
+        url = reverse("post-list-create")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(
+            self.get_flags(response.data["results"]),
+            {"Liked": (True, True), "Other": (False, False)},
+        )
+        like_queries = [query for query in queries.captured_queries if "posts_postlike" in query["sql"]]
+        follow_queries = [query for query in queries.captured_queries if "users_follow" in query["sql"]]
+        # One lookup each for the ETag and one each for the page itself.
+        self.assertEqual((len(like_queries), len(follow_queries)), (2, 2))
+
+    def test_cached_responses_are_flagged_per_viewer(self):
+        url = reverse("user-post-list", kwargs={"user_id": self.author.id})
+        detail_url = reverse("post-detail", kwargs={"pk": self.liked_post.id})
+
+        anonymous = self.client.get(url)
+        self.assertEqual(self.get_flags(anonymous.data["results"]), {"Liked": (False, False)})
+
+        self.client.force_authenticate(user=self.viewer)
+        response = self.client.get(url)
+        detail_response = self.client.get(detail_url)
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(self.get_flags(response.data["results"]), {"Liked": (True, True)})
+        self.assertTrue(detail_response.data["liked_by_me"])
+
+        self.client.force_authenticate(user=None)
+        response = self.client.get(detail_url)
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertFalse(response.data["liked_by_me"])
+
+    def test_viewer_flags_endpoint_returns_flags_in_request_order(self):
+        self.client.force_authenticate(user=self.viewer)
+        url = reverse("post-viewer-flags")
+
+        response = self.client.get(url, {"ids": f"{self.other_post.id},{self.liked_post.id},999999"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            [
+                {"id": self.other_post.id, "liked_by_me": False, "author_followed_by_me": False},
+                {"id": self.liked_post.id, "liked_by_me": True, "author_followed_by_me": True},
+            ],
+        )
+        self.assertEqual(self.client.get(url, {"ids": "abc"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_etag_changes_when_the_viewer_follows_the_author(self):
+        self.client.force_authenticate(user=self.viewer)
+        url = reverse("post-detail", kwargs={"pk": self.other_post.id})
+        etag = self.client.get(url)["ETag"]
+
+        Follow.objects.create(follower=self.viewer, following=self.other_author)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["author_followed_by_me"])
+
+
+class ConditionalRequestTests(APITestCase):
+    def setUp(self):
+        get_response_cache().clear()
+        self.author = User.objects.create_user(
+            username="etag-author",
+            email="etag-author@example.com",
+            password="strong-pass-123",
+        )
+        self.reader = User.objects.create_user(
+            username="etag-reader",
+            email="etag-reader@example.com",
+            password="strong-pass-123",
+        )
+        self.post = Post.objects.create(author=self.author, name="Conditional", content="Body")
+
+    def test_post_detail_returns_304_until_the_post_changes(self):
+        url = reverse("post-detail", kwargs={"pk": self.post.id})
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified.content, b"")
+
+        since = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(since.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PostLike.objects.create(post=self.post, user=self.reader)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["likes_count"], 1)
+
+    def test_signed_in_viewer_gets_no_last_modified_to_revalidate_with(self):
+        url = reverse("post-detail", kwargs={"pk": self.post.id})
+        self.client.force_authenticate(user=self.reader)
+        response = self.client.get(url)
+        self.assertFalse(response.has_header("Last-Modified"))
+        since = self.client.get(url, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT")
+        self.assertEqual(since.status_code, status.HTTP_200_OK)
+
+        Follow.objects.create(follower=self.reader, following=self.author)
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["author_followed_by_me"])
+
+    def test_if_match_rejects_stale_updates(self):
+        url = reverse("post-detail", kwargs={"pk": self.post.id})
+        self.client.force_authenticate(user=self.author)
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.patch(url, {"name": "First edit"}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.patch(url, {"name": "Second edit"}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+        response = self.client.delete(url, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.name, "First edit")
+
+    def test_list_etag_changes_with_page_contents(self):
+        url = reverse("user-post-list", kwargs={"user_id": self.author.id})
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.tags.add(Tag.objects.create(name="etag"))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["tags"], ["etag"])
+
+    def test_following_feed_supports_if_none_match(self):
+        Follow.objects.create(follower=self.reader, following=self.author)
+        self.client.force_authenticate(user=self.reader)
+        url = reverse("following-post-list")
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Comment.objects.create(post=self.post, author=self.reader, content="New")
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
 
 
 @override_settings(
@@ -249,6 +1100,7 @@ class PostEmailNotificationTests(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        process_email_outbox()
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].to, [self.author.email])
         self.assertIn("liked your post", mail.outbox[0].subject)
@@ -266,6 +1118,7 @@ class PostEmailNotificationTests(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        process_email_outbox()
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].to, [self.author.email])
         self.assertIn("commented on your post", mail.outbox[0].subject)
@@ -275,6 +1128,7 @@ class PostEmailNotificationTests(APITestCase):
 
     def test_new_post_sends_email_to_followers(self):
         Follow.objects.create(follower=self.actor, following=self.author)
+        process_email_outbox()
         mail.outbox = []
 
         Post.objects.create(
@@ -283,12 +1137,87 @@ class PostEmailNotificationTests(APITestCase):
             content="Another body",
         )
 
+        process_fan_out_jobs()
+        process_email_outbox()
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].to, [self.actor.email])
         self.assertIn("published a new post", mail.outbox[0].subject)
         self.assertIn("Another signal test post", mail.outbox[0].body)
         self.assertIn("Another body", mail.outbox[0].body)
 
+    @override_settings(NEW_POST_EMAIL_CHUNK_SIZE=2, NEW_POST_EMAIL_DELIVERY="personalized")
+    def test_new_post_emails_are_expanded_from_one_job_in_chunks(self):
+        for index in range(5):
+            follower = User.objects.create_user(
+                username=f"chunk-follower-{index}",
+                email=f"chunk-follower-{index}@example.com" if index != 4 else "",
+                password="strong-pass-123",
+            )
+            Follow.objects.create(follower=follower, following=self.author)
+        EmailOutbox.objects.all().delete()
+
+        post = Post.objects.create(author=self.author, name="Chunked post", content="Body")
+        self.assertFalse(EmailOutbox.objects.exists())
+        self.assertEqual(FanOutJob.objects.filter(kind=FanOutJob.KIND_EMAIL, post=post).count(), 1)
+
+        # Three chunks of at most two followers; the first one holds the
+        # follower without an address.
+        with CaptureQueriesContext(connection) as queries:
+            process_fan_out_jobs()
+        inserts = []
+        for query in queries.captured_queries:
+            if query["sql"].startswith('INSERT INTO "notifications_emailoutbox"'):
+                inserts.append(query)
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(EmailOutbox.objects.count(), 4)
+        self.assertFalse(FanOutJob.objects.exists())
+
+        mail.outbox = []
+        process_email_outbox()
+        self.assertEqual(len(mail.outbox), 4)
+        for message in mail.outbox:
+            self.assertEqual(len(message.to), 1)
+            self.assertIn("Chunked post", message.body)
+
+    @override_settings(NEW_POST_EMAIL_CHUNK_SIZE=2, NEW_POST_EMAIL_DELIVERY="bcc")
+    def test_new_post_emails_can_be_sent_as_bcc_chunks(self):
+        for index in range(3):
+            follower = User.objects.create_user(
+                username=f"bcc-follower-{index}",
+                email=f"bcc-follower-{index}@example.com",
+                password="strong-pass-123",
+            )
+            Follow.objects.create(follower=follower, following=self.author)
+        process_email_outbox()
+        mail.outbox = []
+
+        Post.objects.create(author=self.author, name="Bcc post", content="Body")
+        process_fan_out_jobs()
+        process_email_outbox()
+
+        self.assertEqual(len(mail.outbox), 2)
+        recipients = []
+        for message in mail.outbox:
+            self.assertEqual(message.to, [])
+            recipients.extend(message.bcc)
+        self.assertEqual(len(recipients), 3)
+
+    @override_settings(EMAIL_USE_OUTBOX=False)
+    def test_new_post_emails_go_through_the_outbox_even_when_it_is_off(self):
+        Follow.objects.create(follower=self.actor, following=self.author)
+        mail.outbox = []
+        EmailOutbox.objects.all().delete()
+
+        post = Post.objects.create(author=self.author, name="Outbox post", content="Body")
+        process_fan_out_jobs()
+
+        self.assertEqual(mail.outbox, [])
+        self.assertFalse(FanOutJob.objects.filter(post=post).exists())
+        self.assertEqual(EmailOutbox.objects.get().recipients, [self.actor.email])
+        process_email_outbox()
+        self.assertEqual(mail.outbox[0].to, [self.actor.email])
+
+    @override_settings(EMAIL_DIGEST_WINDOW_SECONDS=0)
     def test_comment_sends_email_only_to_post_author(self):
         previous_commenter = User.objects.create_user(
             username="previous-commenter",
@@ -303,6 +1232,7 @@ class PostEmailNotificationTests(APITestCase):
             format="json",
         )
 
+        process_email_outbox()
         mail.outbox = []
 
         self.client.force_authenticate(user=self.actor)
@@ -313,6 +1243,7 @@ class PostEmailNotificationTests(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        process_email_outbox()
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].to, [self.author.email])
         self.assertEqual(
@@ -0,0 +1,181 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q
+
+from apps.users.models import Follow
+from .models import Post, TimelineEntry
+
+
+User = get_user_model()
+
+TIMELINE_ENTRY_FIELDS = ["created_at", "post_id"]
+
+
+def get_timeline_setting(name, default):
+    return getattr(settings, name, default)
+
+
+def is_high_follower_author(author_id):
+    threshold = get_timeline_setting("TIMELINE_FANOUT_MAX_FOLLOWERS", 10000)
+    return User.objects.filter(pk=author_id, followers_count__gte=threshold).exists()
+
+
+def get_high_follower_followee_ids(user_id):
+    threshold = get_timeline_setting("TIMELINE_FANOUT_MAX_FOLLOWERS", 10000)
+    return list(
+        Follow.objects.filter(follower_id=user_id, following__followers_count__gte=threshold)
+        .values_list("following_id", flat=True)
+    )
+
+
+def get_overflowing_timeline_user_ids(user_ids):
+    max_length = get_timeline_setting("TIMELINE_MAX_LENGTH", 800)
+    return list(
+        TimelineEntry.objects.filter(user_id__in=user_ids)
+        .order_by()
+        .values("user_id")
+        .annotate(entry_count=Count("pk"))
+        .filter(entry_count__gt=max_length)
+        .values_list("user_id", flat=True)
+    )
+
+
+def trim_timeline(user_id):
+    max_length = get_timeline_setting("TIMELINE_MAX_LENGTH", 800)
+    boundary = list(
+        TimelineEntry.objects.filter(user_id=user_id)
+        .order_by("-created_at", "-post_id")
+        .values_list("created_at", "post_id")[max_length:max_length + 1]
+    )
+    if not boundary:
+        return 0
+
+    boundary_created_at, boundary_post_id = boundary[0]
+    deleted, _ = TimelineEntry.objects.filter(
+        Q(created_at__lt=boundary_created_at)
+        | Q(created_at=boundary_created_at, post_id__lte=boundary_post_id),
+        user_id=user_id,
+    ).delete()
+    return deleted
+
+
+def fan_out_post(post):
+    return fan_out_posts(post.author_id, [post])
+
+
+def fan_out_posts(author_id, posts):
+    if not posts or is_high_follower_author(author_id):
+        return 0
+
+    batch_size = get_timeline_setting("TIMELINE_FANOUT_BATCH_SIZE", 1000)
+    # Each follower gets one entry per post, so fewer followers go in a batch
+    # when many posts are fanned out at once.
+    followers_per_batch = max(batch_size // len(posts), 1)
+    follower_ids = (
+        Follow.objects.filter(following_id=author_id)
+        .values_list("follower_id", flat=True)
+        .iterator(chunk_size=followers_per_batch)
+    )
+
+    written = 0
+    batch = []
+    for follower_id in follower_ids:
+        batch.append(follower_id)
+        if len(batch) >= followers_per_batch:
+            written += _write_fan_out_batch(posts, batch, batch_size)
+            batch = []
+    if batch:
+        written += _write_fan_out_batch(posts, batch, batch_size)
+    return written
+
+
+def _write_fan_out_batch(posts, follower_ids, batch_size):
+    entries = []
+    for follower_id in follower_ids:
+        for post in posts:
+            entries.append(
+                TimelineEntry(
+                    user_id=follower_id,
+                    post_id=post.pk,
+                    author_id=post.author_id,
+                    created_at=post.created_at,
+                )
+            )
+    TimelineEntry.objects.bulk_create(entries, batch_size=batch_size, ignore_conflicts=True)
+
+    for follower_id in get_overflowing_timeline_user_ids(follower_ids):
+        trim_timeline(follower_id)
+    return len(entries)
+
+
+def backfill_timeline(user_id, author_id):
+    if is_high_follower_author(author_id):
+        return 0
+
+    backfill_size = get_timeline_setting("TIMELINE_BACKFILL_SIZE", 50)
+    recent_posts = (
+        Post.objects.filter(author_id=author_id)
+        .order_by("-created_at", "-id")
+        .values_list("id", "created_at")[:backfill_size]
+    )
+
+    entries = []
+    for post_id, created_at in recent_posts:
+        entries.append(
+            TimelineEntry(
+                user_id=user_id,
+                post_id=post_id,
+                author_id=author_id,
+                created_at=created_at,
+            )
+        )
+    if not entries:
+        return 0
+
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+    trim_timeline(user_id)
+    return len(entries)
+
+
+def prune_timeline(user_id, author_id):
+    deleted, _ = TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+    return deleted
+
+
+def get_timeline_page(user, paginator, position, reverse):
+    limit = paginator.page_size + 1
+
+    entries = TimelineEntry.objects.filter(user=user)
+    if position is not None:
+        position = paginator.convert_position(Post, position)
+        entries = entries.filter(
+            paginator.get_seek_filter(position, reverse, field_names=TIMELINE_ENTRY_FIELDS)
+        )
+
+    entry_order_by = ["created_at", "post_id"] if reverse else ["-created_at", "-post_id"]
+    entries = (
+        entries.select_related("post__author")
+        .prefetch_related("post__tags")
+        .order_by(*entry_order_by)[:limit]
+    )
+
+    posts = []
+    seen_post_ids = set()
+    for entry in entries:
+        posts.append(entry.post)
+        seen_post_ids.add(entry.post_id)
+
+    high_follower_ids = get_high_follower_followee_ids(user.id)
+    if high_follower_ids:
+        merged_posts = Post.objects.select_related("author").prefetch_related("tags").filter(
+            author_id__in=high_follower_ids
+        )
+        if position is not None:
+            merged_posts = merged_posts.filter(paginator.get_seek_filter(position, reverse))
+        for post in merged_posts.order_by(*paginator.get_order_by(reverse))[:limit]:
+            if post.id not in seen_post_ids:
+                posts.append(post)
+
+        posts.sort(key=lambda post: (post.created_at, post.id), reverse=not reverse)
+
+    return paginator.paginate_items(posts[:limit], position, reverse)
@@ -2,16 +2,23 @@ from django.urls import path
 
 from .views import (
     FollowingPostListAPIView,
+    PostBulkCreateAPIView,
     PostCommentListCreateAPIView,
     PostLikeToggleAPIView,
     PostListCreateAPIView,
     PostRetrieveUpdateDestroyAPIView,
+    PostViewerFlagsAPIView,
+    TagListAPIView,
+    TagPostListAPIView,
+    TrendingTagListAPIView,
     UserLikedPostListAPIView,
     UserPostListAPIView,
 )
 
 urlpatterns = [
     path("posts/", PostListCreateAPIView.as_view(), name="post-list-create"),
+    path("posts/bulk/", PostBulkCreateAPIView.as_view(), name="post-bulk-create"),
+    path("posts/viewer-flags/", PostViewerFlagsAPIView.as_view(), name="post-viewer-flags"),
     path("posts/following/", FollowingPostListAPIView.as_view(), name="following-post-list"),
     path("posts/<int:pk>/", PostRetrieveUpdateDestroyAPIView.as_view(), name="post-detail"),
     path("users/<int:user_id>/posts/", UserPostListAPIView.as_view(), name="user-post-list"),
@@ -26,4 +33,7 @@ urlpatterns = [
         name="post-comment-list-create",
     ),
     path("posts/<int:post_id>/like/", PostLikeToggleAPIView.as_view(), name="post-like-toggle"),
+    path("tags/", TagListAPIView.as_view(), name="tag-list"),
+    path("tags/trending/", TrendingTagListAPIView.as_view(), name="tag-trending-list"),
+    path("tags/<str:name>/posts/", TagPostListAPIView.as_view(), name="tag-post-list"),
 ]
\ No newline at end of file
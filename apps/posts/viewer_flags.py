@@ -0,0 +1,73 @@
+from apps.users.models import Follow
+from .models import PostLike
+
+
+def get_viewer(request):
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return None
+    return user
+
+
+def get_viewer_flag_sets(viewer, post_ids, author_ids):
+    liked_post_ids = set()
+    followed_author_ids = set()
+    if viewer is None:
+        return liked_post_ids, followed_author_ids
+
+    if post_ids:
+        liked_post_ids = set(
+            PostLike.objects.filter(user=viewer, post_id__in=set(post_ids)).values_list("post_id", flat=True)
+        )
+    if author_ids:
+        followed_author_ids = set(
+            Follow.objects.filter(follower=viewer, following_id__in=set(author_ids)).values_list(
+                "following_id", flat=True
+            )
+        )
+    return liked_post_ids, followed_author_ids
+
+
+def get_viewer_context(request, posts):
+    post_ids = []
+    author_ids = []
+    for post in posts:
+        post_ids.append(post.id)
+        author_ids.append(post.author_id)
+
+    liked_post_ids, followed_author_ids = get_viewer_flag_sets(get_viewer(request), post_ids, author_ids)
+    return {"liked_post_ids": liked_post_ids, "followed_author_ids": followed_author_ids}
+
+
+def apply_viewer_flags(request, items):
+    """
+    Sets the viewer flags on already serialized posts.
+
+    Cached responses are shared by every viewer, so they are stored with the
+    flags off and patched per request here.
+    """
+
+    viewer = get_viewer(request)
+    if viewer is None or not items:
+        return items
+
+    post_ids = []
+    author_ids = []
+    for item in items:
+        post_ids.append(item["id"])
+        author_ids.append(item["author"])
+
+    liked_post_ids, followed_author_ids = get_viewer_flag_sets(viewer, post_ids, author_ids)
+    for item in items:
+        item["liked_by_me"] = item["id"] in liked_post_ids
+        item["author_followed_by_me"] = item["author"] in followed_author_ids
+    return items
+
+
+def get_viewer_etag_part(request, post_ids, author_ids):
+    viewer = get_viewer(request)
+    if viewer is None:
+        return ""
+
+    liked_post_ids, followed_author_ids = get_viewer_flag_sets(viewer, post_ids, author_ids)
+    return (viewer.id, sorted(liked_post_ids), sorted(followed_author_ids))
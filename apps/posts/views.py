@@ -1,24 +1,244 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema, extend_schema_view
-from rest_framework import status
+from rest_framework import serializers, status
 from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.common.conditional import get_keyset_page_rows, get_latest, make_etag, memoize_on_request
 from apps.common.image_utils import upload_image_file
-from .models import Comment, Post, PostLike
+from apps.common.pagination import PAGINATION_PARAMETERS, KeysetPagination, get_paginated_serializer
+from apps.common.response_cache import get_cached_response
+from apps.media.renditions import load_rendition_manifests
+from .bulk import create_posts_in_bulk, get_bulk_create_limit, validate_bulk_posts
+from .models import Comment, Post, PostLike, Tag
 from .serializers import (
     CommentSerializer,
     DetailResponseSerializer,
+    LikedPostSerializer,
+    PostBulkCreateResponseSerializer,
     PostLikeToggleResponseSerializer,
+    PostSearchResultSerializer,
     PostSerializer,
+    PostViewerFlagsSerializer,
+    TagSerializer,
+    TrendingTagSerializer,
+)
+from .search import get_search_limit, search_posts
+from .tags import get_trending_tags
+from .timeline import get_timeline_page
+from .viewer_flags import (
+    apply_viewer_flags,
+    get_viewer,
+    get_viewer_context,
+    get_viewer_etag_part,
+    get_viewer_flag_sets,
 )
 
 
 User = get_user_model()
 
 
+POST_VALIDATOR_FIELDS = (
+    "id",
+    "updated_at",
+    "counters_updated_at",
+    "like_count",
+    "comment_count",
+    "author__username",
+    "author_id",
+)
+LIKED_POST_VALIDATOR_FIELDS = (
+    "id",
+    "created_at",
+    "post_id",
+    "post__updated_at",
+    "post__counters_updated_at",
+    "post__like_count",
+    "post__comment_count",
+    "post__author__username",
+    "post__author_id",
+)
+COMMENT_VALIDATOR_FIELDS = ("id", "updated_at", "author__username")
+TAG_LIST_ORDERINGS = {
+    "popular": ("-post_count", "name"),
+    "name": ("name",),
+}
+
+
+@memoize_on_request
+def get_post_validator_row(request, pk):
+    return Post.objects.filter(pk=pk).values_list(*POST_VALIDATOR_FIELDS).first()
+
+
+def make_post_page_etag(request, rows, post_index=0, author_index=6):
+    post_ids = []
+    author_ids = []
+    for row in rows:
+        post_ids.append(row[post_index])
+        author_ids.append(row[author_index])
+    viewer_part = get_viewer_etag_part(request, post_ids, author_ids)
+    return make_etag(request.build_absolute_uri(), rows, viewer_part)
+
+
+def post_detail_etag(request, pk):
+    row = get_post_validator_row(request, pk)
+    if row is None:
+        return None
+    return make_etag(*row, get_viewer_etag_part(request, [row[0]], [row[6]]))
+
+
+def post_detail_last_modified(request, pk):
+    # The like/follow flags of a signed-in viewer can change (including by
+    # unliking or unfollowing) without touching the post, so they only get
+    # the ETag, which covers those flags.
+    if get_viewer(request) is not None:
+        return None
+    row = get_post_validator_row(request, pk)
+    if row is None:
+        return None
+    return get_latest(row[1], row[2])
+
+
+def post_list_etag(request):
+    if request.query_params.get("search", "").strip():
+        return None
+
+    posts = Post.objects.all()
+    category = request.query_params.get("category", "").strip()
+    if category:
+        posts = posts.filter(category__iexact=category)
+
+    rows = get_keyset_page_rows(request, posts, POST_VALIDATOR_FIELDS)
+    return make_post_page_etag(request, rows)
+
+
+def user_post_list_etag(request, user_id):
+    if not User.objects.filter(id=user_id).exists():
+        return None
+
+    rows = get_keyset_page_rows(request, Post.objects.filter(author_id=user_id), POST_VALIDATOR_FIELDS)
+    return make_post_page_etag(request, rows)
+
+
+def user_liked_post_list_etag(request, user_id):
+    if not User.objects.filter(id=user_id).exists():
+        return None
+
+    rows = get_keyset_page_rows(request, PostLike.objects.filter(user_id=user_id), LIKED_POST_VALIDATOR_FIELDS)
+    return make_post_page_etag(request, rows, post_index=2, author_index=8)
+
+
+def tag_post_list_etag(request, name):
+    tag_id = Tag.objects.filter(name=name).values_list("id", flat=True).first()
+    if tag_id is None:
+        return None
+
+    rows = get_keyset_page_rows(request, Post.objects.filter(tags=tag_id), POST_VALIDATOR_FIELDS)
+    return make_post_page_etag(request, rows)
+
+
+def comment_list_etag(request, post_id):
+    if not Post.objects.filter(id=post_id).exists():
+        return None
+
+    rows = get_keyset_page_rows(
+        request,
+        Comment.objects.filter(post_id=post_id),
+        COMMENT_VALIDATOR_FIELDS,
+        ordering=("created_at", "id"),
+    )
+    return make_etag(request.build_absolute_uri(), rows)
+
+
+@memoize_on_request
+def get_following_page(request):
+    paginator = KeysetPagination()
+    paginator.prepare(request)
+    position, reverse = paginator.decode_cursor(request)
+    page = get_timeline_page(request.user, paginator, position, reverse)
+    return paginator, page
+
+
+def following_post_list_etag(request):
+    _, page = get_following_page(request)
+    rows = []
+    for post in page:
+        rows.append(
+            (
+                post.id,
+                post.updated_at,
+                post.counters_updated_at,
+                post.like_count,
+                post.comment_count,
+                post.author.username,
+                post.author_id,
+            )
+        )
+    return make_post_page_etag(request, rows)
+
+
+def parse_post_ids(raw_ids):
+    post_ids = []
+    for raw_id in raw_ids.split(","):
+        raw_id = raw_id.strip()
+        if raw_id == "":
+            continue
+        try:
+            post_ids.append(int(raw_id))
+        except ValueError:
+            raise serializers.ValidationError({"ids": [f"'{raw_id}' is not a valid post id."]})
+
+    if not post_ids:
+        raise serializers.ValidationError({"ids": ["Provide a comma-separated list of post ids."]})
+
+    max_ids = getattr(settings, "API_MAX_PAGE_SIZE", 100)
+    if len(post_ids) > max_ids:
+        raise serializers.ValidationError({"ids": [f"At most {max_ids} post ids can be checked at once."]})
+    return post_ids
+
+
+def get_search_position(paginator, position):
+    if position is None:
+        return None
+
+    try:
+        return [float(position[0]), int(position[1])]
+    except (TypeError, ValueError):
+        raise NotFound(paginator.invalid_cursor_message)
+
+
+def get_post_author_dependencies(data):
+    return [("user", data["author"])]
+
+
+def get_post_page_dependencies(data):
+    dependencies = []
+    for item in data["results"]:
+        dependencies.append(("post", item["id"]))
+        dependencies.append(("user", item["author"]))
+    return dependencies
+
+
+def get_comment_page_dependencies(data):
+    dependencies = []
+    for item in data["results"]:
+        dependencies.append(("user", item["author"]))
+    return dependencies
+
+
+def get_tag_or_404(name):
+    tag = Tag.objects.filter(name=name).first()
+    if tag is None:
+        raise NotFound("Tag not found.")
+    return tag
+
+
 def get_post_with_author_and_tags_or_404(post_id):
     post = (
         Post.objects.select_related("author")
@@ -36,10 +256,22 @@ def get_post_with_author_and_tags_or_404(post_id):
         summary="List posts",
         tags=["Posts"],
         parameters=[
-            OpenApiParameter("search", str, OpenApiParameter.QUERY, description="Search in content and tags"),
+            OpenApiParameter(
+                "search",
+                str,
+                OpenApiParameter.QUERY,
+                description="Full-text search in name, content and tags; results are ranked by relevance",
+            ),
             OpenApiParameter("category", str, OpenApiParameter.QUERY, description="Filter by exact category"),
+            OpenApiParameter(
+                "highlight",
+                bool,
+                OpenApiParameter.QUERY,
+                description="Include a highlighted `search_snippet` with each search result",
+            ),
+            *PAGINATION_PARAMETERS,
         ],
-        responses={200: PostSerializer(many=True)},
+        responses={200: get_paginated_serializer(PostSerializer)},
         auth=[],
     ),
     post=extend_schema(
@@ -56,37 +288,38 @@ def get_post_with_author_and_tags_or_404(post_id):
 class PostListCreateAPIView(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    @method_decorator(condition(etag_func=post_list_etag))
     def get(self, request):
-        posts = list(Post.objects.select_related("author").prefetch_related("tags").all())
-
         search_text = request.query_params.get("search", "").strip()
         category = request.query_params.get("category", "").strip()
 
         if search_text:
-            lowered_search = search_text.lower()
-            searched_posts = []
-            for post in posts:
-                content_text = (post.content or "").lower()
-                tag_match = False
-                for tag in post.tags.all():
-                    if lowered_search in (tag.name or "").lower():
-                        tag_match = True
-                        break
-
-                if lowered_search in content_text or tag_match:
-                    searched_posts.append(post)
-            posts = searched_posts
-
+            highlight = request.query_params.get("highlight", "").strip().lower() in ("1", "true", "yes")
+            paginator = KeysetPagination(ordering=("search_rank", "id"))
+            paginator.prepare(request)
+            paginator.page_size = get_search_limit(paginator.page_size)
+            position, reverse = paginator.decode_cursor(request)
+            position = get_search_position(paginator, position)
+            posts = search_posts(
+                search_text,
+                category=category,
+                limit=paginator.page_size + 1,
+                with_snippets=highlight,
+                position=position,
+                reverse=reverse,
+            )
+            page = paginator.paginate_items(posts, position, reverse)
+            serializer = PostSearchResultSerializer(page, many=True, context=get_viewer_context(request, page))
+            return paginator.get_paginated_response(serializer.data)
+
+        posts = Post.objects.select_related("author").prefetch_related("tags")
         if category:
-            lowered_category = category.lower()
-            category_filtered_posts = []
-            for post in posts:
-                if (post.category or "").lower() == lowered_category:
-                    category_filtered_posts.append(post)
-            posts = category_filtered_posts
-
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+            posts = posts.filter(category__iexact=category)
+
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(posts, request, view=self)
+        serializer = PostSerializer(page, many=True, context=get_viewer_context(request, page))
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
         payload = request.data.copy()
@@ -97,10 +330,116 @@ class PostListCreateAPIView(APIView):
 
         serializer = PostSerializer(data=payload)
         serializer.is_valid(raise_exception=True)
-        serializer.save(author=request.user)
+        with transaction.atomic():
+            serializer.save(author=request.user)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+@extend_schema_view(
+    post=extend_schema(
+        summary="Create posts in bulk",
+        description=(
+            "Accepts a JSON array of posts, validates each one and inserts the valid ones in a single "
+            "transaction. Returns 201 when every post was created, 207 when only some were and 400 when "
+            "none were. New-post emails are not sent for bulk creates."
+        ),
+        tags=["Posts"],
+        request=PostSerializer(many=True),
+        responses={
+            201: PostBulkCreateResponseSerializer,
+            207: PostBulkCreateResponseSerializer,
+            400: PostBulkCreateResponseSerializer,
+            401: OpenApiResponse(description="Authentication required"),
+        },
+    )
+)
+class PostBulkCreateAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise serializers.ValidationError({"non_field_errors": ["Expected a list of posts."]})
+
+        max_items = get_bulk_create_limit()
+        if len(items) > max_items:
+            raise serializers.ValidationError(
+                {"non_field_errors": [f"At most {max_items} posts can be created at once."]}
+            )
+
+        valid_items, results = validate_bulk_posts(items)
+        created_posts = create_posts_in_bulk(request.user, valid_items) if valid_items else []
+
+        post_ids = [post.pk for post in created_posts]
+        posts_by_id = Post.objects.select_related("author").prefetch_related("tags").in_bulk(post_ids)
+        serializer_context = {}
+        load_rendition_manifests(serializer_context, [post.image for post in posts_by_id.values()])
+        for (index, _), post_id in zip(valid_items, post_ids):
+            results[index] = {
+                "index": index,
+                "success": True,
+                "post": PostSerializer(posts_by_id[post_id], context=serializer_context).data,
+            }
+
+        failed = len(items) - len(created_posts)
+        response_status = status.HTTP_201_CREATED
+        if not created_posts and items:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif failed:
+            response_status = status.HTTP_207_MULTI_STATUS
+
+        response_data = {"created": len(created_posts), "failed": failed, "results": results}
+        return Response(response_data, status=response_status)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="Get viewer flags for posts",
+        description=(
+            "Returns `liked_by_me` and `author_followed_by_me` for each of the given posts, "
+            "in the order requested. Unknown ids are left out."
+        ),
+        tags=["Posts"],
+        parameters=[
+            OpenApiParameter("ids", str, OpenApiParameter.QUERY, description="Comma-separated post ids", required=True),
+        ],
+        responses={
+            200: PostViewerFlagsSerializer(many=True),
+            400: OpenApiResponse(description="Missing or invalid ids"),
+            401: OpenApiResponse(description="Authentication required"),
+        },
+    )
+)
+class PostViewerFlagsAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        post_ids = parse_post_ids(request.query_params.get("ids", ""))
+        author_ids_by_post_id = dict(Post.objects.filter(id__in=post_ids).values_list("id", "author_id"))
+        liked_post_ids, followed_author_ids = get_viewer_flag_sets(
+            request.user,
+            list(author_ids_by_post_id),
+            list(author_ids_by_post_id.values()),
+        )
+
+        flags = []
+        seen_post_ids = set()
+        for post_id in post_ids:
+            if post_id not in author_ids_by_post_id or post_id in seen_post_ids:
+                continue
+            seen_post_ids.add(post_id)
+            flags.append(
+                {
+                    "id": post_id,
+                    "liked_by_me": post_id in liked_post_ids,
+                    "author_followed_by_me": author_ids_by_post_id[post_id] in followed_author_ids,
+                }
+            )
+
+        serializer = PostViewerFlagsSerializer(flags, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
 @extend_schema_view(
     get=extend_schema(
         summary="Retrieve post by id",
@@ -147,11 +486,24 @@ class PostListCreateAPIView(APIView):
 class PostRetrieveUpdateDestroyAPIView(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    @method_decorator(condition(etag_func=post_detail_etag, last_modified_func=post_detail_last_modified))
     def get(self, request, pk):
+        response = get_cached_response(
+            request,
+            "post-detail",
+            lambda: self.build_get_response(pk),
+            dependencies=[("post", pk)],
+            get_data_dependencies=get_post_author_dependencies,
+        )
+        apply_viewer_flags(request, [response.data])
+        return response
+
+    def build_get_response(self, pk):
         post = get_post_with_author_and_tags_or_404(pk)
         serializer = PostSerializer(post)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @method_decorator(condition(etag_func=post_detail_etag, last_modified_func=post_detail_last_modified))
     def put(self, request, pk):
         post = get_post_with_author_and_tags_or_404(pk)
 
@@ -164,11 +516,12 @@ class PostRetrieveUpdateDestroyAPIView(APIView):
         if image_file is not None:
             payload["image"] = upload_image_file(request, image_file)
 
-        serializer = PostSerializer(post, data=payload)
+        serializer = PostSerializer(post, data=payload, context=get_viewer_context(request, [post]))
         serializer.is_valid(raise_exception=True)
         serializer.save(author=post.author)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @method_decorator(condition(etag_func=post_detail_etag, last_modified_func=post_detail_last_modified))
     def patch(self, request, pk):
         post = get_post_with_author_and_tags_or_404(pk)
 
@@ -181,11 +534,17 @@ class PostRetrieveUpdateDestroyAPIView(APIView):
         if image_file is not None:
             payload["image"] = upload_image_file(request, image_file)
 
-        serializer = PostSerializer(post, data=payload, partial=True)
+        serializer = PostSerializer(
+            post,
+            data=payload,
+            partial=True,
+            context=get_viewer_context(request, [post]),
+        )
         serializer.is_valid(raise_exception=True)
         serializer.save(author=post.author)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @method_decorator(condition(etag_func=post_detail_etag, last_modified_func=post_detail_last_modified))
     def delete(self, request, pk):
         post = get_post_with_author_and_tags_or_404(pk)
 
@@ -202,9 +561,10 @@ class PostRetrieveUpdateDestroyAPIView(APIView):
         tags=["Posts"],
         parameters=[
             OpenApiParameter("user_id", int, OpenApiParameter.PATH, description="User id"),
+            *PAGINATION_PARAMETERS,
         ],
         responses={
-            200: PostSerializer(many=True),
+            200: get_paginated_serializer(PostSerializer),
             404: OpenApiResponse(description="User not found"),
         },
         auth=[],
@@ -213,7 +573,19 @@ class PostRetrieveUpdateDestroyAPIView(APIView):
 class UserPostListAPIView(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    @method_decorator(condition(etag_func=user_post_list_etag))
     def get(self, request, user_id):
+        response = get_cached_response(
+            request,
+            "user-posts",
+            lambda: self.build_get_response(request, user_id),
+            dependencies=[("user", user_id), ("user-posts", user_id)],
+            get_data_dependencies=get_post_page_dependencies,
+        )
+        apply_viewer_flags(request, response.data["results"])
+        return response
+
+    def build_get_response(self, request, user_id):
         if not User.objects.filter(id=user_id).exists():
             raise NotFound("User not found.")
 
@@ -222,19 +594,23 @@ class UserPostListAPIView(APIView):
             .prefetch_related("tags")
             .filter(author_id=user_id)
         )
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(posts, request, view=self)
+        serializer = PostSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
 @extend_schema_view(
     get=extend_schema(
         summary="List posts liked by user",
+        description="Returns posts liked by the user, most recently liked first, with the time of each like in `liked_at`.",
         tags=["Posts"],
         parameters=[
             OpenApiParameter("user_id", int, OpenApiParameter.PATH, description="User id"),
+            *PAGINATION_PARAMETERS,
         ],
         responses={
-            200: PostSerializer(many=True),
+            200: get_paginated_serializer(LikedPostSerializer),
             404: OpenApiResponse(description="User not found"),
         },
         auth=[],
@@ -243,33 +619,37 @@ class UserPostListAPIView(APIView):
 class UserLikedPostListAPIView(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    @method_decorator(condition(etag_func=user_liked_post_list_etag))
     def get(self, request, user_id):
         if not User.objects.filter(id=user_id).exists():
             raise NotFound("User not found.")
 
-        all_posts = Post.objects.select_related("author").prefetch_related("tags", "likes").all()
-        posts = []
-        for post in all_posts:
-            is_liked_by_user = False
-            for like in post.likes.all():
-                if like.user_id == user_id:
-                    is_liked_by_user = True
-                    break
+        likes = (
+            PostLike.objects.select_related("post__author")
+            .prefetch_related("post__tags")
+            .filter(user_id=user_id)
+        )
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(likes, request, view=self)
 
-            if is_liked_by_user:
-                posts.append(post)
+        posts = []
+        for like in page:
+            post = like.post
+            post.liked_at = like.created_at
+            posts.append(post)
 
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        serializer = LikedPostSerializer(posts, many=True, context=get_viewer_context(request, posts))
+        return paginator.get_paginated_response(serializer.data)
 
 
 @extend_schema_view(
     get=extend_schema(
         summary="List posts from followed users",
-        description="Returns all posts authored by users that the authenticated user is following, ordered by recency.",
+        description="Returns the home timeline of the authenticated user: posts from followed users, newest first.",
         tags=["Posts"],
+        parameters=PAGINATION_PARAMETERS,
         responses={
-            200: PostSerializer(many=True),
+            200: get_paginated_serializer(PostSerializer),
             401: OpenApiResponse(description="Authentication required"),
         },
     )
@@ -277,17 +657,11 @@ class UserLikedPostListAPIView(APIView):
 class FollowingPostListAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @method_decorator(condition(etag_func=following_post_list_etag))
     def get(self, request):
-        following_users = list(request.user.following.all())
-        all_posts = Post.objects.select_related("author").prefetch_related("tags").all()
-
-        posts = []
-        for post in all_posts:
-            if post.author in following_users:
-                posts.append(post)
-
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        paginator, page = get_following_page(request)
+        serializer = PostSerializer(page, many=True, context=get_viewer_context(request, page))
+        return paginator.get_paginated_response(serializer.data)
 
 
 @extend_schema_view(
@@ -296,9 +670,10 @@ class FollowingPostListAPIView(APIView):
         tags=["Comments"],
         parameters=[
             OpenApiParameter("post_id", int, OpenApiParameter.PATH, description="Post id"),
+            *PAGINATION_PARAMETERS,
         ],
         responses={
-            200: CommentSerializer(many=True),
+            200: get_paginated_serializer(CommentSerializer),
             404: OpenApiResponse(description="Post not found"),
         },
         auth=[],
@@ -321,17 +696,30 @@ class FollowingPostListAPIView(APIView):
 class PostCommentListCreateAPIView(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    @method_decorator(condition(etag_func=comment_list_etag))
     def get(self, request, post_id):
+        return get_cached_response(
+            request,
+            "post-comments",
+            lambda: self.build_get_response(request, post_id),
+            dependencies=[("post", post_id), ("post-comments", post_id)],
+            get_data_dependencies=get_comment_page_dependencies,
+        )
+
+    def build_get_response(self, request, post_id):
         post = get_post_with_author_and_tags_or_404(post_id)
-        comments = Comment.objects.select_related("author", "post").filter(post=post)
-        serializer = CommentSerializer(comments, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        comments = Comment.objects.select_related("author").filter(post=post)
+        paginator = KeysetPagination(ordering=("created_at", "id"))
+        page = paginator.paginate_queryset(comments, request, view=self)
+        serializer = CommentSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request, post_id):
         post = get_post_with_author_and_tags_or_404(post_id)
         serializer = CommentSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save(post=post, author=request.user)
+        with transaction.atomic():
+            serializer.save(post=post, author=request.user)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
@@ -368,3 +756,89 @@ class PostLikeToggleAPIView(APIView):
         like.delete()
         response_data = {"detail": "Post unliked.", "liked": False}
         return Response(response_data, status=status.HTTP_200_OK)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="List tags",
+        description="Returns tags with the number of posts using each one, most used first by default.",
+        tags=["Tags"],
+        parameters=[
+            OpenApiParameter(
+                "sort",
+                str,
+                OpenApiParameter.QUERY,
+                description="`popular` (default, by post count) or `name`",
+                enum=list(TAG_LIST_ORDERINGS),
+            ),
+            *PAGINATION_PARAMETERS,
+        ],
+        responses={200: get_paginated_serializer(TagSerializer)},
+        auth=[],
+    )
+)
+class TagListAPIView(APIView):
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get(self, request):
+        sort = request.query_params.get("sort", "").strip().lower() or "popular"
+        ordering = TAG_LIST_ORDERINGS.get(sort)
+        if ordering is None:
+            raise serializers.ValidationError({"sort": [f"Must be one of: {', '.join(TAG_LIST_ORDERINGS)}."]})
+
+        paginator = KeysetPagination(ordering=ordering)
+        page = paginator.paginate_queryset(Tag.objects.all(), request, view=self)
+        serializer = TagSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="List trending tags",
+        description=(
+            "Returns the tags applied to posts most often within the last `TAG_TRENDING_WINDOW_HOURS` hours, "
+            "with the number of taggings in `trending_score`."
+        ),
+        tags=["Tags"],
+        responses={200: TrendingTagSerializer(many=True)},
+        auth=[],
+    )
+)
+class TrendingTagListAPIView(APIView):
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get(self, request):
+        serializer = TrendingTagSerializer(get_trending_tags(), many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="List posts with a tag",
+        tags=["Tags"],
+        parameters=[
+            OpenApiParameter("name", str, OpenApiParameter.PATH, description="Tag name"),
+            *PAGINATION_PARAMETERS,
+        ],
+        responses={
+            200: get_paginated_serializer(PostSerializer),
+            404: OpenApiResponse(description="Tag not found"),
+        },
+        auth=[],
+    )
+)
+class TagPostListAPIView(APIView):
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @method_decorator(condition(etag_func=tag_post_list_etag))
+    def get(self, request, name):
+        tag = get_tag_or_404(name)
+        posts = (
+            Post.objects.select_related("author")
+            .prefetch_related("tags")
+            .filter(tags=tag)
+        )
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(posts, request, view=self)
+        serializer = PostSerializer(page, many=True, context=get_viewer_context(request, page))
+        return paginator.get_paginated_response(serializer.data)
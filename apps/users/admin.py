@@ -7,11 +7,13 @@ from .models import Follow, User
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
     model = User
-    list_display = ("id", "username", "email", "display_name", "is_staff", "is_active")
+    list_display = ("id", "username", "email", "display_name", "followers_count", "following_count", "is_staff", "is_active")
     search_fields = ("username", "email", "display_name")
+    readonly_fields = ("followers_count", "following_count", "unread_notification_count")
 
     fieldsets = UserAdmin.fieldsets + (
         ("Profile", {"fields": ("display_name", "bio")}),
+        ("Counters", {"fields": ("followers_count", "following_count", "unread_notification_count")}),
     )
 
 
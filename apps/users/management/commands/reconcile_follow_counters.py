@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from apps.common.counters import count_subquery, reconcile_counters
+from apps.users.models import Follow
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Recomputes User.followers_count and User.following_count from Follow rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        checked, fixed = reconcile_counters(
+            User,
+            {
+                "followers_count": count_subquery(Follow, "following"),
+                "following_count": count_subquery(Follow, "follower"),
+            },
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} users, fixed {fixed}."))
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-17 13:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_user_follow_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['follower', '-created_at', '-id'], name='users_follo_followe_f64d1b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['following', '-created_at', '-id'], name='users_follo_followi_20813a_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='follow',
+            name='users_follo_followe_3a2483_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='follow',
+            name='users_follo_followi_e01def_idx',
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-17 16:30
+
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_profile_pic(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    media_url_path = urlsplit(settings.MEDIA_URL).path
+
+    batch = []
+    for user in User.objects.exclude(profile_pic="").only("id", "profile_pic").iterator():
+        path = urlsplit(user.profile_pic).path
+        if path.startswith(media_url_path) and path != media_url_path:
+            user.profile_pic_path = path[len(media_url_path):]
+            batch.append(user)
+        if len(batch) >= 500:
+            User.objects.bulk_update(batch, ["profile_pic_path"])
+            batch = []
+    User.objects.bulk_update(batch, ["profile_pic_path"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_user_profile_pic_dimensions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_pic_path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_profile_pic, migrations.RunPython.noop),
+    ]
@@ -2,13 +2,20 @@ from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
 from django.db import models
 
+from apps.common.counters import DenormalizedCounterMixin
+from apps.common.tracking import FieldTrackerMixin
 
-class User(AbstractUser):
+
+class User(FieldTrackerMixin, DenormalizedCounterMixin, AbstractUser):
     email = models.EmailField(unique=True)
     display_name = models.CharField(max_length=120, blank=True)
     bio = models.TextField(blank=True)
     phone_no = models.CharField(max_length=20, blank=True)
     profile_pic = models.URLField(blank=True)
+    profile_pic_width = models.PositiveIntegerField(blank=True, null=True)
+    profile_pic_height = models.PositiveIntegerField(blank=True, null=True)
+    # Storage path behind `profile_pic` when it is one of our media URLs.
+    profile_pic_path = models.CharField(max_length=255, blank=True, db_index=True, editable=False)
     dob = models.DateField(blank=True, null=True)
     following = models.ManyToManyField(
         "self",
@@ -18,6 +25,12 @@ class User(AbstractUser):
         related_name="followers",
         blank=True,
     )
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    unread_notification_count = models.PositiveIntegerField(default=0)
+
+    counter_fields = ("followers_count", "following_count", "unread_notification_count")
+    tracked_fields = ("profile_pic",)
 
     def __str__(self):
         if self.display_name:
@@ -38,8 +51,8 @@ class Follow(models.Model):
             ),
         ]
         indexes = [
-            models.Index(fields=["follower"]),
-            models.Index(fields=["following"]),
+            models.Index(fields=["follower", "-created_at", "-id"]),
+            models.Index(fields=["following", "-created_at", "-id"]),
         ]
 
     def clean(self):
@@ -0,0 +1,265 @@
+import sys
+import threading
+import time
+from array import array
+
+from django.conf import settings
+
+from .models import Follow
+
+
+_graph = None
+_graph_lock = threading.RLock()
+# Held by the one thread rebuilding the graph; follow changes seen meanwhile
+# are collected in `_pending_changes` and replayed onto the new graph.
+_rebuild_lock = threading.Lock()
+_pending_changes = None
+
+
+def _zeros(length):
+    return array("q", bytes(8 * length))
+
+
+class FollowGraph:
+    """
+    Compact, in-memory copy of the follow graph.
+
+    Users are mapped to dense indices. Outgoing edges are stored CSR-style:
+    the accounts followed by node `i` are `targets[offsets[i]:offsets[i + 1]]`.
+    Follows created or deleted after the build are kept in small per-node
+    overlays (`added` / `removed`) until the next rebuild.
+    """
+
+    def __init__(self, user_ids, offsets, targets, follower_counts):
+        self.user_ids = user_ids
+        self.offsets = offsets
+        self.targets = targets
+        self.follower_counts = follower_counts
+        self.index_by_user_id = {}
+        for index, user_id in enumerate(user_ids):
+            self.index_by_user_id[user_id] = index
+        self.added = {}
+        self.removed = {}
+        self.overlay_size = 0
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def from_edges(cls, edges):
+        sources = array("q")
+        destinations = array("q")
+        for follower_id, following_id in edges:
+            sources.append(follower_id)
+            destinations.append(following_id)
+
+        user_ids = array("q", sorted(set(sources) | set(destinations)))
+        index_by_user_id = {}
+        for index, user_id in enumerate(user_ids):
+            index_by_user_id[user_id] = index
+
+        offsets = _zeros(len(user_ids) + 1)
+        follower_counts = _zeros(len(user_ids))
+        for follower_id, following_id in zip(sources, destinations):
+            offsets[index_by_user_id[follower_id] + 1] += 1
+            follower_counts[index_by_user_id[following_id]] += 1
+        for index in range(len(user_ids)):
+            offsets[index + 1] += offsets[index]
+
+        targets = _zeros(len(sources))
+        next_slot = array("q", offsets[:-1])
+        for follower_id, following_id in zip(sources, destinations):
+            source = index_by_user_id[follower_id]
+            targets[next_slot[source]] = index_by_user_id[following_id]
+            next_slot[source] += 1
+
+        return cls(user_ids, offsets, targets, follower_counts)
+
+    @classmethod
+    def load(cls):
+        edges = Follow.objects.order_by().values_list("follower_id", "following_id").iterator(chunk_size=10000)
+        return cls.from_edges(edges)
+
+    @property
+    def user_count(self):
+        return len(self.user_ids)
+
+    @property
+    def edge_count(self):
+        total = len(self.targets)
+        for targets in self.added.values():
+            total += len(targets)
+        for targets in self.removed.values():
+            total -= len(targets)
+        return total
+
+    def get_age(self):
+        return time.monotonic() - self.built_at
+
+    def get_memory_footprint(self):
+        size = 0
+        for values in (self.user_ids, self.offsets, self.targets, self.follower_counts):
+            size += values.itemsize * len(values)
+        size += sys.getsizeof(self.index_by_user_id)
+        for overlay in (self.added, self.removed):
+            size += sys.getsizeof(overlay)
+            for targets in overlay.values():
+                size += sys.getsizeof(targets)
+        return size
+
+    def _get_or_add_index(self, user_id):
+        index = self.index_by_user_id.get(user_id)
+        if index is None:
+            index = len(self.user_ids)
+            self.user_ids.append(user_id)
+            self.follower_counts.append(0)
+            self.index_by_user_id[user_id] = index
+        return index
+
+    def _base_targets(self, index):
+        if index + 1 >= len(self.offsets):
+            return ()
+        return self.targets[self.offsets[index]:self.offsets[index + 1]]
+
+    def get_following(self, index):
+        following = set(self._base_targets(index))
+        following -= self.removed.get(index, set())
+        following |= self.added.get(index, set())
+        return following
+
+    def add_follow(self, follower_id, following_id):
+        source = self._get_or_add_index(follower_id)
+        target = self._get_or_add_index(following_id)
+        if target in self.get_following(source):
+            return
+
+        removed = self.removed.get(source)
+        if removed and target in removed:
+            removed.discard(target)
+        else:
+            self.added.setdefault(source, set()).add(target)
+        self.follower_counts[target] += 1
+        self._record_change()
+
+    def remove_follow(self, follower_id, following_id):
+        source = self.index_by_user_id.get(follower_id)
+        target = self.index_by_user_id.get(following_id)
+        if source is None or target is None or target not in self.get_following(source):
+            return
+
+        added = self.added.get(source)
+        if added and target in added:
+            added.discard(target)
+        else:
+            self.removed.setdefault(source, set()).add(target)
+        self.follower_counts[target] = max(self.follower_counts[target] - 1, 0)
+        self._record_change()
+
+    def _record_change(self):
+        self.overlay_size += 1
+
+    def has_large_overlay(self):
+        return self.overlay_size > max(1000, len(self.targets) // 10)
+
+    def suggest(self, user_id, limit):
+        index = self.index_by_user_id.get(user_id)
+        if index is None:
+            return []
+
+        following = self.get_following(index)
+        mutual_counts = {}
+        for followee in following:
+            for candidate in self.get_following(followee):
+                if candidate == index or candidate in following:
+                    continue
+                mutual_counts[candidate] = mutual_counts.get(candidate, 0) + 1
+
+        ranked = sorted(
+            mutual_counts.items(),
+            key=lambda item: (-item[1], -self.follower_counts[item[0]], self.user_ids[item[0]]),
+        )
+        suggestions = []
+        for candidate, mutual_count in ranked[:limit]:
+            suggestions.append((self.user_ids[candidate], mutual_count))
+        return suggestions
+
+
+def get_follow_graph_max_age():
+    return getattr(settings, "FOLLOW_GRAPH_MAX_AGE", 600)
+
+
+def is_follow_graph_stale(graph):
+    return graph is None or graph.get_age() > get_follow_graph_max_age() or graph.has_large_overlay()
+
+
+def rebuild_follow_graph(blocking=True, only_if_stale=False):
+    """
+    Loads a new graph from the database and swaps it in.
+
+    Only one thread rebuilds at a time. With `blocking=False` the call
+    returns None straight away when another rebuild is running, so callers
+    can keep using the graph they have. Follow changes applied while the
+    new graph loads are replayed onto it before the swap.
+    """
+
+    global _graph, _pending_changes
+
+    if not _rebuild_lock.acquire(blocking=blocking):
+        return None
+    try:
+        with _graph_lock:
+            if only_if_stale and not is_follow_graph_stale(_graph):
+                return _graph
+            _pending_changes = []
+
+        graph = FollowGraph.load()
+        with _graph_lock:
+            for follower_id, following_id, created in _pending_changes:
+                if created:
+                    graph.add_follow(follower_id, following_id)
+                else:
+                    graph.remove_follow(follower_id, following_id)
+            _graph = graph
+        return graph
+    finally:
+        with _graph_lock:
+            _pending_changes = None
+        _rebuild_lock.release()
+
+
+def get_follow_graph():
+    with _graph_lock:
+        graph = _graph
+    if graph is None:
+        # Nothing to serve yet: wait for the first build, whoever runs it.
+        return rebuild_follow_graph(only_if_stale=True)
+    if is_follow_graph_stale(graph):
+        # One request rebuilds; the others keep serving the stale graph.
+        return rebuild_follow_graph(blocking=False, only_if_stale=True) or graph
+    return graph
+
+
+def apply_follow_change(follower_id, following_id, created):
+    # Only keep a graph that is already loaded up to date; the next read
+    # builds it from the database otherwise. Overlays are not merged
+    # here: once they grow too large the graph counts as stale and the next
+    # read rebuilds it.
+    with _graph_lock:
+        if _pending_changes is not None:
+            _pending_changes.append((follower_id, following_id, created))
+        if _graph is None:
+            return
+        if created:
+            _graph.add_follow(follower_id, following_id)
+        else:
+            _graph.remove_follow(follower_id, following_id)
+
+
+def get_follow_suggestions(user_id, limit):
+    graph = get_follow_graph()
+    with _graph_lock:
+        return graph.suggest(user_id, limit)
+
+
+def reset_follow_graph():
+    global _graph
+    with _graph_lock:
+        _graph = None
@@ -1,6 +1,9 @@
 from django.contrib.auth import authenticate, get_user_model
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
+from apps.media.serializers import ImageSrcsetListSerializer, ImageSrcsetMixin
+
 User = get_user_model()
 
 
@@ -19,8 +22,10 @@ def validate_and_normalize_phone_no(value):
 
 
 class UserSerializer(serializers.ModelSerializer):
-    followers_count = serializers.IntegerField(source="followers.count", read_only=True)
-    following_count = serializers.IntegerField(source="following.count", read_only=True)
+    followers_count = serializers.IntegerField(read_only=True)
+    following_count = serializers.IntegerField(read_only=True)
+    profile_pic_width = serializers.IntegerField(read_only=True, allow_null=True)
+    profile_pic_height = serializers.IntegerField(read_only=True, allow_null=True)
 
     def validate_phone_no(self, value):
         return validate_and_normalize_phone_no(value)
@@ -37,21 +42,62 @@ class UserSerializer(serializers.ModelSerializer):
             "bio",
             "phone_no",
             "profile_pic",
+            "profile_pic_width",
+            "profile_pic_height",
             "dob",
             "followers_count",
             "following_count",
         ]
 
 
-class UserPublicSerializer(serializers.ModelSerializer):
+class UserPublicSerializer(ImageSrcsetMixin, serializers.ModelSerializer):
+    profile_pic_srcset = serializers.SerializerMethodField()
+
+    srcset_source_fields = ("profile_pic",)
+
     class Meta:
         model = User
-        fields = ["id", "username", "display_name", "profile_pic"]
+        fields = [
+            "id",
+            "username",
+            "display_name",
+            "profile_pic",
+            "profile_pic_width",
+            "profile_pic_height",
+            "profile_pic_srcset",
+        ]
+        list_serializer_class = ImageSrcsetListSerializer
+
+    @extend_schema_field(serializers.CharField())
+    def get_profile_pic_srcset(self, obj):
+        return self.get_srcset(obj.profile_pic)
+
+
+class FollowUserSerializer(UserPublicSerializer):
+    followed_at = serializers.DateTimeField(read_only=True)
+
+    class Meta(UserPublicSerializer.Meta):
+        fields = UserPublicSerializer.Meta.fields + ["followed_at"]
+
+
+class UserSuggestionSerializer(UserPublicSerializer):
+    mutual_count = serializers.IntegerField(read_only=True)
+
+    class Meta(UserPublicSerializer.Meta):
+        fields = UserPublicSerializer.Meta.fields + ["mutual_count"]
+
+
+class UserRelationshipSerializer(serializers.Serializer):
+    user_id = serializers.IntegerField()
+    follows = serializers.BooleanField()
+    followed_by = serializers.BooleanField()
+    mutual_followers_count = serializers.IntegerField()
+    mutual_followers = UserPublicSerializer(many=True)
 
 
 class UserPublicDetailSerializer(serializers.ModelSerializer):
-    followers_count = serializers.IntegerField(source="followers.count", read_only=True)
-    following_count = serializers.IntegerField(source="following.count", read_only=True)
+    followers_count = serializers.IntegerField(read_only=True)
+    following_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
@@ -1,9 +1,16 @@
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
+from apps.common.counters import adjust_counter
 from apps.common.email_notifications import send_activity_email
+from apps.common.response_cache import invalidate_on_commit
+from apps.notifications.digests import queue_activity_email
+from apps.notifications.inbox import create_notification
+from apps.notifications.models import EmailDigestWindow, Notification
 from .models import Follow
+from .recommendations import apply_follow_change
 
 User = get_user_model()
 
@@ -17,42 +24,42 @@ def send_follow_email_notification(sender, instance, created, **kwargs):
     if not created:
         return
 
-    recipient_email = instance.following.email
-    if not recipient_email:
+    if not instance.following.email:
         return
 
     follower_name = get_display_text(instance.follower)
-    send_activity_email(
+    queue_activity_email(
+        recipient=instance.following,
+        kind=EmailDigestWindow.KIND_FOLLOW,
+        actor=instance.follower,
         subject=f"{follower_name} started following you",
         message=f"{follower_name} followed you.",
-        recipient_list=[recipient_email],
     )
 
-def has_profile_picture_changed(user):
+
+@receiver(post_save, sender=Follow)
+def create_follow_notification(sender, instance, created, **kwargs):
+    if not created:
+        return
+    create_notification(instance.following_id, Notification.KIND_FOLLOW, instance.follower_id)
+
+
+def has_profile_picture_changed(user, update_fields=None):
     is_new_user = user._state.adding or user.pk is None
     if is_new_user:
         return False
-
-    existing_user = User.objects.filter(pk=user.pk).values("profile_pic").first()
-    if existing_user:
-        previous_profile_picture = existing_user["profile_pic"]
-    else:
-        previous_profile_picture = None
-
-    if previous_profile_picture != user.profile_pic:
-        return True
-    return False
+    return user.has_field_changed("profile_pic", update_fields)
 
 
 @receiver(pre_save, sender=User)
-def mark_profile_pic_change(sender, instance, **kwargs):
-    profile_picture_changed = has_profile_picture_changed(instance)
+def mark_profile_pic_change(sender, instance, update_fields=None, **kwargs):
+    profile_picture_changed = has_profile_picture_changed(instance, update_fields)
 
     if profile_picture_changed:
         instance.profile_picture_updated = True
     else:
         instance.profile_picture_updated = False
-    
+
 @receiver(post_save, sender=User)
 def send_profile_pic_email_notification(sender, instance, created, **kwargs):
     if created:
@@ -71,3 +78,54 @@ def send_profile_pic_email_notification(sender, instance, created, **kwargs):
         message=f"Your account, {username_tag}, has an updated profile picture.",
         recipient_list=[instance.email],
     )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user_responses(sender, instance, **kwargs):
+    invalidate_on_commit("user", instance.pk)
+
+
+def is_deleted_with_user(user_id, origin):
+    return isinstance(origin, User) and origin.pk == user_id
+
+
+@receiver(post_save, sender=Follow)
+def increment_follow_counts(sender, instance, created, **kwargs):
+    if not created:
+        return
+    adjust_counter(User, instance.following_id, "followers_count", 1)
+    adjust_counter(User, instance.follower_id, "following_count", 1)
+
+
+@receiver(post_delete, sender=Follow)
+def decrement_follow_counts(sender, instance, origin=None, **kwargs):
+    # When a user is deleted their own row goes too; only the other side of
+    # each cascaded Follow needs updating.
+    if not is_deleted_with_user(instance.following_id, origin):
+        adjust_counter(User, instance.following_id, "followers_count", -1)
+    if not is_deleted_with_user(instance.follower_id, origin):
+        adjust_counter(User, instance.follower_id, "following_count", -1)
+
+
+@receiver(post_save, sender=Follow)
+def add_follow_to_graph(sender, instance, created, **kwargs):
+    if not created:
+        return
+    follower_id = instance.follower_id
+    following_id = instance.following_id
+    transaction.on_commit(lambda: apply_follow_change(follower_id, following_id, created=True))
+
+
+@receiver(post_delete, sender=Follow)
+def remove_follow_from_graph(sender, instance, **kwargs):
+    follower_id = instance.follower_id
+    following_id = instance.following_id
+    transaction.on_commit(lambda: apply_follow_change(follower_id, following_id, created=False))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_cached_responses_on_follow_change(sender, instance, **kwargs):
+    invalidate_on_commit("user", instance.follower_id)
+    invalidate_on_commit("user", instance.following_id)
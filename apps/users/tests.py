@@ -1,16 +1,28 @@
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core import mail
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from .models import Follow
+from . import recommendations
+from .recommendations import FollowGraph, apply_follow_change, get_follow_graph, reset_follow_graph
+from apps.notifications.models import EmailOutbox
+from apps.notifications.outbox import process_email_outbox
 
 
 User = get_user_model()
+# Just enough of a JPEG for the header probe: SOI and a 32x16 frame header.
+JPEG_32X16 = b"\xff\xd8\xff\xc0\x00\x11\x08\x00\x10\x00\x20\x03" + b"\x00" * 9 + b"\xff\xd9"
 
 
 class UserAuthErrorHandlingTests(APITestCase):
@@ -112,7 +124,7 @@ class UserProfileFeatureTests(APITestCase):
     @override_settings(ALLOWED_HOSTS=["example.com"])
     def test_current_user_profile_can_upload_profile_pic_via_file_field(self):
         self.client.force_authenticate(user=self.user)
-        image = SimpleUploadedFile("avatar.jpg", b"fake-image-content", content_type="image/jpeg")
+        image = SimpleUploadedFile("avatar.jpg", JPEG_32X16, content_type="image/jpeg")
 
         response = self.client.patch(
             reverse("current-user"),
@@ -144,6 +156,21 @@ class UserProfileFeatureTests(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+    def test_user_public_detail_supports_if_none_match(self):
+        url = reverse("user-public-detail", kwargs={"user_id": self.user.id})
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.user.bio = "Updated bio"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["bio"], "Updated bio")
+
 
 class UserFollowFeatureTests(APITestCase):
     def setUp(self):
@@ -173,20 +200,36 @@ class UserFollowFeatureTests(APITestCase):
             reverse("user-following-list", kwargs={"user_id": self.user.id})
         )
         self.assertEqual(following_response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(following_response.data), 1)
-        self.assertEqual(following_response.data[0]["id"], self.target.id)
+        self.assertEqual(len(following_response.data["results"]), 1)
+        self.assertEqual(following_response.data["results"][0]["id"], self.target.id)
 
         followers_response = self.client.get(
             reverse("user-follower-list", kwargs={"user_id": self.target.id})
         )
         self.assertEqual(followers_response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(followers_response.data), 1)
-        self.assertEqual(followers_response.data[0]["id"], self.user.id)
+        self.assertEqual(len(followers_response.data["results"]), 1)
+        self.assertEqual(followers_response.data["results"][0]["id"], self.user.id)
 
         unfollow_response = self.client.post(reverse("follow-toggle", kwargs={"user_id": self.target.id}))
         self.assertEqual(unfollow_response.status_code, status.HTTP_200_OK)
         self.assertFalse(unfollow_response.data["following"])
 
+    def test_follower_list_is_keyset_paginated_by_follow_time(self):
+        Follow.objects.create(follower=self.user, following=self.target)
+        Follow.objects.create(follower=self.other, following=self.target)
+        url = reverse("user-follower-list", kwargs={"user_id": self.target.id})
+
+        first_page = self.client.get(url, {"page_size": 1})
+        with CaptureQueriesContext(connection) as queries:
+            second_page = self.client.get(first_page.data["next"])
+
+        self.assertEqual(first_page.data["results"][0]["id"], self.other.id)
+        self.assertIn("followed_at", first_page.data["results"][0])
+        self.assertEqual(second_page.data["results"][0]["id"], self.user.id)
+        self.assertIsNone(second_page.data["next"])
+        for query in queries.captured_queries:
+            self.assertNotIn("OFFSET", query["sql"].upper())
+
     def test_user_cannot_follow_self(self):
         response = self.client.post(reverse("follow-toggle", kwargs={"user_id": self.user.id}))
 
@@ -203,6 +246,207 @@ class UserFollowFeatureTests(APITestCase):
             Follow.objects.create(follower=self.user, following=self.target)
 
 
+class UserFollowCounterTests(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(
+            username="alice-counter",
+            email="alice-counter@example.com",
+            password="strong-pass-123",
+        )
+        self.bob = User.objects.create_user(
+            username="bob-counter",
+            email="bob-counter@example.com",
+            password="strong-pass-123",
+        )
+        self.carol = User.objects.create_user(
+            username="carol-counter",
+            email="carol-counter@example.com",
+            password="strong-pass-123",
+        )
+
+    def get_counts(self, user):
+        user.refresh_from_db()
+        return user.followers_count, user.following_count
+
+    def test_follow_toggle_updates_both_counters(self):
+        self.client.force_authenticate(user=self.alice)
+        url = reverse("follow-toggle", kwargs={"user_id": self.bob.id})
+
+        self.client.post(url)
+        self.assertEqual(self.get_counts(self.alice), (0, 1))
+        self.assertEqual(self.get_counts(self.bob), (1, 0))
+
+        self.client.post(url)
+        self.assertEqual(self.get_counts(self.alice), (0, 0))
+        self.assertEqual(self.get_counts(self.bob), (0, 0))
+
+    def test_deleting_a_user_updates_the_other_side(self):
+        Follow.objects.create(follower=self.alice, following=self.bob)
+        Follow.objects.create(follower=self.bob, following=self.carol)
+        Follow.objects.create(follower=self.carol, following=self.bob)
+
+        self.bob.delete()
+
+        self.assertEqual(self.get_counts(self.alice), (0, 0))
+        self.assertEqual(self.get_counts(self.carol), (0, 0))
+
+    def test_profile_reads_use_counter_columns(self):
+        Follow.objects.create(follower=self.alice, following=self.bob)
+        url = reverse("user-public-detail", kwargs={"user_id": self.bob.id})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(response.data["followers_count"], 1)
+        for query in queries.captured_queries:
+            self.assertNotIn("users_follow", query["sql"])
+
+    def test_reconcile_command_repairs_drift(self):
+        Follow.objects.create(follower=self.alice, following=self.bob)
+        User.objects.filter(id=self.bob.id).update(followers_count=7)
+        User.objects.filter(id=self.carol.id).update(following_count=3)
+
+        output = StringIO()
+        call_command("reconcile_follow_counters", "--batch-size", "2", stdout=output)
+
+        self.assertEqual(self.get_counts(self.bob), (1, 0))
+        self.assertEqual(self.get_counts(self.carol), (0, 0))
+        self.assertIn("Checked 3 users, fixed 2.", output.getvalue())
+
+
+class FollowSuggestionTests(APITestCase):
+    def setUp(self):
+        reset_follow_graph()
+        self.addCleanup(reset_follow_graph)
+        self.users = {}
+        for name in ("viewer", "amy", "ben", "cal", "dee", "eve"):
+            self.users[name] = User.objects.create_user(
+                username=f"{name}-suggest",
+                email=f"{name}-suggest@example.com",
+                password="strong-pass-123",
+            )
+        self.follow("viewer", "amy")
+        self.follow("viewer", "ben")
+        self.follow("amy", "cal")
+        self.follow("ben", "cal")
+        self.follow("amy", "dee")
+        self.follow("ben", "viewer")
+        self.client.force_authenticate(user=self.users["viewer"])
+        self.url = reverse("user-suggestion-list")
+
+    def follow(self, follower, following):
+        return Follow.objects.create(follower=self.users[follower], following=self.users[following])
+
+    def get_suggestions(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(item["username"], item["mutual_count"]) for item in response.data]
+
+    def test_suggestions_are_ranked_by_mutual_follows(self):
+        self.assertEqual(self.get_suggestions(), [("cal-suggest", 2), ("dee-suggest", 1)])
+
+    def test_graph_follows_follow_changes_after_commit(self):
+        self.get_suggestions()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.follow("ben", "eve")
+            self.follow("viewer", "cal")
+        self.assertEqual(self.get_suggestions(), [("dee-suggest", 1), ("eve-suggest", 1)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.filter(follower=self.users["amy"], following=self.users["dee"]).delete()
+        self.assertEqual(self.get_suggestions(), [("eve-suggest", 1)])
+
+    def test_large_overlay_makes_the_next_read_rebuild_the_graph(self):
+        graph = get_follow_graph()
+        graph.overlay_size = 1001
+
+        rebuilt = get_follow_graph()
+
+        self.assertIsNot(rebuilt, graph)
+        self.assertEqual((rebuilt.overlay_size, rebuilt.added, rebuilt.removed), (0, {}, {}))
+
+    @override_settings(FOLLOW_GRAPH_MAX_AGE=0)
+    def test_stale_graph_is_served_while_another_request_rebuilds(self):
+        stale_graph = get_follow_graph()
+
+        with recommendations._rebuild_lock:
+            with self.assertNumQueries(0):
+                self.assertIs(get_follow_graph(), stale_graph)
+
+        self.assertIsNot(get_follow_graph(), stale_graph)
+
+    def test_follow_changes_during_a_rebuild_are_replayed_onto_the_new_graph(self):
+        load = FollowGraph.load
+
+        def load_while_following():
+            graph = load()
+            # Committed after the rebuild read the follow table.
+            apply_follow_change(self.users["viewer"].id, self.users["cal"].id, True)
+            return graph
+
+        with mock.patch.object(FollowGraph, "load", side_effect=load_while_following):
+            graph = recommendations.rebuild_follow_graph()
+
+        viewer_index = graph.index_by_user_id[self.users["viewer"].id]
+        cal_index = graph.index_by_user_id[self.users["cal"].id]
+        self.assertIn(cal_index, graph.get_following(viewer_index))
+
+    def test_rebuild_command_reports_graph_size(self):
+        output = StringIO()
+        call_command("rebuild_follow_graph", stdout=output)
+
+        self.assertIn("Loaded 5 users and 6 follows", output.getvalue())
+        self.assertIn("KiB", output.getvalue())
+
+
+class UserRelationshipTests(APITestCase):
+    def setUp(self):
+        self.users = {}
+        for name in ("viewer", "target", "amy", "ben", "cal", "dee"):
+            self.users[name] = User.objects.create_user(
+                username=f"{name}-relation",
+                email=f"{name}-relation@example.com",
+                password="strong-pass-123",
+            )
+        for name in ("amy", "ben", "cal", "dee"):
+            self.follow(name, "target")
+        for name in ("amy", "ben", "cal"):
+            self.follow("viewer", name)
+        self.follow("dee", "ben")
+        self.follow("target", "viewer")
+        self.client.force_authenticate(user=self.users["viewer"])
+
+    def follow(self, follower, following):
+        Follow.objects.create(follower=self.users[follower], following=self.users[following])
+
+    @override_settings(RELATIONSHIP_MUTUAL_SAMPLE_SIZE=2)
+    def test_relationship_returns_status_and_mutual_sample(self):
+        url = reverse("user-relationship", kwargs={"user_id": self.users["target"].id})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data["follows"])
+        self.assertTrue(response.data["followed_by"])
+        self.assertEqual(response.data["mutual_followers_count"], 3)
+        self.assertEqual(
+            [user["username"] for user in response.data["mutual_followers"]],
+            ["ben-relation", "amy-relation"],
+        )
+        self.assertEqual(len(queries.captured_queries), 3)
+
+    def test_relationship_with_self_and_missing_user(self):
+        own_url = reverse("user-relationship", kwargs={"user_id": self.users["viewer"].id})
+        response = self.client.get(own_url)
+        self.assertEqual(response.data["mutual_followers_count"], 0)
+        self.assertFalse(response.data["follows"])
+
+        missing_url = reverse("user-relationship", kwargs={"user_id": 999999})
+        self.assertEqual(self.client.get(missing_url).status_code, status.HTTP_404_NOT_FOUND)
+
+
 @override_settings(
     EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
     DEFAULT_FROM_EMAIL="no-reply@test.local",
@@ -228,6 +472,7 @@ class UserEmailNotificationTests(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        process_email_outbox()
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].to, [self.target.email])
         self.assertIn("started following you", mail.outbox[0].subject)
@@ -243,6 +488,7 @@ class UserEmailNotificationTests(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        process_email_outbox()
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].to, [self.user.email])
         self.assertIn("New login to your account", mail.outbox[0].subject)
@@ -255,6 +501,7 @@ class UserEmailNotificationTests(APITestCase):
             password="strong-pass-123",
         )
         Follow.objects.create(follower=follower, following=self.user)
+        process_email_outbox()
         mail.outbox = []
 
         self.client.force_authenticate(user=self.user)
@@ -265,6 +512,7 @@ class UserEmailNotificationTests(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        process_email_outbox()
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].to, [self.user.email])
         self.assertNotIn(follower.email, mail.outbox[0].to)
@@ -280,7 +528,42 @@ class UserEmailNotificationTests(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        process_email_outbox()
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].to, [self.user.email])
         self.assertIn("updated profile picture", mail.outbox[0].subject)
         self.assertIn(self.user.username, mail.outbox[0].body)
+
+    def test_profile_pic_change_detection_does_not_reload_the_user(self):
+        def profile_pic_selects(queries):
+            selects = []
+            for query in queries.captured_queries:
+                if query["sql"].startswith('SELECT "users_user"."profile_pic" FROM'):
+                    selects.append(query["sql"])
+            return selects
+
+        self.client.force_authenticate(user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(reverse("current-user"), {"display_name": "New name"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(profile_pic_selects(queries), [])
+        self.assertFalse(EmailOutbox.objects.exists())
+
+        self.client.force_authenticate(user=None)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("user-login"),
+                {"username": self.user.username, "password": "strong-pass-123"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(profile_pic_selects(queries), [])
+
+        user = User.objects.get(pk=self.user.pk)
+        user.profile_pic = "https://example.com/unsaved.jpg"
+        user.save(update_fields=["display_name"])
+        self.assertFalse(user.profile_picture_updated)
+        user.save()
+        self.assertTrue(user.profile_picture_updated)
+        user.save()
+        self.assertFalse(user.profile_picture_updated)
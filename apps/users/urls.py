@@ -9,14 +9,18 @@ from .views import (
     UserFollowingListAPIView,
     UserLoginAPIView,
     UserRegistrationAPIView,
+    UserRelationshipAPIView,
+    UserSuggestionListAPIView,
 )
 
 urlpatterns = [
     path("auth/register/", UserRegistrationAPIView.as_view(), name="user-register"),
     path("auth/login/", UserLoginAPIView.as_view(), name="user-login"),
     path("auth/me/", CurrentUserAPIView.as_view(), name="current-user"),
+    path("users/suggestions/", UserSuggestionListAPIView.as_view(), name="user-suggestion-list"),
     path("users/<int:user_id>/", UserPublicDetailAPIView.as_view(), name="user-public-detail"),
     path("users/<int:user_id>/follow/", FollowToggleAPIView.as_view(), name="follow-toggle"),
+    path("users/<int:user_id>/relationship/", UserRelationshipAPIView.as_view(), name="user-relationship"),
     path("users/<int:user_id>/followers/", UserFollowerListAPIView.as_view(), name="user-follower-list"),
     path("users/<int:user_id>/following/", UserFollowingListAPIView.as_view(), name="user-following-list"),
     path("uploads/image/", ImageUploadAPIView.as_view(), name="image-upload"),
@@ -1,5 +1,9 @@
+from django.conf import settings
 from django.db import transaction
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Q, Window
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema, extend_schema_view
 from rest_framework import status
 from rest_framework.authtoken.models import Token
@@ -8,19 +12,25 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.common.conditional import make_etag
 from apps.common.email_notifications import send_activity_email
 from apps.common.image_utils import upload_image_file
+from apps.common.pagination import PAGINATION_PARAMETERS, KeysetPagination, get_paginated_serializer
+from apps.common.response_cache import get_cached_response
 from .models import Follow
+from .recommendations import get_follow_suggestions
 from .serializers import (
     FollowToggleResponseSerializer,
+    FollowUserSerializer,
     ImageUploadRequestSerializer,
     ImageUploadResponseSerializer,
     TokenSerializer,
     UserLoginSerializer,
     UserPublicDetailSerializer,
-    UserPublicSerializer,
     UserRegistrationSerializer,
+    UserRelationshipSerializer,
     UserSerializer,
+    UserSuggestionSerializer,
     UserWithTokenSerializer,
 )
 
@@ -35,6 +45,71 @@ def get_user_or_404(user_id):
     return user
 
 
+def get_suggestion_limit(request):
+    default_limit = getattr(settings, "FOLLOW_SUGGESTIONS_LIMIT", 20)
+    max_limit = getattr(settings, "API_MAX_PAGE_SIZE", 100)
+    try:
+        limit = int(request.query_params.get("limit", default_limit))
+    except (TypeError, ValueError):
+        return default_limit
+    if limit <= 0:
+        return default_limit
+    return min(limit, max_limit)
+
+
+def get_mutual_followers(viewer_id, target_id, sample_size):
+    # Users the viewer follows who also follow the target: both sides come
+    # from one join over the Follow indexes, and the window count gives the
+    # total without a second query or loading every match.
+    mutual_followers = list(
+        User.objects.filter(
+            following_relationships__following_id=target_id,
+            follower_relationships__follower_id=viewer_id,
+        )
+        .only("id", "username", "display_name", "profile_pic", "profile_pic_width", "profile_pic_height")
+        .annotate(mutual_total=Window(Count("id")))
+        .order_by("-followers_count", "id")[:sample_size]
+    )
+    if not mutual_followers:
+        return 0, []
+    return mutual_followers[0].mutual_total, mutual_followers
+
+
+def get_follow_page(request, follows, user_field):
+    paginator = KeysetPagination()
+    page = paginator.paginate_queryset(follows.select_related(user_field), request)
+
+    users = []
+    for follow in page:
+        user = getattr(follow, user_field)
+        user.followed_at = follow.created_at
+        users.append(user)
+
+    serializer = FollowUserSerializer(users, many=True)
+    return paginator.get_paginated_response(serializer.data)
+
+
+def user_detail_etag(request, user_id):
+    row = (
+        User.objects.filter(id=user_id)
+        .values_list(
+            "id",
+            "username",
+            "first_name",
+            "last_name",
+            "display_name",
+            "bio",
+            "profile_pic",
+            "followers_count",
+            "following_count",
+        )
+        .first()
+    )
+    if row is None:
+        return None
+    return make_etag(*row)
+
+
 @extend_schema_view(
     post=extend_schema(
         summary="Register a new user",
@@ -179,7 +254,16 @@ class CurrentUserAPIView(APIView):
 class UserPublicDetailAPIView(APIView):
     permission_classes = [AllowAny]
 
+    @method_decorator(condition(etag_func=user_detail_etag))
     def get(self, request, user_id):
+        return get_cached_response(
+            request,
+            "user-detail",
+            lambda: self.build_get_response(user_id),
+            dependencies=[("user", user_id)],
+        )
+
+    def build_get_response(self, user_id):
         user = get_user_or_404(user_id)
         serializer = UserPublicDetailSerializer(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -260,12 +344,14 @@ class FollowToggleAPIView(APIView):
 @extend_schema_view(
     get=extend_schema(
         summary="List followers of a user",
+        description="Returns the users following this user, most recent first, with the time of each follow in `followed_at`.",
         tags=["Follows"],
         parameters=[
             OpenApiParameter("user_id", int, OpenApiParameter.PATH, description="User id"),
+            *PAGINATION_PARAMETERS,
         ],
         responses={
-            200: UserPublicSerializer(many=True),
+            200: get_paginated_serializer(FollowUserSerializer),
             401: OpenApiResponse(description="Authentication required"),
             404: OpenApiResponse(description="User not found"),
         },
@@ -276,19 +362,20 @@ class UserFollowerListAPIView(APIView):
 
     def get(self, request, user_id):
         user = get_user_or_404(user_id)
-        serializer = UserPublicSerializer(user.followers.all(), many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return get_follow_page(request, Follow.objects.filter(following=user), "follower")
 
 
 @extend_schema_view(
     get=extend_schema(
         summary="List users followed by a user",
+        description="Returns the users this user follows, most recent first, with the time of each follow in `followed_at`.",
         tags=["Follows"],
         parameters=[
             OpenApiParameter("user_id", int, OpenApiParameter.PATH, description="User id"),
+            *PAGINATION_PARAMETERS,
         ],
         responses={
-            200: UserPublicSerializer(many=True),
+            200: get_paginated_serializer(FollowUserSerializer),
             401: OpenApiResponse(description="Authentication required"),
             404: OpenApiResponse(description="User not found"),
         },
@@ -299,5 +386,94 @@ class UserFollowingListAPIView(APIView):
 
     def get(self, request, user_id):
         user = get_user_or_404(user_id)
-        serializer = UserPublicSerializer(user.following.all(), many=True)
+        return get_follow_page(request, Follow.objects.filter(follower=user), "following")
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="Suggest users to follow",
+        description=(
+            "Returns accounts followed by the people you follow, ranked by how many of them follow each "
+            "account (`mutual_count`)."
+        ),
+        tags=["Follows"],
+        parameters=[
+            OpenApiParameter("limit", int, OpenApiParameter.QUERY, description="Maximum number of suggestions"),
+        ],
+        responses={
+            200: UserSuggestionSerializer(many=True),
+            401: OpenApiResponse(description="Authentication required"),
+        },
+    )
+)
+class UserSuggestionListAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        suggestions = get_follow_suggestions(request.user.id, get_suggestion_limit(request))
+        users_by_id = User.objects.in_bulk([user_id for user_id, _ in suggestions])
+
+        users = []
+        for user_id, mutual_count in suggestions:
+            user = users_by_id.get(user_id)
+            if user is None or not user.is_active:
+                continue
+            user.mutual_count = mutual_count
+            users.append(user)
+
+        serializer = UserSuggestionSerializer(users, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="Get relationship with a user",
+        description=(
+            "Returns whether you follow the user, whether they follow you, and the people you follow "
+            "who also follow them (a sample plus the total count)."
+        ),
+        tags=["Follows"],
+        parameters=[
+            OpenApiParameter("user_id", int, OpenApiParameter.PATH, description="User id"),
+        ],
+        responses={
+            200: UserRelationshipSerializer,
+            401: OpenApiResponse(description="Authentication required"),
+            404: OpenApiResponse(description="User not found"),
+        },
+    )
+)
+class UserRelationshipAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, user_id):
+        target_user = get_user_or_404(user_id)
+        viewer = request.user
+
+        follows = False
+        followed_by = False
+        mutual_followers_count = 0
+        mutual_followers = []
+        if viewer.id != target_user.id:
+            follow_pairs = Follow.objects.filter(
+                Q(follower=viewer, following=target_user) | Q(follower=target_user, following=viewer)
+            ).values_list("follower_id", flat=True)
+            for follower_id in follow_pairs:
+                if follower_id == viewer.id:
+                    follows = True
+                else:
+                    followed_by = True
+
+            sample_size = getattr(settings, "RELATIONSHIP_MUTUAL_SAMPLE_SIZE", 3)
+            mutual_followers_count, mutual_followers = get_mutual_followers(viewer.id, target_user.id, sample_size)
+
+        serializer = UserRelationshipSerializer(
+            {
+                "user_id": target_user.id,
+                "follows": follows,
+                "followed_by": followed_by,
+                "mutual_followers_count": mutual_followers_count,
+                "mutual_followers": mutual_followers,
+            }
+        )
         return Response(serializer.data, status=status.HTTP_200_OK)
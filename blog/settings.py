@@ -43,6 +43,8 @@ INSTALLED_APPS = [
     'drf_spectacular',
     'apps.users',
     'apps.posts',
+    'apps.notifications',
+    'apps.media',
 ]
 
 MIDDLEWARE = [
@@ -86,6 +88,20 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'blog-default'),
+    }
+}
+
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', '300'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -123,6 +139,26 @@ USE_TZ = True
 STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Media is served by apps.media.views.serve_media. Set MEDIA_X_ACCEL_REDIRECT_PREFIX (nginx
+# internal location) or MEDIA_X_SENDFILE (Apache/lighttpd) to let the front proxy send the bytes.
+SERVE_MEDIA = os.getenv("SERVE_MEDIA", "True").lower() == "true"
+MEDIA_X_ACCEL_REDIRECT_PREFIX = os.getenv("MEDIA_X_ACCEL_REDIRECT_PREFIX", "")
+MEDIA_X_SENDFILE = os.getenv("MEDIA_X_SENDFILE", "False").lower() == "true"
+MEDIA_CACHE_MAX_AGE = 3600
+# Unreferenced uploads are kept this long before reclaim_image_blobs deletes them.
+IMAGE_BLOB_GRACE_HOURS = 24
+# Uploads whose header declares more pixels than this are rejected unread.
+MAX_IMAGE_PIXELS = 40_000_000
+# Resumable uploads (/api/uploads/sessions/); partial files go to the system temp dir
+# unless UPLOAD_SESSION_DIR is set. prune_upload_sessions removes expired ones.
+UPLOAD_SESSION_MAX_BYTES = 20 * 1024 * 1024
+UPLOAD_SESSION_TTL_HOURS = 24
+# Resized copies rendered for each new upload (needs Pillow); narrower widths only.
+IMAGE_RENDITION_WIDTHS = (96, 480, 1080)
+IMAGE_RENDITION_FORMAT = "webp"
+IMAGE_RENDITION_QUALITY = 80
+IMAGE_RENDITION_WORKERS = 2
+IMAGE_RENDITIONS_ASYNC = True
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -137,8 +173,12 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'EXCEPTION_HANDLER': 'blog.exceptions.custom_exception_handler',
+    'DEFAULT_PAGINATION_CLASS': 'apps.common.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
 }
 
+API_MAX_PAGE_SIZE = 100
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Blog API',
     'DESCRIPTION': 'OpenAPI schema for the Blog backend APIs.',
@@ -174,3 +214,35 @@ EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
 EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "False").lower() == "true"
 EMAIL_USE_SSL = os.getenv("EMAIL_USE_SSL", "False").lower() == "true"
 EMAIL_SEND_ASYNC = True
+EMAIL_USE_OUTBOX = True
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_LEASE_SECONDS = 300
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = 60
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = 3600
+EMAIL_EXECUTOR_WORKERS = 4
+EMAIL_EXECUTOR_QUEUE_SIZE = 1000
+EMAIL_EXECUTOR_OVERFLOW_POLICY = "block"
+EMAIL_EXECUTOR_BLOCK_TIMEOUT = 5
+EMAIL_EXECUTOR_SHUTDOWN_TIMEOUT = 30
+NEW_POST_EMAIL_CHUNK_SIZE = 500
+NEW_POST_EMAIL_DELIVERY = "personalized"
+EMAIL_DIGEST_WINDOW_SECONDS = 900
+
+NOTIFICATION_FANOUT_CHUNK_SIZE = 1000
+NOTIFICATION_RETENTION_DAYS = 30
+
+POST_SEARCH_MAX_RESULTS = 50
+POST_BULK_MAX_ITEMS = 500
+
+FOLLOW_GRAPH_MAX_AGE = 600
+FOLLOW_SUGGESTIONS_LIMIT = 20
+RELATIONSHIP_MUTUAL_SAMPLE_SIZE = 3
+
+TAG_TRENDING_WINDOW_HOURS = 24
+TAG_TRENDING_LIMIT = 20
+
+TIMELINE_MAX_LENGTH = 800
+TIMELINE_BACKFILL_SIZE = 50
+TIMELINE_FANOUT_BATCH_SIZE = 1000
+TIMELINE_FANOUT_MAX_FOLLOWERS = 10000